@@ -0,0 +1,257 @@
+/*
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+/*
+ * ClassifierHelper.java
+ * Copyright (C) 2019 Fracpete (fracpete at gmail dot com)
+ */
+
+package weka.classifiers;
+
+import weka.core.BatchPredictor;
+import weka.core.Instances;
+import weka.core.InstancesHelper;
+import weka.core.Utils;
+
+import java.io.RandomAccessFile;
+import java.nio.ByteOrder;
+import java.nio.DoubleBuffer;
+import java.nio.channels.FileChannel;
+
+/**
+ * Helper class for making predictions for whole datasets in a single call,
+ * regardless of whether the classifier is a batch predictor or not.
+ *
+ * @author FracPete (fracpete at gmail dot com)
+ */
+public class ClassifierHelper {
+
+  /**
+   * Returns the batch size to use for the classifier.
+   *
+   * @param classifier	the classifier to get the batch size for
+   * @param numRows	the number of rows in the dataset
+   * @return		the batch size, the number of rows if not a batch predictor or invalid batch size
+   */
+  protected static int getBatchSize(Classifier classifier, int numRows) {
+    int		result;
+
+    result = numRows;
+    if (classifier instanceof BatchPredictor) {
+      try {
+	result = Integer.parseInt(((BatchPredictor) classifier).getBatchSize());
+      }
+      catch (Exception e) {
+	result = numRows;
+      }
+    }
+    if (result <= 0)
+      result = numRows;
+
+    return result;
+  }
+
+  /**
+   * Checks whether the classifier is a batch predictor that implements a
+   * more efficient batch prediction.
+   *
+   * @param classifier	the classifier to check
+   * @return		true if efficient batch predictor
+   */
+  protected static boolean isEfficientBatchPredictor(Classifier classifier) {
+    return (classifier instanceof BatchPredictor)
+      && ((BatchPredictor) classifier).implementsMoreEfficientBatchPrediction();
+  }
+
+  /**
+   * Maps the file for writing the specified number of doubles (native byte
+   * order) to it.
+   *
+   * @param file	the file to map
+   * @param numValues	the number of doubles
+   * @return		the buffer
+   * @throws Exception	if mapping fails or too many values for a single mapping
+   */
+  protected static DoubleBuffer map(String file, long numValues) throws Exception {
+    RandomAccessFile	raf;
+
+    if (numValues * 8L > InstancesHelper.MAX_MAP_SIZE)
+      throw new IllegalArgumentException("Too many values for a shared buffer: " + numValues);
+    raf = new RandomAccessFile(file, "rw");
+    try {
+      raf.setLength(numValues * 8L);
+      return raf.getChannel().map(FileChannel.MapMode.READ_WRITE, 0, numValues * 8L)
+	.order(ByteOrder.nativeOrder()).asDoubleBuffer();
+    }
+    finally {
+      raf.close();
+    }
+  }
+
+  /**
+   * Writes the class distributions for all the instances to the buffer
+   * (row-major, one row per instance). Batch predictors get queried in chunks
+   * of their batch size, all other classifiers instance by instance.
+   *
+   * @param classifier	the classifier to use
+   * @param data	the instances to make predictions for
+   * @param result	the buffer to write the distributions to
+   * @throws Exception	if predictions fail
+   */
+  protected static void distributionsForInstances(Classifier classifier, Instances data, DoubleBuffer result) throws Exception {
+    double[][]	dists;
+    int		numRows;
+    int		numClasses;
+    int		batchSize;
+    int		from;
+    int		num;
+    int		i;
+
+    numRows    = data.numInstances();
+    numClasses = data.numClasses();
+
+    if (classifier instanceof BatchPredictor) {
+      batchSize = getBatchSize(classifier, numRows);
+      for (from = 0; from < numRows; from += batchSize) {
+	num = Math.min(batchSize, numRows - from);
+	if ((from == 0) && (num == numRows))
+	  dists = ((BatchPredictor) classifier).distributionsForInstances(data);
+	else
+	  dists = ((BatchPredictor) classifier).distributionsForInstances(new Instances(data, from, num));
+	for (i = 0; i < num; i++)
+	  result.put(dists[i], 0, numClasses);
+      }
+    }
+    else {
+      for (i = 0; i < numRows; i++)
+	result.put(classifier.distributionForInstance(data.instance(i)), 0, numClasses);
+    }
+  }
+
+  /**
+   * Returns the class distributions for all the instances as flat array
+   * (row-major, one row per instance).
+   *
+   * @param classifier	the classifier to use
+   * @param data	the instances to make predictions for
+   * @return		the class distributions
+   * @throws Exception	if predictions fail
+   * @see		#distributionsForInstances(Classifier, Instances, DoubleBuffer)
+   */
+  public static double[] distributionsForInstances(Classifier classifier, Instances data) throws Exception {
+    double[]	result;
+
+    result = new double[data.numInstances() * data.numClasses()];
+    distributionsForInstances(classifier, data, DoubleBuffer.wrap(result));
+
+    return result;
+  }
+
+  /**
+   * Writes the class distributions for all the instances to the
+   * memory-mapped file (row-major, doubles in native byte order), without
+   * creating an intermediate array.
+   *
+   * @param classifier	the classifier to use
+   * @param data	the instances to make predictions for
+   * @param file	the file to map and write to
+   * @throws Exception	if predictions or mapping of file fail
+   * @see		#distributionsForInstances(Classifier, Instances, DoubleBuffer)
+   */
+  public static void distributionsForInstances(Classifier classifier, Instances data, String file) throws Exception {
+    distributionsForInstances(classifier, data, map(file, (long) data.numInstances() * data.numClasses()));
+  }
+
+  /**
+   * Writes the classifications for all the instances to the buffer. Batch
+   * predictors that implement a more efficient batch prediction get queried
+   * for the distributions (in chunks of their batch size), all other
+   * classifiers instance by instance.
+   *
+   * @param classifier	the classifier to use
+   * @param data	the instances to make predictions for
+   * @param result	the buffer to write the classifications to (regression value or 0-based label index, missing value if none)
+   * @throws Exception	if predictions fail
+   */
+  protected static void classifyInstances(Classifier classifier, Instances data, DoubleBuffer result) throws Exception {
+    double[]	dists;
+    int		numRows;
+    int		numClasses;
+    int		i;
+    int		n;
+    int		maxIndex;
+    double	max;
+
+    numRows = data.numInstances();
+
+    if (isEfficientBatchPredictor(classifier)) {
+      numClasses = data.numClasses();
+      dists      = distributionsForInstances(classifier, data);
+      for (i = 0; i < numRows; i++) {
+	if (data.classAttribute().isNumeric()) {
+	  result.put(dists[i * numClasses]);
+	}
+	else {
+	  maxIndex = -1;
+	  max      = 0;
+	  for (n = 0; n < numClasses; n++) {
+	    if (dists[i * numClasses + n] > max) {
+	      max      = dists[i * numClasses + n];
+	      maxIndex = n;
+	    }
+	  }
+	  result.put((maxIndex == -1) ? Utils.missingValue() : maxIndex);
+	}
+      }
+    }
+    else {
+      for (i = 0; i < numRows; i++)
+	result.put(classifier.classifyInstance(data.instance(i)));
+    }
+  }
+
+  /**
+   * Returns the classifications for all the instances.
+   *
+   * @param classifier	the classifier to use
+   * @param data	the instances to make predictions for
+   * @return		the classifications (regression value or 0-based label index), missing value if none
+   * @throws Exception	if predictions fail
+   * @see		#classifyInstances(Classifier, Instances, DoubleBuffer)
+   */
+  public static double[] classifyInstances(Classifier classifier, Instances data) throws Exception {
+    double[]	result;
+
+    result = new double[data.numInstances()];
+    classifyInstances(classifier, data, DoubleBuffer.wrap(result));
+
+    return result;
+  }
+
+  /**
+   * Writes the classifications for all the instances to the memory-mapped
+   * file (doubles in native byte order), without creating an intermediate
+   * array.
+   *
+   * @param classifier	the classifier to use
+   * @param data	the instances to make predictions for
+   * @param file	the file to map and write to
+   * @throws Exception	if predictions or mapping of file fail
+   * @see		#classifyInstances(Classifier, Instances, DoubleBuffer)
+   */
+  public static void classifyInstances(Classifier classifier, Instances data, String file) throws Exception {
+    classifyInstances(classifier, data, map(file, data.numInstances()));
+  }
+}
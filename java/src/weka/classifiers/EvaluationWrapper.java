@@ -20,6 +20,23 @@
 
 package weka.classifiers;
 
+import java.lang.reflect.Field;
+import java.lang.reflect.Method;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.Random;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+import weka.classifiers.evaluation.NominalPrediction;
+import weka.classifiers.evaluation.NumericPrediction;
+import weka.classifiers.evaluation.Prediction;
+import weka.classifiers.evaluation.output.prediction.AbstractOutput;
+import weka.classifiers.misc.InputMappedClassifier;
+import weka.core.BatchPredictor;
+import weka.core.Instance;
 import weka.core.Instances;
 
 /**
@@ -29,6 +46,69 @@ import weka.core.Instances;
  */
 public class EvaluationWrapper {
 
+  /** the methods for the scalar statistics returned by getMetrics. */
+  public final static String[] SCALAR_METRICS = new String[]{
+    "correct",
+    "incorrect",
+    "unclassified",
+    "numInstances",
+    "pctCorrect",
+    "pctIncorrect",
+    "pctUnclassified",
+    "kappa",
+    "correlationCoefficient",
+    "errorRate",
+    "meanAbsoluteError",
+    "rootMeanSquaredError",
+    "relativeAbsoluteError",
+    "rootRelativeSquaredError",
+    "meanPriorAbsoluteError",
+    "rootMeanPriorSquaredError",
+    "avgCost",
+    "totalCost",
+    "coverageOfTestCasesByPredictedRegions",
+    "sizeOfPredictedRegions",
+    "KBInformation",
+    "KBMeanInformation",
+    "KBRelativeInformation",
+    "SFEntropyGain",
+    "SFMeanEntropyGain",
+    "SFMeanPriorEntropy",
+    "SFMeanSchemeEntropy",
+    "SFPriorEntropy",
+    "SFSchemeEntropy",
+    "weightedAreaUnderPRC",
+    "weightedAreaUnderROC",
+    "weightedFalseNegativeRate",
+    "weightedFalsePositiveRate",
+    "weightedTrueNegativeRate",
+    "weightedTruePositiveRate",
+    "weightedFMeasure",
+    "weightedPrecision",
+    "weightedRecall",
+    "weightedMatthewsCorrelation",
+    "unweightedMacroFmeasure",
+    "unweightedMicroFmeasure",
+  };
+
+  /** the methods for the per-class statistics returned by getMetrics. */
+  public final static String[] CLASS_METRICS = new String[]{
+    "areaUnderPRC",
+    "areaUnderROC",
+    "falseNegativeRate",
+    "falsePositiveRate",
+    "trueNegativeRate",
+    "truePositiveRate",
+    "numFalseNegatives",
+    "numFalsePositives",
+    "numTrueNegatives",
+    "numTruePositives",
+    "fMeasure",
+    "precision",
+    "recall",
+    "matthewsCorrelationCoefficient",
+  };
+
   /** the wrapped evaluation object. */
   protected Evaluation m_Evaluation;
 
@@ -65,6 +145,37 @@ public class EvaluationWrapper {
     }
   }
 
+  /**
+   * Initializes the wrapper with an existing evaluation object.
+   *
+   * @param eval the evaluation object to wrap
+   */
+  public EvaluationWrapper(Evaluation eval) {
+    m_Evaluation = eval;
+  }
+
+  /**
+   * Merges the statistics (and predictions) of the other evaluation with
+   * the ones of the wrapped evaluation object, which gets replaced with the
+   * merged one. The other evaluation must have been obtained with the same
+   * header.
+   *
+   * @param other	the evaluation to merge with
+   * @throws Exception	if merging fails
+   */
+  public void merge(Evaluation other) throws Exception {
+    AggregateableEvaluation	agg;
+    String			msg;
+
+    msg = m_Evaluation.getHeader().equalHeadersMsg(other.getHeader());
+    if (msg != null)
+      throw new IllegalArgumentException("Evaluations are incompatible:\n" + msg);
+    agg = new AggregateableEvaluation(m_Evaluation);
+    agg.aggregate(m_Evaluation);
+    agg.aggregate(other);
+    m_Evaluation = agg;
+  }
+
   /**
    * Returns the wrapped evaluation object.
    *
@@ -73,4 +184,317 @@ public class EvaluationWrapper {
   public Evaluation getEvaluation() {
     return m_Evaluation;
   }
+
+  /**
+   * Sets the number of folds in the evaluation object (or its delegate),
+   * if possible.
+   *
+   * @param numFolds	the number of folds
+   */
+  protected void setNumFolds(int numFolds) {
+    Object	obj;
+    Class	cls;
+    Field	field;
+    int		i;
+
+    obj = m_Evaluation;
+    for (i = 0; i < 2; i++) {
+      cls = obj.getClass();
+      while (cls != null) {
+	try {
+	  field = cls.getDeclaredField("m_NumFolds");
+	  field.setAccessible(true);
+	  field.setInt(obj, numFolds);
+	  return;
+	}
+	catch (Exception e) {
+	  cls = cls.getSuperclass();
+	}
+      }
+      // try delegate
+      try {
+	field = Evaluation.class.getDeclaredField("m_delegate");
+	field.setAccessible(true);
+	obj = field.get(m_Evaluation);
+	if (obj == null)
+	  return;
+      }
+      catch (Exception e) {
+	return;
+      }
+    }
+  }
+
+  /**
+   * Checks whether the classifier is a batch predictor that implements a
+   * more efficient batch prediction, in which case Evaluation.evaluateModel
+   * records the predictions from the distributions.
+   *
+   * @param classifier	the classifier to check
+   * @return		true if efficient batch predictor
+   */
+  protected static boolean isEfficientBatchPredictor(Classifier classifier) {
+    return (classifier instanceof BatchPredictor)
+      && ((BatchPredictor) classifier).implementsMoreEfficientBatchPrediction();
+  }
+
+  /**
+   * Computes the class distributions for the test set, with the class values
+   * set to missing (like the Evaluation class does).
+   *
+   * @param classifier	the trained classifier
+   * @param test	the test set
+   * @return		the distributions
+   * @throws Exception	if predictions fail
+   */
+  protected static double[][] distributionsForTestSet(Classifier classifier, Instances test) throws Exception {
+    double[][]	result;
+    Instances	data;
+    Instance	classMissing;
+    int		i;
+
+    if (isEfficientBatchPredictor(classifier)) {
+      data = new Instances(test);
+      for (i = 0; i < data.numInstances(); i++)
+	data.instance(i).setClassMissing();
+      return ((BatchPredictor) classifier).distributionsForInstances(data);
+    }
+
+    result = new double[test.numInstances()][];
+    for (i = 0; i < test.numInstances(); i++) {
+      classMissing = (Instance) test.instance(i).copy();
+      classMissing.setDataset(test);
+      classMissing.setClassMissing();
+      result[i] = classifier.distributionForInstance(classMissing);
+    }
+
+    return result;
+  }
+
+  /**
+   * Performs a cross-validation, training the folds in parallel on copies of
+   * the classifier (batch predictors with a more efficient batch prediction
+   * also compute their predictions in parallel). The folds get generated and
+   * the predictions get recorded sequentially in fold order, using the same
+   * recording methods as Evaluation.evaluateModel (i.e., interval estimator
+   * and conditional density estimator statistics get updated), therefore the
+   * results are the same as with the sequential cross-validation of the
+   * Evaluation class for the same random number generator.
+   *
+   * @param classifier	the classifier to cross-validate
+   * @param data	the data to use
+   * @param numFolds	the number of folds
+   * @param random	the random number generator to use
+   * @param numThreads	the number of threads to use, -1 for number of cores
+   * @param forPrinting	the output generator (AbstractOutput) or StringBuffer for the models
+   * @throws Exception	if cross-validation fails
+   */
+  public void crossValidateModel(final Classifier classifier, Instances data, int numFolds, Random random, int numThreads, Object[] forPrinting) throws Exception {
+    ExecutorService		executor;
+    List<Instances>		trains;
+    List<Instances>		tests;
+    List<Future<Object[]>>	folds;
+    AbstractOutput		output;
+    Object[]			fold;
+    Instances			test;
+    double[][]			dist;
+    int				i;
+    int				n;
+
+    if (numThreads <= 0)
+      numThreads = Runtime.getRuntime().availableProcessors();
+    if ((numThreads == 1) || (classifier instanceof InputMappedClassifier)) {
+      m_Evaluation.crossValidateModel(classifier, data, numFolds, random, forPrinting);
+      return;
+    }
+
+    // generate folds (same sequence of random numbers as Evaluation.crossValidateModel)
+    data = new Instances(data);
+    data.randomize(random);
+    if (data.classAttribute().isNominal())
+      data.stratify(numFolds);
+    trains = new ArrayList<Instances>();
+    tests  = new ArrayList<Instances>();
+    for (i = 0; i < numFolds; i++) {
+      trains.add(data.trainCV(numFolds, i, random));
+      tests.add(data.testCV(numFolds, i));
+    }
+
+    output = null;
+    if ((forPrinting.length > 0) && (forPrinting[0] instanceof AbstractOutput)) {
+      output = (AbstractOutput) forPrinting[0];
+      output.setHeader(data);
+      output.printHeader();
+    }
+
+    // train and predict folds in parallel
+    executor = Executors.newFixedThreadPool(Math.min(numThreads, numFolds));
+    folds    = new ArrayList<Future<Object[]>>();
+    try {
+      for (i = 0; i < numFolds; i++) {
+	final Instances trainFold = trains.get(i);
+	final Instances testFold  = tests.get(i);
+	folds.add(executor.submit(new Callable<Object[]>() {
+	  public Object[] call() throws Exception {
+	    Classifier copied = AbstractClassifier.makeCopy(classifier);
+	    copied.buildClassifier(trainFold);
+	    if (isEfficientBatchPredictor(copied))
+	      return new Object[]{copied, distributionsForTestSet(copied, testFold)};
+	    else
+	      return new Object[]{copied, null};
+	  }
+	}));
+      }
+
+      // record predictions in fold order
+      for (i = 0; i < numFolds; i++) {
+	fold = folds.get(i).get();
+	test = tests.get(i);
+	dist = (double[][]) fold[1];
+	m_Evaluation.setPriors(trains.get(i));
+	if ((output == null) && (forPrinting.length > 0))
+	  ((StringBuffer) forPrinting[0]).append("\n=== Classifier model (training fold " + (i + 1) + ") ===\n\n" + fold[0]);
+	if (dist == null) {
+	  if (output != null)
+	    m_Evaluation.evaluateModel((Classifier) fold[0], test, forPrinting);
+	  else
+	    m_Evaluation.evaluateModel((Classifier) fold[0], test);
+	}
+	else {
+	  for (n = 0; n < test.numInstances(); n++) {
+	    m_Evaluation.evaluateModelOnceAndRecordPrediction(dist[n], test.instance(n));
+	    if (output != null)
+	      output.printClassification(dist[n], test.instance(n), n);
+	  }
+	}
+	// release memory
+	folds.set(i, null);
+	trains.set(i, null);
+	tests.set(i, null);
+      }
+    }
+    finally {
+      executor.shutdownNow();
+    }
+
+    setNumFolds(numFolds);
+    if (output != null)
+      output.printFooter();
+  }
+
+  /**
+   * Invokes the statistics method, returning NaN if the statistic is not
+   * available.
+   *
+   * @param eval	the evaluation to get the statistic from
+   * @param method	the method to invoke
+   * @param args	the arguments for the method
+   * @return		the statistic
+   */
+  protected static double invokeMetric(Evaluation eval, Method method, Object... args) {
+    try {
+      return ((Number) method.invoke(eval, args)).doubleValue();
+    }
+    catch (Exception e) {
+      return Double.NaN;
+    }
+  }
+
+  /**
+   * Returns all the statistics as flat array: number of class labels
+   * (0 for a numeric class), scalar statistics (see SCALAR_METRICS), per-class
+   * statistics (see CLASS_METRICS, one block of class values per statistic)
+   * and the confusion matrix (row-major). Statistics that are not available
+   * are NaN.
+   *
+   * @param eval	the evaluation to get the statistics from
+   * @return		the statistics
+   * @throws Exception	if method lookup fails
+   */
+  public static double[] getMetrics(Evaluation eval) throws Exception {
+    double[]	result;
+    double[][]	matrix;
+    int		numClasses;
+    int		offset;
+    int		i;
+    int		n;
+    Method	method;
+
+    numClasses = eval.getHeader().classAttribute().isNominal() ? eval.getHeader().numClasses() : 0;
+    result     = new double[1 + SCALAR_METRICS.length + CLASS_METRICS.length * numClasses + numClasses * numClasses];
+    result[0]  = numClasses;
+    offset     = 1;
+
+    for (i = 0; i < SCALAR_METRICS.length; i++) {
+      method = Evaluation.class.getMethod(SCALAR_METRICS[i]);
+      result[offset++] = invokeMetric(eval, method);
+    }
+
+    for (i = 0; i < CLASS_METRICS.length; i++) {
+      method = Evaluation.class.getMethod(CLASS_METRICS[i], int.class);
+      for (n = 0; n < numClasses; n++)
+	result[offset++] = invokeMetric(eval, method, n);
+    }
+
+    if (numClasses > 0) {
+      matrix = eval.confusionMatrix();
+      for (i = 0; i < numClasses; i++) {
+	System.arraycopy(matrix[i], 0, result, offset, numClasses);
+	offset += numClasses;
+      }
+    }
+
+    return result;
+  }
+
+  /**
+   * Returns all the predictions as flat array: number of predictions, number
+   * of columns of the class distributions (0 for numeric predictions),
+   * followed by the predictions (actual, predicted, weight, error and class
+   * distribution) row by row. For nominal predictions, the error is 1 if
+   * actual and predicted differ and 0 otherwise.
+   *
+   * @param eval	the evaluation to get the predictions from
+   * @return		the predictions, null if predictions are discarded
+   */
+  public static double[] getPredictions(Evaluation eval) {
+    double[]		result;
+    List<Prediction>	preds;
+    Prediction		pred;
+    double[]		dist;
+    int			numDist;
+    int			numCols;
+    int			offset;
+    int			i;
+
+    preds = eval.predictions();
+    if (preds == null)
+      return null;
+
+    numDist = 0;
+    if ((preds.size() > 0) && (preds.get(0) instanceof NominalPrediction))
+      numDist = ((NominalPrediction) preds.get(0)).distribution().length;
+    numCols   = 4 + numDist;
+    result    = new double[2 + preds.size() * numCols];
+    result[0] = preds.size();
+    result[1] = numDist;
+
+    for (i = 0; i < preds.size(); i++) {
+      pred   = preds.get(i);
+      offset = 2 + i * numCols;
+      result[offset]     = pred.actual();
+      result[offset + 1] = pred.predicted();
+      result[offset + 2] = pred.weight();
+      if (pred instanceof NumericPrediction)
+	result[offset + 3] = ((NumericPrediction) pred).error();
+      else
+	result[offset + 3] = (pred.actual() != pred.predicted()) ? 1.0 : 0.0;
+      if ((numDist > 0) && (pred instanceof NominalPrediction)) {
+	dist = ((NominalPrediction) pred).distribution();
+	System.arraycopy(dist, 0, result, offset + 4, Math.min(numDist, dist.length));
+      }
+    }
+
+    return result;
+  }
 }
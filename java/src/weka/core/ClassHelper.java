@@ -24,6 +24,8 @@ import weka.Run;
 import java.lang.reflect.Array;
 import java.lang.reflect.Field;
 import java.util.List;
+import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
 
 /**
  * Helper class for classes.
@@ -32,6 +34,9 @@ import java.util.List;
  */
 public class ClassHelper {
 
+  /** the cache for the classes used by isInstanceOf. */
+  protected static Map<String,Class> m_InstanceOfCache = new ConcurrentHashMap<String,Class>();
+
   /**
    * Returns the class given its class name.
    *
@@ -84,4 +89,38 @@ public class ClassHelper {
       return field.get(cls);
     throw new Exception("Failed to obtain static field '" + fieldname + "' from class '" + classname + "'!");
   }
+
+  /**
+   * Checks whether the object implements the specified interface or is a
+   * subclass of the superclass. For arrays, the component type gets checked.
+   * The classes get cached.
+   *
+   * @param obj		the object to check
+   * @param classname	the superclass or interface
+   * @return		true if either implements interface or subclass of superclass
+   */
+  public static boolean isInstanceOf(Object obj, String classname) {
+    Class	cls;
+    Class	objCls;
+
+    if (obj == null)
+      return false;
+
+    cls = m_InstanceOfCache.get(classname);
+    if (cls == null) {
+      try {
+	cls = WekaPackageClassLoaderManager.forName(classname);
+      }
+      catch (Exception e) {
+	return false;
+      }
+      m_InstanceOfCache.put(classname, cls);
+    }
+
+    objCls = obj.getClass();
+    if (objCls.isArray())
+      objCls = objCls.getComponentType();
+
+    return cls.isAssignableFrom(objCls);
+  }
 }
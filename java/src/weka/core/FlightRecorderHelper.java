@@ -0,0 +1,204 @@
+/*
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+/*
+ * FlightRecorderHelper.java
+ * Copyright (C) 2019 Fracpete (fracpete at gmail dot com)
+ */
+
+package weka.core;
+
+import java.io.File;
+import java.lang.reflect.Method;
+import java.util.HashMap;
+import java.util.List;
+import java.util.Map;
+
+/**
+ * Helper class for summarizing Java Flight Recorder files. The jdk.jfr API
+ * (Java 11+, OpenJDK 8u262+) is accessed via reflection, in order to compile
+ * against older Java versions.
+ *
+ * @author FracPete (fracpete at gmail dot com)
+ */
+public class FlightRecorderHelper {
+
+  /** the kind for execution samples. */
+  public final static String KIND_METHOD = "method";
+
+  /** the kind for allocation samples. */
+  public final static String KIND_ALLOCATION = "allocation";
+
+  /**
+   * Checks whether the Flight Recorder API is available.
+   *
+   * @return		true if available
+   */
+  public static boolean isAvailable() {
+    try {
+      Class.forName("jdk.jfr.Recording");
+      return true;
+    }
+    catch (Throwable t) {
+      return false;
+    }
+  }
+
+  /**
+   * Turns the top Java frame of the event's stack trace into a string
+   * (class.method:line).
+   *
+   * @param event	the event to process
+   * @param getStackTrace	the RecordedEvent.getStackTrace method
+   * @return		the frame, null if no stack trace available
+   * @throws Exception	if accessing the stack trace fails
+   */
+  protected static String topFrame(Object event, Method getStackTrace) throws Exception {
+    Object	trace;
+    List	frames;
+    Object	frame;
+    Object	method;
+    Object	type;
+    Class	cls;
+    int		i;
+
+    trace = getStackTrace.invoke(event);
+    if (trace == null)
+      return null;
+    frames = (List) Class.forName("jdk.jfr.consumer.RecordedStackTrace").getMethod("getFrames").invoke(trace);
+    cls    = Class.forName("jdk.jfr.consumer.RecordedFrame");
+    for (i = 0; i < frames.size(); i++) {
+      frame = frames.get(i);
+      if (!((Boolean) cls.getMethod("isJavaFrame").invoke(frame)))
+	continue;
+      method = cls.getMethod("getMethod").invoke(frame);
+      type   = Class.forName("jdk.jfr.consumer.RecordedMethod").getMethod("getType").invoke(method);
+      return Class.forName("jdk.jfr.consumer.RecordedClass").getMethod("getName").invoke(type)
+	+ "." + Class.forName("jdk.jfr.consumer.RecordedMethod").getMethod("getName").invoke(method)
+	+ ":" + cls.getMethod("getLineNumber").invoke(frame);
+    }
+    return null;
+  }
+
+  /**
+   * Returns the long value of the first of the fields that the event has.
+   *
+   * @param event	the event to process
+   * @param fields	the field names to try
+   * @return		the value, 0 if none of the fields present
+   * @throws Exception	if accessing the fields fails
+   */
+  protected static long getLong(Object event, String[] fields) throws Exception {
+    Class	cls;
+
+    cls = Class.forName("jdk.jfr.consumer.RecordedObject");
+    for (String field: fields) {
+      if ((Boolean) cls.getMethod("hasField", String.class).invoke(event, field))
+	return (Long) cls.getMethod("getLong", String.class).invoke(event, field);
+    }
+    return 0;
+  }
+
+  /**
+   * Summarizes the recording: hot methods (jdk.ExecutionSample, by top frame)
+   * and allocation sites (jdk.ObjectAllocationSample,
+   * jdk.ObjectAllocationInNewTLAB, jdk.ObjectAllocationOutsideTLAB, by
+   * allocated class and top frame).
+   *
+   * @param file	the .jfr file to summarize
+   * @return		the rows of kind, name, count, bytes
+   * @throws Exception	if reading the file fails
+   */
+  public static String[][] summarize(String file) throws Exception {
+    Map<String,long[]>	methods;
+    Map<String,long[]>	allocations;
+    Class		fileCls;
+    Class		eventCls;
+    Object		recording;
+    Object		event;
+    Method		hasMoreEvents;
+    Method		readEvent;
+    Method		getEventType;
+    Method		getTypeName;
+    Method		getStackTrace;
+    Method		getClassField;
+    Method		getClassName;
+    String		name;
+    String		frame;
+    String		key;
+    Object		objectClass;
+    long[]		stats;
+    String[][]		result;
+    int			i;
+
+    methods       = new HashMap<String,long[]>();
+    allocations   = new HashMap<String,long[]>();
+    fileCls       = Class.forName("jdk.jfr.consumer.RecordingFile");
+    eventCls      = Class.forName("jdk.jfr.consumer.RecordedEvent");
+    hasMoreEvents = fileCls.getMethod("hasMoreEvents");
+    readEvent     = fileCls.getMethod("readEvent");
+    getEventType  = eventCls.getMethod("getEventType");
+    getTypeName   = Class.forName("jdk.jfr.EventType").getMethod("getName");
+    getStackTrace = eventCls.getMethod("getStackTrace");
+    getClassField = Class.forName("jdk.jfr.consumer.RecordedObject").getMethod("getClass", String.class);
+    getClassName  = Class.forName("jdk.jfr.consumer.RecordedClass").getMethod("getName");
+
+    recording = fileCls.getConstructor(Class.forName("java.nio.file.Path")).newInstance(
+      File.class.getMethod("toPath").invoke(new File(file)));
+    try {
+      while ((Boolean) hasMoreEvents.invoke(recording)) {
+	event = readEvent.invoke(recording);
+	name  = (String) getTypeName.invoke(getEventType.invoke(event));
+	if (name.equals("jdk.ExecutionSample")) {
+	  frame = topFrame(event, getStackTrace);
+	  if (frame == null)
+	    continue;
+	  stats = methods.get(frame);
+	  if (stats == null) {
+	    stats = new long[2];
+	    methods.put(frame, stats);
+	  }
+	  stats[0]++;
+	}
+	else if (name.equals("jdk.ObjectAllocationSample")
+	  || name.equals("jdk.ObjectAllocationInNewTLAB")
+	  || name.equals("jdk.ObjectAllocationOutsideTLAB")) {
+	  frame       = topFrame(event, getStackTrace);
+	  objectClass = getClassField.invoke(event, "objectClass");
+	  key         = (objectClass == null ? "?" : getClassName.invoke(objectClass)) + " @ " + (frame == null ? "?" : frame);
+	  stats       = allocations.get(key);
+	  if (stats == null) {
+	    stats = new long[2];
+	    allocations.put(key, stats);
+	  }
+	  stats[0]++;
+	  stats[1] += getLong(event, new String[]{"weight", "tlabSize", "allocationSize"});
+	}
+      }
+    }
+    finally {
+      fileCls.getMethod("close").invoke(recording);
+    }
+
+    result = new String[methods.size() + allocations.size()][];
+    i      = 0;
+    for (String k: methods.keySet())
+      result[i++] = new String[]{KIND_METHOD, k, "" + methods.get(k)[0], "0"};
+    for (String k: allocations.keySet())
+      result[i++] = new String[]{KIND_ALLOCATION, k, "" + allocations.get(k)[0], "" + allocations.get(k)[1]};
+
+    return result;
+  }
+}
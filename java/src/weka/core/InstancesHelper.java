@@ -0,0 +1,889 @@
+/*
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+/*
+ * InstancesHelper.java
+ * Copyright (C) 2019 Fracpete (fracpete at gmail dot com)
+ */
+
+package weka.core;
+
+import java.io.RandomAccessFile;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.DoubleBuffer;
+import java.nio.channels.FileChannel;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Random;
+
+/**
+ * Helper class for transferring data between Instances and primitive
+ * arrays in a single call. The buffer methods exchange the data via a
+ * memory-mapped file that the Python side maps as well, avoiding copies.
+ *
+ * @author FracPete (fracpete at waikato dot ac dot nz)
+ */
+public class InstancesHelper {
+
+  /** the number of statistics per attribute returned by attributeStats. */
+  public final static int NUM_STATS = 9;
+
+  /** the maximum number of bytes to map at a time. */
+  public final static long MAX_MAP_SIZE = Integer.MAX_VALUE;
+
+  /** the maximum number of bytes to map at a time across all column files. */
+  public final static long MAX_COLUMNS_MAP_SIZE = 256L * 1024L * 1024L;
+
+  /**
+   * Returns the indices of all the attributes in the dataset.
+   *
+   * @param data	the dataset to get the indices for
+   * @return		the indices
+   */
+  protected static int[] allColumns(Instances data) {
+    int[]	result;
+    int		i;
+
+    result = new int[data.numAttributes()];
+    for (i = 0; i < result.length; i++)
+      result[i] = i;
+
+    return result;
+  }
+
+  /**
+   * Returns the internal values of the specified rows/columns as flat array.
+   *
+   * @param data	the dataset to get the values from
+   * @param cols	the 0-based attribute indices, null for all
+   * @param fromRow	the 0-based index of the first row
+   * @param numRows	the number of rows to retrieve
+   * @param rowMajor	whether to fill the array row by row or column by column
+   * @return		the values, missing values are NaN
+   */
+  public static double[] toDoubleArray(Instances data, int[] cols, int fromRow, int numRows, boolean rowMajor) {
+    double[]	result;
+    Instance	inst;
+    int		i;
+    int		n;
+
+    if (cols == null)
+      cols = allColumns(data);
+    result = new double[numRows * cols.length];
+
+    for (i = 0; i < numRows; i++) {
+      inst = data.instance(fromRow + i);
+      for (n = 0; n < cols.length; n++) {
+	if (rowMajor)
+	  result[i * cols.length + n] = inst.value(cols[n]);
+	else
+	  result[n * numRows + i] = inst.value(cols[n]);
+      }
+    }
+
+    return result;
+  }
+
+  /**
+   * Returns the internal values of the specified columns as flat array.
+   *
+   * @param data	the dataset to get the values from
+   * @param cols	the 0-based attribute indices, null for all
+   * @param rowMajor	whether to fill the array row by row or column by column
+   * @return		the values, missing values are NaN
+   */
+  public static double[] toDoubleArray(Instances data, int[] cols, boolean rowMajor) {
+    return toDoubleArray(data, cols, 0, data.numInstances(), rowMajor);
+  }
+
+  /**
+   * Returns the internal values of the specified rows/columns as flat array.
+   *
+   * @param data	the dataset to get the values from
+   * @param cols	the 0-based attribute indices, null for all
+   * @param rows	the 0-based row indices
+   * @param rowMajor	whether to fill the array row by row or column by column
+   * @return		the values, missing values are NaN
+   */
+  public static double[] toDoubleArray(Instances data, int[] cols, int[] rows, boolean rowMajor) {
+    double[]	result;
+    Instance	inst;
+    int		i;
+    int		n;
+
+    if (cols == null)
+      cols = allColumns(data);
+    result = new double[rows.length * cols.length];
+
+    for (i = 0; i < rows.length; i++) {
+      inst = data.instance(rows[i]);
+      for (n = 0; n < cols.length; n++) {
+	if (rowMajor)
+	  result[i * cols.length + n] = inst.value(cols[n]);
+	else
+	  result[n * rows.length + i] = inst.value(cols[n]);
+      }
+    }
+
+    return result;
+  }
+
+  /**
+   * Creates a new dataset with copies of the specified rows.
+   *
+   * @param data	the dataset to get the rows from
+   * @param rows	the 0-based row indices
+   * @return		the subset
+   */
+  public static Instances subset(Instances data, int[] rows) {
+    Instances	result;
+    int		i;
+
+    result = new Instances(data, rows.length);
+    for (i = 0; i < rows.length; i++)
+      result.add(data.instance(rows[i]));
+
+    return result;
+  }
+
+  /**
+   * Appends the datasets (one after the other) in a single pass. String and
+   * relational values get added to the attributes of the combined dataset.
+   *
+   * @param data	the datasets to append
+   * @return		the combined dataset
+   * @throws IllegalArgumentException	if no datasets provided or the headers aren't compatible
+   */
+  public static Instances append(Instances[] data) {
+    Instances	result;
+    Instance	inst;
+    Attribute	att;
+    String	msg;
+    boolean	strings;
+    int		numRows;
+    int		i;
+    int		n;
+    int		m;
+
+    if (data.length == 0)
+      throw new IllegalArgumentException("No datasets provided!");
+
+    numRows = 0;
+    for (n = 0; n < data.length; n++) {
+      if (n > 0) {
+	msg = data[0].equalHeadersMsg(data[n]);
+	if (msg != null)
+	  throw new IllegalArgumentException("Cannot append dataset #" + (n + 1) + ": " + msg);
+      }
+      numRows += data[n].numInstances();
+    }
+
+    strings = data[0].checkForStringAttributes() || data[0].checkForAttributeType(Attribute.RELATIONAL);
+    if (!strings) {
+      result = new Instances(data[0], numRows);
+      for (n = 0; n < data.length; n++) {
+	for (i = 0; i < data[n].numInstances(); i++)
+	  result.add(data[n].instance(i));
+      }
+      return result;
+    }
+
+    // string/relational values need to be added to the (new) attributes
+    result = data[0].stringFreeStructure();
+    for (n = 0; n < data.length; n++) {
+      for (i = 0; i < data[n].numInstances(); i++) {
+	inst = (Instance) data[n].instance(i).copy();
+	for (m = 0; m < result.numAttributes(); m++) {
+	  att = result.attribute(m);
+	  if (inst.isMissing(m))
+	    continue;
+	  if (att.isString())
+	    inst.setValue(m, att.addStringValue(data[n].instance(i).stringValue(m)));
+	  else if (att.isRelationValued())
+	    inst.setValue(m, att.addRelation(data[n].instance(i).relationalValue(m)));
+	}
+	inst.setDataset(result);
+	result.m_Instances.add(inst);
+      }
+    }
+
+    return result;
+  }
+
+  /**
+   * Returns the order of the rows that Evaluation.crossValidateModel uses for
+   * the specified seed, i.e., after randomizing and stratifying (for nominal
+   * classes). The test set of fold i is the i-th block of rows as determined
+   * by Instances.testCV. Rather than copying the data, the randomization is
+   * performed on a dataset with just the row indices and class values.
+   *
+   * @param data	the dataset to generate the order for
+   * @param numFolds	the number of folds
+   * @param seed	the seed for the random number generator
+   * @return		the 0-based row indices
+   */
+  public static int[] cvFoldIndices(Instances data, int numFolds, long seed) {
+    int[]			result;
+    Instances			indices;
+    ArrayList<Attribute>	atts;
+    Instance			inst;
+    int				i;
+
+    atts = new ArrayList<Attribute>();
+    atts.add(new Attribute("index"));
+    if (data.classIndex() > -1)
+      atts.add((Attribute) data.classAttribute().copy());
+    indices = new Instances(data.relationName(), atts, data.numInstances());
+    if (data.classIndex() > -1)
+      indices.setClassIndex(1);
+    for (i = 0; i < data.numInstances(); i++) {
+      inst = data.instance(i);
+      if (data.classIndex() > -1)
+	indices.add(new DenseInstance(1.0, new double[]{i, inst.classValue()}));
+      else
+	indices.add(new DenseInstance(1.0, new double[]{i}));
+    }
+
+    indices.randomize(new Random(seed));
+    if ((indices.classIndex() > -1) && indices.classAttribute().isNominal())
+      indices.stratify(numFolds);
+
+    result = new int[indices.numInstances()];
+    for (i = 0; i < result.length; i++)
+      result[i] = (int) indices.instance(i).value(0);
+
+    return result;
+  }
+
+  /**
+   * Computes the statistics for all attributes in a single pass over the
+   * rows (numeric attributes require an additional scan of their column for
+   * determining distinct/unique values). Returns a flat array: number of
+   * attributes, followed by the statistics per attribute (min, max, mean,
+   * stddev, missing, distinct, unique, total, number of labels or -1 if not
+   * nominal) and then the counts of the labels of all nominal attributes.
+   * Mean and standard
+   * deviation use the instance weights like weka.experiment.Stats, min,
+   * max, mean and stddev are NaN for non-numeric attributes.
+   *
+   * @param data	the dataset to compute the statistics for
+   * @return		the statistics
+   */
+  public static double[] attributeStats(Instances data) {
+    double[]	result;
+    int		numAtts;
+    int		numRows;
+    int		numLabels;
+    double[]	min;
+    double[]	max;
+    double[]	sum;
+    double[]	sumSq;
+    double[]	sumWeights;
+    int[]	missing;
+    int[][]	counts;
+    double[]	column;
+    Instance	inst;
+    Attribute	att;
+    double	value;
+    double	weight;
+    double	var;
+    int		distinct;
+    int		unique;
+    int		num;
+    int		offset;
+    int		i;
+    int		n;
+    int		m;
+
+    numAtts    = data.numAttributes();
+    numRows    = data.numInstances();
+    min        = new double[numAtts];
+    max        = new double[numAtts];
+    sum        = new double[numAtts];
+    sumSq      = new double[numAtts];
+    sumWeights = new double[numAtts];
+    missing    = new int[numAtts];
+    counts     = new int[numAtts][];
+    numLabels  = 0;
+    for (n = 0; n < numAtts; n++) {
+      min[n] = Double.NaN;
+      max[n] = Double.NaN;
+      att    = data.attribute(n);
+      if (att.isNominal() || att.isString()) {
+	counts[n] = new int[att.numValues()];
+	if (att.isNominal())
+	  numLabels += att.numValues();
+      }
+    }
+
+    // single pass
+    for (i = 0; i < numRows; i++) {
+      inst   = data.instance(i);
+      weight = inst.weight();
+      for (n = 0; n < numAtts; n++) {
+	value = inst.value(n);
+	if (Utils.isMissingValue(value)) {
+	  missing[n]++;
+	  continue;
+	}
+	if (counts[n] != null) {
+	  if ((int) value >= counts[n].length)
+	    counts[n] = Arrays.copyOf(counts[n], (int) value + 1);
+	  counts[n][(int) value]++;
+	}
+	else if (data.attribute(n).isNumeric()) {
+	  if (Double.isNaN(min[n]) || (value < min[n]))
+	    min[n] = value;
+	  if (Double.isNaN(max[n]) || (value > max[n]))
+	    max[n] = value;
+	  sum[n]        += value * weight;
+	  sumSq[n]      += value * value * weight;
+	  sumWeights[n] += weight;
+	}
+      }
+    }
+
+    result    = new double[1 + numAtts * NUM_STATS + numLabels];
+    result[0] = numAtts;
+    offset    = 1 + numAtts * NUM_STATS;
+    for (n = 0; n < numAtts; n++) {
+      att      = data.attribute(n);
+      distinct = 0;
+      unique   = 0;
+      if (counts[n] != null) {
+	for (m = 0; m < counts[n].length; m++) {
+	  if (counts[n][m] > 0)
+	    distinct++;
+	  if (counts[n][m] == 1)
+	    unique++;
+	}
+	if (att.isNominal()) {
+	  for (m = 0; m < att.numValues(); m++)
+	    result[offset + m] = counts[n][m];
+	  offset += att.numValues();
+	}
+      }
+      else {
+	// distinct/unique values via sorted column
+	column = new double[numRows - missing[n]];
+	m      = 0;
+	for (i = 0; i < numRows; i++) {
+	  value = data.instance(i).value(n);
+	  if (!Utils.isMissingValue(value))
+	    column[m++] = value;
+	}
+	Arrays.sort(column);
+	i = 0;
+	while (i < column.length) {
+	  num = 1;
+	  while ((i + num < column.length) && (column[i + num] == column[i]))
+	    num++;
+	  distinct++;
+	  if (num == 1)
+	    unique++;
+	  i += num;
+	}
+      }
+
+      result[1 + n * NUM_STATS]     = min[n];
+      result[1 + n * NUM_STATS + 1] = max[n];
+      if (att.isNumeric() && (sumWeights[n] > 0)) {
+	result[1 + n * NUM_STATS + 2] = sum[n] / sumWeights[n];
+	if (sumWeights[n] > 1) {
+	  var = (sumSq[n] - (sum[n] * sum[n]) / sumWeights[n]) / (sumWeights[n] - 1);
+	  result[1 + n * NUM_STATS + 3] = (var < 0) ? 0 : Math.sqrt(var);
+	}
+	else {
+	  result[1 + n * NUM_STATS + 3] = Double.NaN;
+	}
+      }
+      else {
+	result[1 + n * NUM_STATS + 2] = Double.NaN;
+	result[1 + n * NUM_STATS + 3] = Double.NaN;
+      }
+      result[1 + n * NUM_STATS + 4] = missing[n];
+      result[1 + n * NUM_STATS + 5] = distinct;
+      result[1 + n * NUM_STATS + 6] = unique;
+      result[1 + n * NUM_STATS + 7] = numRows;
+      result[1 + n * NUM_STATS + 8] = att.isNominal() ? att.numValues() : -1;
+    }
+
+    return result;
+  }
+
+  /**
+   * Returns the weights of the specified rows.
+   *
+   * @param data	the dataset to get the weights from
+   * @param fromRow	the 0-based index of the first row
+   * @param numRows	the number of rows to retrieve
+   * @return		the weights
+   */
+  public static double[] weightsToDoubleArray(Instances data, int fromRow, int numRows) {
+    double[]	result;
+    int		i;
+
+    result = new double[numRows];
+    for (i = 0; i < numRows; i++)
+      result[i] = data.instance(fromRow + i).weight();
+
+    return result;
+  }
+
+  /**
+   * Resolves the label tables, adding the labels to string attributes.
+   *
+   * @param data	the dataset to resolve the labels for
+   * @param labels	the label tables per attribute, null if no table for an attribute (or at all)
+   * @return		the internal indices of the labels per attribute, null entries if no table
+   * @throws IllegalArgumentException	if a label is not available
+   */
+  protected static int[][] resolveLabels(Instances data, String[][] labels) {
+    int[][]	result;
+    Attribute	att;
+    int		i;
+    int		n;
+
+    result = new int[data.numAttributes()][];
+    if (labels == null)
+      return result;
+
+    for (n = 0; n < data.numAttributes(); n++) {
+      if (labels[n] == null)
+	continue;
+      att = data.attribute(n);
+      result[n] = new int[labels[n].length];
+      for (i = 0; i < labels[n].length; i++) {
+	if (att.isString())
+	  result[n][i] = att.addStringValue(labels[n][i]);
+	else
+	  result[n][i] = att.indexOfValue(labels[n][i]);
+	if (result[n][i] == -1)
+	  throw new IllegalArgumentException("Label '" + labels[n][i] + "' not available for attribute: " + att.name());
+      }
+    }
+
+    return result;
+  }
+
+  /**
+   * Turns the row into an instance and appends it to the dataset, without
+   * creating another copy of it.
+   *
+   * @param data	the dataset to add the row to
+   * @param row		the internal values, coded values get replaced
+   * @param weight	the weight of the instance
+   * @param indices	the indices of the labels per attribute
+   */
+  protected static void addRow(Instances data, double[] row, double weight, int[][] indices) {
+    Instance	inst;
+    int		n;
+
+    for (n = 0; n < row.length; n++) {
+      if ((indices[n] != null) && !Utils.isMissingValue(row[n]))
+	row[n] = indices[n][(int) row[n]];
+    }
+    inst = new DenseInstance(weight, row);
+    inst.setDataset(data);
+    data.m_Instances.add(inst);
+  }
+
+  /**
+   * Creates a new dataset from the flat array of internal values (row-major).
+   * Columns of string attributes (or nominal ones) can be supplied as 0-based
+   * codes into a label table, which gets resolved in a single pass. The labels
+   * of string attributes get added to the attributes of the header.
+   *
+   * @param header	the dataset structure to use
+   * @param values	the internal values, row by row
+   * @param numRows	the number of rows
+   * @param weights	the instance weights, null for 1.0
+   * @param labels	the label tables per attribute, null if no table for an attribute (or at all)
+   * @return		the generated dataset
+   * @throws IllegalArgumentException	if the dimensions don't match or a label is unknown
+   */
+  public static Instances fromDoubleArray(Instances header, double[] values, int numRows, double[] weights, String[][] labels) {
+    Instances	result;
+    int		numCols;
+    int[][]	indices;
+    double[]	row;
+    int		i;
+
+    numCols = header.numAttributes();
+    if (values.length != numRows * numCols)
+      throw new IllegalArgumentException("Expected " + (numRows * numCols) + " values, but received: " + values.length);
+    if ((weights != null) && (weights.length != numRows))
+      throw new IllegalArgumentException("Expected " + numRows + " weights, but received: " + weights.length);
+
+    result  = new Instances(header, numRows);
+    indices = resolveLabels(result, labels);
+    for (i = 0; i < numRows; i++) {
+      row = new double[numCols];
+      System.arraycopy(values, i * numCols, row, 0, numCols);
+      addRow(result, row, (weights == null) ? 1.0 : weights[i], indices);
+    }
+
+    return result;
+  }
+
+  /**
+   * Returns the number of rows that can be mapped at a time.
+   *
+   * @param numCols	the number of columns per row
+   * @return		the number of rows
+   */
+  protected static int rowsPerMap(int numCols) {
+    return (int) Math.max(1, MAX_MAP_SIZE / (Math.max(1, numCols) * 8L));
+  }
+
+  /**
+   * Writes the internal values of the specified columns row by row into the
+   * memory-mapped file (doubles in native byte order), without creating an
+   * intermediate array.
+   *
+   * @param data	the dataset to get the values from
+   * @param cols	the 0-based attribute indices, null for all
+   * @param file	the file to map and write to
+   * @throws Exception	if mapping of file fails
+   */
+  public static void toBuffer(Instances data, int[] cols, String file) throws Exception {
+    RandomAccessFile	raf;
+    FileChannel		channel;
+    DoubleBuffer	buffer;
+    Instance		inst;
+    int			numRows;
+    int			rowsPerMap;
+    int			from;
+    int			num;
+    int			i;
+    int			n;
+
+    if (cols == null)
+      cols = allColumns(data);
+    numRows    = data.numInstances();
+    rowsPerMap = rowsPerMap(cols.length);
+
+    raf = new RandomAccessFile(file, "rw");
+    try {
+      raf.setLength((long) numRows * cols.length * 8L);
+      channel = raf.getChannel();
+      for (from = 0; from < numRows; from += rowsPerMap) {
+	num    = Math.min(rowsPerMap, numRows - from);
+	buffer = channel.map(FileChannel.MapMode.READ_WRITE, (long) from * cols.length * 8L, (long) num * cols.length * 8L)
+	  .order(ByteOrder.nativeOrder()).asDoubleBuffer();
+	for (i = from; i < from + num; i++) {
+	  inst = data.instance(i);
+	  for (n = 0; n < cols.length; n++)
+	    buffer.put(inst.value(cols[n]));
+	}
+      }
+    }
+    finally {
+      raf.close();
+    }
+  }
+
+  /**
+   * Creates a new dataset from the internal values (row-major, doubles in
+   * native byte order) stored in the memory-mapped file.
+   *
+   * @param header	the dataset structure to use
+   * @param file	the file to map and read from
+   * @param numRows	the number of rows
+   * @param weights	the instance weights, null for 1.0
+   * @param labels	the label tables per attribute, null if no table for an attribute (or at all)
+   * @return		the generated dataset
+   * @throws Exception	if mapping of file fails or a label is unknown
+   * @see		#fromDoubleArray(Instances, double[], int, double[], String[][])
+   */
+  public static Instances fromBuffer(Instances header, String file, int numRows, double[] weights, String[][] labels) throws Exception {
+    Instances		result;
+    RandomAccessFile	raf;
+    FileChannel		channel;
+    DoubleBuffer	buffer;
+    int			numCols;
+    int[][]		indices;
+    double[]		row;
+    int			rowsPerMap;
+    int			from;
+    int			num;
+    int			i;
+
+    numCols = header.numAttributes();
+    if ((weights != null) && (weights.length != numRows))
+      throw new IllegalArgumentException("Expected " + numRows + " weights, but received: " + weights.length);
+
+    result     = new Instances(header, numRows);
+    indices    = resolveLabels(result, labels);
+    rowsPerMap = rowsPerMap(numCols);
+
+    raf = new RandomAccessFile(file, "r");
+    try {
+      if (raf.length() != (long) numRows * numCols * 8L)
+	throw new IllegalArgumentException("Expected " + ((long) numRows * numCols * 8L) + " bytes, but file has: " + raf.length());
+      channel = raf.getChannel();
+      for (from = 0; from < numRows; from += rowsPerMap) {
+	num    = Math.min(rowsPerMap, numRows - from);
+	buffer = channel.map(FileChannel.MapMode.READ_ONLY, (long) from * numCols * 8L, (long) num * numCols * 8L)
+	  .order(ByteOrder.nativeOrder()).asDoubleBuffer();
+	for (i = from; i < from + num; i++) {
+	  row = new double[numCols];
+	  buffer.get(row);
+	  addRow(result, row, (weights == null) ? 1.0 : weights[i], indices);
+	}
+      }
+    }
+    finally {
+      raf.close();
+    }
+
+    return result;
+  }
+
+  /**
+   * Returns the number of rows that can be mapped at a time when using column
+   * files.
+   *
+   * @param numCols	the number of columns
+   * @return		the number of rows
+   */
+  protected static int rowsPerColumnsMap(int numCols) {
+    return (int) Math.max(1024, MAX_COLUMNS_MAP_SIZE / (Math.max(1, numCols) * 8L));
+  }
+
+  /**
+   * Determines which attributes get stored as int codes in column files
+   * (nominal and string attributes).
+   *
+   * @param data	the dataset to check
+   * @return		whether the attributes are coded
+   */
+  protected static boolean[] isCoded(Instances data) {
+    boolean[]	result;
+    int		n;
+
+    result = new boolean[data.numAttributes()];
+    for (n = 0; n < result.length; n++)
+      result[n] = data.attribute(n).isNominal() || data.attribute(n).isString();
+
+    return result;
+  }
+
+  /**
+   * Opens the files for the columns.
+   *
+   * @param files	the files to open, null entries are skipped
+   * @param mode	the mode for opening the files
+   * @return		the opened files
+   * @throws Exception	if opening of a file fails (already opened files get closed)
+   */
+  protected static RandomAccessFile[] openColumns(String[] files, String mode) throws Exception {
+    RandomAccessFile[]	result;
+    int			n;
+
+    result = new RandomAccessFile[files.length];
+    try {
+      for (n = 0; n < files.length; n++) {
+	if (files[n] != null)
+	  result[n] = new RandomAccessFile(files[n], mode);
+      }
+    }
+    catch (Exception e) {
+      closeColumns(result);
+      throw e;
+    }
+
+    return result;
+  }
+
+  /**
+   * Closes the column files.
+   *
+   * @param files	the files to close, null entries are skipped
+   */
+  protected static void closeColumns(RandomAccessFile[] files) {
+    int		n;
+
+    for (n = 0; n < files.length; n++) {
+      if (files[n] == null)
+	continue;
+      try {
+	files[n].close();
+      }
+      catch (Exception e) {
+	// ignored
+      }
+    }
+  }
+
+  /**
+   * Writes the internal values of the attributes into separate memory-mapped
+   * column files (little endian): int codes for nominal and string attributes
+   * (-1 for missing values), doubles for all others. The weights can be
+   * written to a separate file as well (doubles).
+   *
+   * @param data	the dataset to write
+   * @param files	the column files, one per attribute
+   * @param weights	the file for the weights, null to skip
+   * @throws Exception	if writing fails
+   */
+  public static void toColumns(Instances data, String[] files, String weights) throws Exception {
+    RandomAccessFile[]	rafs;
+    ByteBuffer[]	buffers;
+    boolean[]		codes;
+    String[]		all;
+    Instance		inst;
+    double		value;
+    int			numCols;
+    int			numRows;
+    int			rowsPerMap;
+    int			from;
+    int			num;
+    int			size;
+    int			i;
+    int			n;
+
+    numCols = data.numAttributes();
+    numRows = data.numInstances();
+    codes   = isCoded(data);
+    if (files.length != numCols)
+      throw new IllegalArgumentException("Expected " + numCols + " files, but received: " + files.length);
+
+    all = new String[numCols + 1];
+    System.arraycopy(files, 0, all, 0, numCols);
+    all[numCols] = weights;
+    rowsPerMap   = rowsPerColumnsMap(numCols + 1);
+    buffers      = new ByteBuffer[numCols + 1];
+
+    rafs = openColumns(all, "rw");
+    try {
+      for (n = 0; n <= numCols; n++) {
+	if (rafs[n] != null)
+	  rafs[n].setLength((long) numRows * (((n < numCols) && codes[n]) ? 4L : 8L));
+      }
+      for (from = 0; from < numRows; from += rowsPerMap) {
+	num = Math.min(rowsPerMap, numRows - from);
+	for (n = 0; n <= numCols; n++) {
+	  if (rafs[n] == null)
+	    continue;
+	  size       = ((n < numCols) && codes[n]) ? 4 : 8;
+	  buffers[n] = rafs[n].getChannel().map(FileChannel.MapMode.READ_WRITE, (long) from * size, (long) num * size)
+	    .order(ByteOrder.LITTLE_ENDIAN);
+	}
+	for (i = from; i < from + num; i++) {
+	  inst = data.instance(i);
+	  for (n = 0; n < numCols; n++) {
+	    value = inst.value(n);
+	    if (codes[n])
+	      buffers[n].putInt(Utils.isMissingValue(value) ? -1 : (int) value);
+	    else
+	      buffers[n].putDouble(value);
+	  }
+	  if (buffers[numCols] != null)
+	    buffers[numCols].putDouble(inst.weight());
+	}
+      }
+    }
+    finally {
+      closeColumns(rafs);
+    }
+  }
+
+  /**
+   * Creates a new dataset from the memory-mapped column files (little endian),
+   * containing int codes for nominal and string attributes (-1 for missing
+   * values) and doubles for all others. Codes of attributes with a label table
+   * get resolved via the table, otherwise they are used as internal values.
+   *
+   * @param header	the dataset structure to use
+   * @param files	the column files, one per attribute
+   * @param weights	the file with the weights, null for 1.0
+   * @param numRows	the number of rows
+   * @param labels	the label tables per attribute, null if no table for an attribute (or at all)
+   * @return		the generated dataset
+   * @throws Exception	if reading fails or a label is unknown
+   */
+  public static Instances fromColumns(Instances header, String[] files, String weights, int numRows, String[][] labels) throws Exception {
+    Instances		result;
+    RandomAccessFile[]	rafs;
+    ByteBuffer[]	buffers;
+    boolean[]		codes;
+    String[]		all;
+    int[][]		indices;
+    double[]		row;
+    int			numCols;
+    int			rowsPerMap;
+    int			from;
+    int			num;
+    int			size;
+    int			code;
+    int			i;
+    int			n;
+
+    numCols = header.numAttributes();
+    if (files.length != numCols)
+      throw new IllegalArgumentException("Expected " + numCols + " files, but received: " + files.length);
+
+    result  = new Instances(header, numRows);
+    indices = resolveLabels(result, labels);
+    codes   = isCoded(result);
+
+    all = new String[numCols + 1];
+    System.arraycopy(files, 0, all, 0, numCols);
+    all[numCols] = weights;
+    rowsPerMap   = rowsPerColumnsMap(numCols + 1);
+    buffers      = new ByteBuffer[numCols + 1];
+
+    rafs = openColumns(all, "r");
+    try {
+      for (n = 0; n <= numCols; n++) {
+	if (rafs[n] == null)
+	  continue;
+	size = ((n < numCols) && codes[n]) ? 4 : 8;
+	if (rafs[n].length() != (long) numRows * size)
+	  throw new IllegalArgumentException("Expected " + ((long) numRows * size) + " bytes, but file has: " + rafs[n].length() + " (" + all[n] + ")");
+      }
+      for (from = 0; from < numRows; from += rowsPerMap) {
+	num = Math.min(rowsPerMap, numRows - from);
+	for (n = 0; n <= numCols; n++) {
+	  if (rafs[n] == null)
+	    continue;
+	  size       = ((n < numCols) && codes[n]) ? 4 : 8;
+	  buffers[n] = rafs[n].getChannel().map(FileChannel.MapMode.READ_ONLY, (long) from * size, (long) num * size)
+	    .order(ByteOrder.LITTLE_ENDIAN);
+	}
+	for (i = from; i < from + num; i++) {
+	  row = new double[numCols];
+	  for (n = 0; n < numCols; n++) {
+	    if (codes[n]) {
+	      code   = buffers[n].getInt();
+	      row[n] = (code == -1) ? Utils.missingValue() : code;
+	    }
+	    else {
+	      row[n] = buffers[n].getDouble();
+	    }
+	  }
+	  addRow(result, row, (buffers[numCols] == null) ? 1.0 : buffers[numCols].getDouble(), indices);
+	}
+      }
+    }
+    finally {
+      closeColumns(rafs);
+    }
+
+    return result;
+  }
+}
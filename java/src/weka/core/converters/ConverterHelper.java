@@ -0,0 +1,227 @@
+/*
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+/*
+ * ConverterHelper.java
+ * Copyright (C) 2019 Fracpete (fracpete at gmail dot com)
+ */
+
+package weka.core.converters;
+
+import weka.core.Attribute;
+import weka.core.DenseInstance;
+import weka.core.Instance;
+import weka.core.Instances;
+import weka.core.InstancesHelper;
+import weka.core.SparseInstance;
+
+import java.io.File;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+/**
+ * Helper class for loading and saving data in chunks rather than row by row.
+ *
+ * @author FracPete (fracpete at gmail dot com)
+ */
+public class ConverterHelper {
+
+  /**
+   * Checks whether the dataset has string or relational attributes, whose
+   * values need to be copied into the chunk's attributes.
+   *
+   * @param structure	the structure to check
+   * @return		true if string or relational attributes present
+   */
+  protected static boolean hasStringValues(Instances structure) {
+    return structure.checkForStringAttributes()
+      || structure.checkForAttributeType(Attribute.RELATIONAL);
+  }
+
+  /**
+   * Creates a copy of the instance, with the string and relational values
+   * added to the attributes of the dataset.
+   *
+   * @param inst	the instance to copy
+   * @param data	the dataset the instance will get added to
+   * @return		the copy
+   */
+  protected static Instance copyStringValues(Instance inst, Instances data) {
+    double[]	values;
+    int		n;
+
+    values = inst.toDoubleArray();
+    for (n = 0; n < values.length; n++) {
+      if (inst.isMissing(n))
+	continue;
+      if (data.attribute(n).isString())
+	values[n] = data.attribute(n).addStringValue(inst.stringValue(n));
+      else if (data.attribute(n).isRelationValued())
+	values[n] = data.attribute(n).addRelation(inst.relationalValue(n));
+    }
+
+    if (inst instanceof SparseInstance)
+      return new SparseInstance(inst.weight(), values);
+    else
+      return new DenseInstance(inst.weight(), values);
+  }
+
+  /**
+   * Reads the next chunk of instances from an incremental loader.
+   *
+   * @param loader	the loader to read from (structure already obtained)
+   * @param structure	the structure of the data, as returned by the loader
+   * @param chunkSize	the maximum number of instances to read
+   * @return		the instances, empty if no more data available
+   * @throws Exception	if reading fails
+   */
+  public static Instances nextChunk(Loader loader, Instances structure, int chunkSize) throws Exception {
+    Instances	result;
+    Instance	inst;
+    boolean	strings;
+
+    result  = structure.stringFreeStructure();
+    strings = hasStringValues(structure);
+    while (result.numInstances() < chunkSize) {
+      inst = loader.getNextInstance(structure);
+      if (inst == null)
+	break;
+      if (strings)
+	inst = copyStringValues(inst, result);
+      result.add(inst);
+    }
+
+    return result;
+  }
+
+  /**
+   * Writes the instance with an incremental saver. Instances without a
+   * dataset get the header assigned.
+   *
+   * @param saver	the saver to use (structure already set)
+   * @param header	the structure of the data
+   * @param inst	the instance to write
+   * @throws Exception	if writing fails
+   */
+  public static void writeIncremental(Saver saver, Instances header, Instance inst) throws Exception {
+    if (inst.dataset() == null)
+      inst.setDataset(header);
+    saver.writeIncremental(inst);
+  }
+
+  /**
+   * Writes all the instances of the dataset with an incremental saver.
+   *
+   * @param saver	the saver to use (structure already set)
+   * @param data	the instances to write
+   * @throws Exception	if writing fails
+   */
+  public static void writeIncremental(Saver saver, Instances data) throws Exception {
+    int		i;
+
+    for (i = 0; i < data.numInstances(); i++)
+      saver.writeIncremental(data.instance(i));
+  }
+
+  /**
+   * Writes the internal values (row-major) with an incremental saver, without
+   * creating a dataset.
+   *
+   * @param saver	the saver to use (structure already set)
+   * @param header	the structure of the data
+   * @param values	the internal values, row by row
+   * @param numRows	the number of rows
+   * @param weights	the instance weights, null for 1.0
+   * @throws Exception	if writing fails or the dimensions don't match
+   */
+  public static void writeIncremental(Saver saver, Instances header, double[] values, int numRows, double[] weights) throws Exception {
+    Instance	inst;
+    double[]	row;
+    int		numCols;
+    int		i;
+
+    numCols = header.numAttributes();
+    if (values.length != numRows * numCols)
+      throw new IllegalArgumentException("Expected " + (numRows * numCols) + " values, but received: " + values.length);
+    if ((weights != null) && (weights.length != numRows))
+      throw new IllegalArgumentException("Expected " + numRows + " weights, but received: " + weights.length);
+
+    for (i = 0; i < numRows; i++) {
+      row = new double[numCols];
+      System.arraycopy(values, i * numCols, row, 0, numCols);
+      inst = new DenseInstance((weights == null) ? 1.0 : weights[i], row);
+      inst.setDataset(header);
+      saver.writeIncremental(inst);
+    }
+  }
+
+  /**
+   * Loads the files concurrently (loaders determined by file extension) and
+   * appends them in the order of the files.
+   *
+   * @param files	the files to load
+   * @param numThreads	the number of threads to use
+   * @return		the combined dataset
+   * @throws Exception	if loading fails or the headers aren't compatible
+   */
+  public static Instances loadMany(String[] files, int numThreads) throws Exception {
+    ExecutorService		executor;
+    List<Future<Instances>>	futures;
+    AbstractFileLoader		loader;
+    Instances[]			data;
+    int				i;
+
+    if (files.length == 0)
+      throw new IllegalArgumentException("No files provided!");
+
+    executor = Executors.newFixedThreadPool(Math.max(1, Math.min(numThreads, files.length)));
+    futures  = new ArrayList<Future<Instances>>();
+    data     = new Instances[files.length];
+    try {
+      for (i = 0; i < files.length; i++) {
+	loader = ConverterUtils.getLoaderForFile(files[i]);
+	if (loader == null)
+	  throw new IllegalArgumentException("No loader available for file: " + files[i]);
+	if (!new File(files[i]).exists())
+	  throw new IllegalArgumentException("Dataset file does not exist: " + files[i]);
+	loader.setFile(new File(files[i]));
+	final AbstractFileLoader fLoader = loader;
+	futures.add(executor.submit(new Callable<Instances>() {
+	  public Instances call() throws Exception {
+	    return fLoader.getDataSet();
+	  }
+	}));
+      }
+      for (i = 0; i < files.length; i++) {
+	try {
+	  data[i] = futures.get(i).get();
+	}
+	catch (ExecutionException e) {
+	  throw new Exception("Failed to load file: " + files[i], e.getCause());
+	}
+      }
+    }
+    finally {
+      executor.shutdownNow();
+    }
+
+    return InstancesHelper.append(data);
+  }
+}
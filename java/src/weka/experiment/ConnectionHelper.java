@@ -0,0 +1,90 @@
+/*
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+/*
+ * ConnectionHelper.java
+ * Copyright (C) 2019 Fracpete (fracpete at gmail dot com)
+ */
+
+package weka.experiment;
+
+import java.sql.Connection;
+
+/**
+ * Helper class for sharing JDBC connections between DatabaseUtils objects
+ * (e.g., for connection pooling).
+ *
+ * @author FracPete (fracpete at gmail dot com)
+ */
+public class ConnectionHelper {
+
+  /**
+   * Returns the connection of the database utils object.
+   *
+   * @param utils	the object to get the connection from
+   * @return		the connection, null if not connected
+   */
+  public static Connection getConnection(DatabaseUtils utils) {
+    return utils.m_Connection;
+  }
+
+  /**
+   * Sets the connection to use by the database utils object (without
+   * closing the current one).
+   *
+   * @param utils	the object to update
+   * @param conn	the connection to use, null to detach the current one
+   */
+  public static void setConnection(DatabaseUtils utils, Connection conn) {
+    utils.m_Connection = conn;
+  }
+
+  /**
+   * Checks whether the connection is still valid. Falls back on checking
+   * whether the connection is closed if the driver doesn't support
+   * validation.
+   *
+   * @param conn	the connection to check
+   * @param timeout	the timeout in seconds for the validation
+   * @return		true if valid
+   */
+  public static boolean isValid(Connection conn, int timeout) {
+    try {
+      return conn.isValid(timeout);
+    }
+    catch (Throwable t) {
+      try {
+	return !conn.isClosed();
+      }
+      catch (Throwable t2) {
+	return false;
+      }
+    }
+  }
+
+  /**
+   * Closes the connection, ignoring any errors.
+   *
+   * @param conn	the connection to close
+   */
+  public static void close(Connection conn) {
+    try {
+      conn.close();
+    }
+    catch (Throwable t) {
+      // ignored
+    }
+  }
+}
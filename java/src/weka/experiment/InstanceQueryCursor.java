@@ -0,0 +1,260 @@
+/*
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+/*
+ * InstanceQueryCursor.java
+ * Copyright (C) 2019 Fracpete (fracpete at gmail dot com)
+ */
+
+package weka.experiment;
+
+import weka.core.Attribute;
+import weka.core.DenseInstance;
+import weka.core.Instances;
+import weka.core.SparseInstance;
+import weka.core.Utils;
+
+import java.sql.ResultSet;
+import java.sql.ResultSetMetaData;
+import java.sql.Statement;
+import java.sql.Types;
+import java.util.ArrayList;
+import java.util.Date;
+
+/**
+ * Forward-only cursor over the result of a query, returning the rows in
+ * chunks. The structure is determined once from the meta-data of the result
+ * set: numeric columns become numeric attributes, boolean columns nominal
+ * attributes, date/time columns date attributes and all other columns string
+ * attributes (since the labels aren't known in advance).
+ *
+ * @author FracPete (fracpete at gmail dot com)
+ */
+public class InstanceQueryCursor {
+
+  /** numeric column. */
+  public final static int NUMERIC = 0;
+
+  /** boolean column. */
+  public final static int BOOLEAN = 1;
+
+  /** date column. */
+  public final static int DATE = 2;
+
+  /** time column. */
+  public final static int TIME = 3;
+
+  /** timestamp column. */
+  public final static int TIMESTAMP = 4;
+
+  /** string column. */
+  public final static int STRING = 5;
+
+  /** the query object providing the connection. */
+  protected InstanceQuery m_Query;
+
+  /** the statement. */
+  protected Statement m_Statement;
+
+  /** the result set. */
+  protected ResultSet m_ResultSet;
+
+  /** the structure. */
+  protected Instances m_Structure;
+
+  /** the column types. */
+  protected int[] m_Types;
+
+  /** whether the end of the result set has been reached. */
+  protected boolean m_Finished;
+
+  /**
+   * Executes the query, connecting to the database if necessary.
+   *
+   * @param query	the query object providing the connection (and sparse setting)
+   * @param sql		the SQL query to execute
+   * @param fetchSize	the JDBC fetch size, less than 1 for driver default
+   * @throws Exception	if executing the query fails
+   */
+  public InstanceQueryCursor(InstanceQuery query, String sql, int fetchSize) throws Exception {
+    m_Query = query;
+    if (!m_Query.isConnected())
+      m_Query.connectToDatabase();
+    m_Statement = m_Query.m_Connection.createStatement(ResultSet.TYPE_FORWARD_ONLY, ResultSet.CONCUR_READ_ONLY);
+    if (fetchSize > 0)
+      m_Statement.setFetchSize(fetchSize);
+    m_ResultSet = m_Statement.executeQuery(sql);
+    m_Finished  = false;
+    initStructure(m_ResultSet.getMetaData());
+  }
+
+  /**
+   * Determines the column types and creates the structure.
+   *
+   * @param md		the meta-data to use
+   * @throws Exception	if accessing the meta-data fails
+   */
+  protected void initStructure(ResultSetMetaData md) throws Exception {
+    ArrayList<Attribute>	atts;
+    ArrayList<String>		labels;
+    String			name;
+    int				i;
+
+    atts    = new ArrayList<Attribute>();
+    m_Types = new int[md.getColumnCount()];
+    for (i = 0; i < m_Types.length; i++) {
+      name = md.getColumnLabel(i + 1);
+      switch (md.getColumnType(i + 1)) {
+	case Types.TINYINT:
+	case Types.SMALLINT:
+	case Types.INTEGER:
+	case Types.BIGINT:
+	case Types.REAL:
+	case Types.FLOAT:
+	case Types.DOUBLE:
+	case Types.NUMERIC:
+	case Types.DECIMAL:
+	  m_Types[i] = NUMERIC;
+	  atts.add(new Attribute(name));
+	  break;
+	case Types.BIT:
+	case Types.BOOLEAN:
+	  m_Types[i] = BOOLEAN;
+	  labels = new ArrayList<String>();
+	  labels.add("false");
+	  labels.add("true");
+	  atts.add(new Attribute(name, labels));
+	  break;
+	case Types.DATE:
+	  m_Types[i] = DATE;
+	  atts.add(new Attribute(name, "yyyy-MM-dd"));
+	  break;
+	case Types.TIME:
+	  m_Types[i] = TIME;
+	  atts.add(new Attribute(name, "HH:mm:ss"));
+	  break;
+	case Types.TIMESTAMP:
+	  m_Types[i] = TIMESTAMP;
+	  atts.add(new Attribute(name, "yyyy-MM-dd'T'HH:mm:ss"));
+	  break;
+	default:
+	  m_Types[i] = STRING;
+	  atts.add(new Attribute(name, (ArrayList<String>) null));
+      }
+    }
+
+    m_Structure = new Instances("QueryResult", atts, 0);
+  }
+
+  /**
+   * Returns the structure of the data.
+   *
+   * @return		the structure
+   */
+  public Instances getStructure() {
+    return new Instances(m_Structure, 0);
+  }
+
+  /**
+   * Returns whether all rows have been read.
+   *
+   * @return		true if finished
+   */
+  public boolean isFinished() {
+    return m_Finished;
+  }
+
+  /**
+   * Reads the next chunk of rows. Closes the cursor once the end of the
+   * result set has been reached.
+   *
+   * @param chunkSize	the maximum number of rows to read
+   * @return		the rows, empty if no more rows available
+   * @throws Exception	if reading fails
+   */
+  public Instances nextChunk(int chunkSize) throws Exception {
+    Instances	result;
+    double[]	values;
+    Date	date;
+    String	str;
+    double	value;
+    boolean	flag;
+    int		i;
+
+    result = m_Structure.stringFreeStructure();
+    while (!m_Finished && (result.numInstances() < chunkSize)) {
+      if (!m_ResultSet.next()) {
+	close();
+	break;
+      }
+      values = new double[m_Types.length];
+      for (i = 0; i < m_Types.length; i++) {
+	switch (m_Types[i]) {
+	  case NUMERIC:
+	    value     = m_ResultSet.getDouble(i + 1);
+	    values[i] = m_ResultSet.wasNull() ? Utils.missingValue() : value;
+	    break;
+	  case BOOLEAN:
+	    flag      = m_ResultSet.getBoolean(i + 1);
+	    values[i] = m_ResultSet.wasNull() ? Utils.missingValue() : (flag ? 1.0 : 0.0);
+	    break;
+	  case DATE:
+	  case TIME:
+	  case TIMESTAMP:
+	    if (m_Types[i] == DATE)
+	      date = m_ResultSet.getDate(i + 1);
+	    else if (m_Types[i] == TIME)
+	      date = m_ResultSet.getTime(i + 1);
+	    else
+	      date = m_ResultSet.getTimestamp(i + 1);
+	    values[i] = (date == null) ? Utils.missingValue() : date.getTime();
+	    break;
+	  default:
+	    str       = m_ResultSet.getString(i + 1);
+	    values[i] = (str == null) ? Utils.missingValue() : result.attribute(i).addStringValue(str);
+	}
+      }
+      if (m_Query.getSparseData())
+	result.add(new SparseInstance(1.0, values));
+      else
+	result.add(new DenseInstance(1.0, values));
+    }
+
+    return result;
+  }
+
+  /**
+   * Closes result set and statement. The connection stays open.
+   */
+  public void close() {
+    m_Finished = true;
+    try {
+      if (m_ResultSet != null)
+	m_ResultSet.close();
+    }
+    catch (Exception e) {
+      // ignored
+    }
+    try {
+      if (m_Statement != null)
+	m_Statement.close();
+    }
+    catch (Exception e) {
+      // ignored
+    }
+    m_ResultSet = null;
+    m_Statement = null;
+  }
+}
@@ -59,11 +59,8 @@ class Classifier(OptionHandler):
         self.is_drawable = self.check_type(jobject, "weka.core.Drawable")
         self.is_batchpredictor = self.check_type(jobject, "weka.core.BatchPredictor")
         super(Classifier, self).__init__(jobject=jobject, options=options)
-        self.__classify = javabridge.make_call(self.jobject, "classifyInstance", "(Lweka/core/Instance;)D")
-        self.__distribution = javabridge.make_call(self.jobject, "distributionForInstance", "(Lweka/core/Instance;)[D")
-        if self.is_batchpredictor:
-            self.__distributions = javabridge.make_call(
-                self.jobject, "distributionsForInstances", "(Lweka/core/Instances;)[[D")
+        self.__classify = classes.make_call(self.jobject, "weka/classifiers/Classifier", "classifyInstance", "(Lweka/core/Instance;)D")
+        self.__distribution = classes.make_call(self.jobject, "weka/classifiers/Classifier", "distributionForInstance", "(Lweka/core/Instance;)[D")
 
     @property
     def capabilities(self):
@@ -119,19 +116,81 @@ class Classifier(OptionHandler):
         pred = self.__distribution(inst.jobject)
         return javabridge.get_env().get_double_array_elements(pred)
 
-    def distributions_for_instances(self, data):
+    def _predictions_to_buffer(self, method, data, shape):
+        """
+        Lets the ClassifierHelper method write the predictions directly into a memory-mapped file (see
+        weka.core.types.shared_dir) and returns the array backed by it.
+
+        :param method: the name of the ClassifierHelper method
+        :type method: str
+        :param data: the Instances to get the predictions for
+        :type data: Instances
+        :param shape: the shape of the predictions
+        :type shape: tuple
+        :return: the predictions
+        :rtype: numpy.memmap
+        """
+        if prod(shape) == 0:
+            return zeros(shape)
+        fname = arrays.shared_file()
+        try:
+            javabridge.static_call(
+                "Lweka/classifiers/ClassifierHelper;", method,
+                "(Lweka/classifiers/Classifier;Lweka/core/Instances;Ljava/lang/String;)V",
+                self.jobject, data.jobject, fname)
+            return memmap(fname, dtype=float64, mode="r+", shape=shape)
+        finally:
+            arrays.remove_shared_file(fname)
+
+    def classify_instances(self, data, shared=False):
+        """
+        Peforms predictions for all the instances in a single call. Batch predictors with a more efficient
+        batch prediction get queried in chunks of their batch size, all other classifiers get queried
+        instance by instance on the Java side. In shared mode, the JVM writes the predictions directly into
+        a memory-mapped file that backs the returned array.
+
+        :param data: the Instances to get the predictions for
+        :type data: Instances
+        :param shared: whether to use a memory-mapped buffer shared with the JVM
+        :type shared: bool
+        :return: the classifications (either regression value or 0-based label index, NaN if none)
+        :rtype: ndarray
+        """
+        if shared:
+            return self._predictions_to_buffer("classifyInstances", data, (data.num_instances,))
+        return javabridge.get_env().get_double_array_elements(
+            javabridge.static_call(
+                "Lweka/classifiers/ClassifierHelper;", "classifyInstances",
+                "(Lweka/classifiers/Classifier;Lweka/core/Instances;)[D",
+                self.jobject, data.jobject))
+
+    def distributions_for_instances(self, data, shared=False):
         """
-        Peforms predictions, returning the class distributions.
+        Peforms predictions in a single call, returning the class distributions. Batch predictors get
+        queried in chunks of their batch size, all other classifiers get queried instance by instance
+        on the Java side. In shared mode, the JVM writes the distributions directly into a memory-mapped
+        file that backs the returned array.
 
         :param data: the Instances to get the class distributions for
         :type data: Instances
-        :return: the class distribution matrix, None if not a batch predictor
+        :param shared: whether to use a memory-mapped buffer shared with the JVM
+        :type shared: bool
+        :return: the class distribution matrix (instances x class labels)
         :rtype: ndarray
         """
-        if self.is_batchpredictor:
-            return arrays.double_matrix_to_ndarray(self.__distributions(data.jobject))
+        if data.class_attribute.is_nominal:
+            num_labels = data.class_attribute.num_values
         else:
-            return None
+            num_labels = 1
+        if shared:
+            return self._predictions_to_buffer(
+                "distributionsForInstances", data, (data.num_instances, num_labels))
+        dists = javabridge.get_env().get_double_array_elements(
+            javabridge.static_call(
+                "Lweka/classifiers/ClassifierHelper;", "distributionsForInstances",
+                "(Lweka/classifiers/Classifier;Lweka/core/Instances;)[D",
+                self.jobject, data.jobject))
+        return dists.reshape((data.num_instances, num_labels))
 
     @property
     def batch_size(self):
@@ -1149,16 +1208,26 @@ class Evaluation(JavaObject):
     Evaluation class for classifiers.
     """
 
-    def __init__(self, data, cost_matrix=None):
+    def __init__(self, data=None, cost_matrix=None, jobject=None):
         """
-        Initializes an Evaluation object.
+        Initializes an Evaluation object, either using the data (and cost matrix) or wrapping an existing
+        weka.classifiers.Evaluation object.
 
         :param data: the data to use to initialize the priors with
         :type data: Instances
         :param cost_matrix: the cost matrix to use for initializing
         :type cost_matrix: CostMatrix
+        :param jobject: the weka.classifiers.Evaluation object to wrap
+        :type jobject: JB_Object
         """
-        if cost_matrix is None:
+        if jobject is not None:
+            self.enforce_type(jobject, "weka.classifiers.Evaluation")
+            jobject = javabridge.make_instance(
+                "weka/classifiers/EvaluationWrapper", "(Lweka/classifiers/Evaluation;)V",
+                jobject)
+        elif data is None:
+            raise Exception("Either data or a JB_Object must be provided!")
+        elif cost_matrix is None:
             jobject = javabridge.make_instance(
                 "weka/classifiers/EvaluationWrapper", "(Lweka/core/Instances;)V",
                 data.jobject)
@@ -1170,9 +1239,66 @@ class Evaluation(JavaObject):
         jobject = javabridge.call(jobject, "getEvaluation", "()Lweka/classifiers/Evaluation;")
         super(Evaluation, self).__init__(jobject)
 
-    def crossvalidate_model(self, classifier, data, num_folds, rnd, output=None):
+    def __getstate__(self):
+        """
+        Returns the serialized state of the evaluation, for pickling (requires a running JVM).
+
+        :return: the state
+        :rtype: dict
+        """
+        return {"serialized": self.serialize()}
+
+    def __setstate__(self, state):
+        """
+        Restores the evaluation from the serialized state, for unpickling (requires a running JVM).
+
+        :param state: the state
+        :type state: dict
+        """
+        self.__init__(jobject=serialization.from_bytes(state["serialized"]))
+
+    def serialize(self):
+        """
+        Serializes the evaluation (statistics and predictions), e.g., for merging partial evaluations
+        obtained in other processes.
+
+        :return: the serialized evaluation
+        :rtype: str
+        """
+        return serialization.to_bytes(self.jobject)
+
+    @classmethod
+    def deserialize(cls, data):
+        """
+        Restores an evaluation from its serialized form.
+
+        :param data: the serialized evaluation
+        :type data: str
+        :return: the evaluation
+        :rtype: Evaluation
+        """
+        return Evaluation(jobject=serialization.from_bytes(data))
+
+    def merge(self, other):
+        """
+        Merges the statistics and predictions of the other evaluation into this one. Counts, confusion matrix
+        and error sums get merged exactly, threshold-based metrics (AUC, PRC) use the merged predictions
+        (i.e., predictions must not be discarded). Both evaluations must have been initialized with the same
+        dataset structure.
+
+        :param other: the evaluation to merge, either Evaluation or serialized evaluation
+        :type other: Evaluation or str
+        """
+        if not isinstance(other, Evaluation):
+            other = Evaluation.deserialize(other)
+        javabridge.call(self.wrapper, "merge", "(Lweka/classifiers/Evaluation;)V", other.jobject)
+        self.jobject = javabridge.call(self.wrapper, "getEvaluation", "()Lweka/classifiers/Evaluation;")
+
+    def crossvalidate_model(self, classifier, data, num_folds, rnd, output=None, n_jobs=1):
         """
         Crossvalidates the model using the specified data, number of folds and random number generator wrapper.
+        With more than one job, the folds get trained and predicted in parallel (Java threads) on copies of
+        the classifier. The results are the same as for the sequential cross-validation.
 
         :param classifier: the classifier to cross-validate
         :type classifier: Classifier
@@ -1184,15 +1310,23 @@ class Evaluation(JavaObject):
         :type rnd: Random
         :param output: the output generator to use
         :type output: PredictionOutput
+        :param n_jobs: the number of threads to use, -1 for the number of cores
+        :type n_jobs: int
         """
         if output is None:
             generator = []
         else:
             generator = [output.jobject]
-        javabridge.call(
-            self.jobject, "crossValidateModel",
-            "(Lweka/classifiers/Classifier;Lweka/core/Instances;ILjava/util/Random;[Ljava/lang/Object;)V",
-            classifier.jobject, data.jobject, num_folds, rnd.jobject, generator)
+        if n_jobs == 1:
+            javabridge.call(
+                self.jobject, "crossValidateModel",
+                "(Lweka/classifiers/Classifier;Lweka/core/Instances;ILjava/util/Random;[Ljava/lang/Object;)V",
+                classifier.jobject, data.jobject, num_folds, rnd.jobject, generator)
+        else:
+            javabridge.call(
+                self.wrapper, "crossValidateModel",
+                "(Lweka/classifiers/Classifier;Lweka/core/Instances;ILjava/util/Random;I[Ljava/lang/Object;)V",
+                classifier.jobject, data.jobject, num_folds, rnd.jobject, n_jobs, generator)
 
     def evaluate_train_test_split(self, classifier, data, percentage, rnd=None, output=None):
         """
@@ -1315,6 +1449,53 @@ class Evaluation(JavaObject):
         """
         return javabridge.call(self.jobject, "toCumulativeMarginDistributionString", "()Ljava/lang/String;")
 
+    def metrics(self):
+        """
+        Returns all the statistics in a single call. Per-class statistics are arrays with one value per
+        class label (empty for numeric classes), the confusion matrix is a 2-dim array. Statistics that
+        are not available (e.g., correlation coefficient for nominal classes) are NaN.
+
+        :return: the statistics (name -> float or ndarray), using the names of the corresponding properties/methods
+        :rtype: dict
+        """
+        scalars = [
+            "correct", "incorrect", "unclassified", "num_instances",
+            "percent_correct", "percent_incorrect", "percent_unclassified",
+            "kappa", "correlation_coefficient", "error_rate",
+            "mean_absolute_error", "root_mean_squared_error",
+            "relative_absolute_error", "root_relative_squared_error",
+            "mean_prior_absolute_error", "root_mean_prior_squared_error",
+            "avg_cost", "total_cost",
+            "coverage_of_test_cases_by_predicted_regions", "size_of_predicted_regions",
+            "kb_information", "kb_mean_information", "kb_relative_information",
+            "sf_entropy_gain", "sf_mean_entropy_gain", "sf_mean_prior_entropy", "sf_mean_scheme_entropy",
+            "sf_prior_entropy", "sf_scheme_entropy",
+            "weighted_area_under_prc", "weighted_area_under_roc",
+            "weighted_false_negative_rate", "weighted_false_positive_rate",
+            "weighted_true_negative_rate", "weighted_true_positive_rate",
+            "weighted_f_measure", "weighted_precision", "weighted_recall", "weighted_matthews_correlation",
+            "unweighted_macro_f_measure", "unweighted_micro_f_measure"]
+        per_class = [
+            "area_under_prc", "area_under_roc",
+            "false_negative_rate", "false_positive_rate", "true_negative_rate", "true_positive_rate",
+            "num_false_negatives", "num_false_positives", "num_true_negatives", "num_true_positives",
+            "f_measure", "precision", "recall", "matthews_correlation_coefficient"]
+        values = javabridge.get_env().get_double_array_elements(
+            javabridge.static_call(
+                "Lweka/classifiers/EvaluationWrapper;", "getMetrics",
+                "(Lweka/classifiers/Evaluation;)[D", self.jobject))
+        num_classes = int(values[0])
+        offset = 1
+        result = {}
+        for name in scalars:
+            result[name] = float(values[offset])
+            offset += 1
+        for name in per_class:
+            result[name] = values[offset:offset + num_classes]
+            offset += num_classes
+        result["confusion_matrix"] = values[offset:offset + num_classes * num_classes].reshape((num_classes, num_classes))
+        return result
+
     def area_under_prc(self, class_index):
         """
         Returns the area under precision recall curve.
@@ -1964,6 +2145,34 @@ class Evaluation(JavaObject):
                     result.append(Prediction(pred))
         return result
 
+    def predictions_array(self):
+        """
+        Returns the predictions as arrays, retrieved in a single call. The dictionary contains the
+        following keys: actual, predicted, weight, error (numeric predictions: predicted - actual,
+        nominal predictions: 1 if actual and predicted differ, otherwise 0) and distribution
+        (predictions x class labels; no columns for numeric predictions).
+
+        :return: the predictions (name -> ndarray), None if not available
+        :rtype: dict
+        """
+        values = javabridge.static_call(
+            "Lweka/classifiers/EvaluationWrapper;", "getPredictions",
+            "(Lweka/classifiers/Evaluation;)[D", self.jobject)
+        if values is None:
+            return None
+        values = javabridge.get_env().get_double_array_elements(values)
+        num_preds = int(values[0])
+        num_dist = int(values[1])
+        matrix = values[2:].reshape((num_preds, 4 + num_dist))
+        result = {
+            "actual": matrix[:, 0],
+            "predicted": matrix[:, 1],
+            "weight": matrix[:, 2],
+            "error": matrix[:, 3],
+            "distribution": matrix[:, 4:],
+        }
+        return result
+
     @classmethod
     def evaluate_model(cls, classifier, args):
         """
@@ -2104,15 +2313,40 @@ def predictions_to_instances(data, preds):
 
     :param data: the original dataset format
     :type data: Instances
-    :param preds: the predictions to convert
-    :type preds: list
+    :param preds: the predictions to convert, either list of Prediction objects or the dictionary
+                  obtained from Evaluation.predictions_array()
+    :type preds: list or dict
     :return: the predictions, None if no predictions present
     :rtype: Instances
     """
-    if len(preds) == 0:
+    if preds is None:
         return None
 
-    is_numeric = isinstance(preds[0], NumericPrediction)
+    if isinstance(preds, dict):
+        is_numeric = not data.class_attribute.is_nominal
+    else:
+        if len(preds) == 0:
+            return None
+        is_numeric = isinstance(preds[0], NumericPrediction)
+        if is_numeric:
+            error = array([pred.error for pred in preds])
+            dist = zeros((len(preds), 0))
+        else:
+            error = None
+            dist = array([pred.distribution for pred in preds])
+        preds = {
+            "actual": array([pred.actual for pred in preds]),
+            "predicted": array([pred.predicted for pred in preds]),
+            "weight": array([pred.weight for pred in preds]),
+            "error": error,
+            "distribution": dist,
+        }
+        if error is None:
+            preds["error"] = (preds["actual"] != preds["predicted"]).astype(float64)
+
+    num_preds = len(preds["actual"])
+    if num_preds == 0:
+        return None
 
     # create header
     atts = []
@@ -2131,27 +2365,16 @@ def predictions_to_instances(data, preds):
         atts.append(Attribute.create_numeric("classification"))
         for i in xrange(data.class_attribute.num_values):
             atts.append(Attribute.create_numeric("distribution-" + data.class_attribute.value(i)))
+    header = Instances.create_instances("Predictions", atts, 0)
 
-    result = Instances.create_instances("Predictions", atts, len(preds))
+    columns = [arange(1, num_preds + 1), preds["weight"], preds["actual"], preds["predicted"], preds["error"]]
+    if not is_numeric:
+        columns.append(preds["distribution"].max(axis=1))
+    values = column_stack(columns)
+    if not is_numeric:
+        values = hstack([values, preds["distribution"]])
 
-    count = 0
-    for pred in preds:
-        count += 1
-        if is_numeric:
-            values = array([count, pred.weight, pred.actual, pred.predicted, pred.error])
-        else:
-            if pred.actual == pred.predicted:
-                error = 0.0
-            else:
-                error = 1.0
-            l = [count, pred.weight, pred.actual, pred.predicted, error, max(pred.distribution)]
-            for i in xrange(data.class_attribute.num_values):
-                l.append(pred.distribution[i])
-            values = array(l)
-        inst = Instance.create_instance(values)
-        result.add_instance(inst)
-
-    return result
+    return Instances.from_values(header, values)
 
 
 def main(args=None):
@@ -56,8 +56,8 @@ class Clusterer(OptionHandler):
         self.is_drawable = self.check_type(jobject, "weka.core.Drawable")
         self.enforce_type(jobject, "weka.clusterers.Clusterer")
         super(Clusterer, self).__init__(jobject=jobject, options=options)
-        self.__cluster = javabridge.make_call(self.jobject, "clusterInstance", "(Lweka/core/Instance;)I")
-        self.__distribution = javabridge.make_call(self.jobject, "distributionForInstance", "(Lweka/core/Instance;)[D")
+        self.__cluster = classes.make_call(self.jobject, "weka/clusterers/Clusterer", "clusterInstance", "(Lweka/core/Instance;)I")
+        self.__distribution = classes.make_call(self.jobject, "weka/clusterers/Clusterer", "distributionForInstance", "(Lweka/core/Instance;)[D")
 
     @property
     def capabilities(self):
@@ -21,3 +21,11 @@ try:
     scipy_available = True
 except ImportError:
     pass
+
+# check whether pandas is there
+pandas_available = False
+try:
+    import pandas
+    pandas_available = True
+except ImportError:
+    pass
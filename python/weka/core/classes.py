@@ -109,6 +109,7 @@ def get_classname(obj):
 def is_instance_of(obj, class_or_intf_name):
     """
     Checks whether the Java object implements the specified interface or is a subclass of the superclass.
+    For arrays, the component type gets checked. Uses a single call, with the classes cached on the Java side.
 
     :param obj: the Java object to check
     :type obj: JB_Object
@@ -117,22 +118,72 @@ def is_instance_of(obj, class_or_intf_name):
     :return: true if either implements interface or subclass of superclass
     :rtype: bool
     """
-    class_or_intf_name = class_or_intf_name.replace("/", ".")
-    classname = get_classname(obj)
-    # array? retrieve component type and check that
-    if is_array(obj):
-        jarray = JavaArray(jobject=obj)
-        classname = jarray.component_type()
-    result = javabridge.static_call(
-        "Lweka/core/InheritanceUtils;", "isSubclass",
-        "(Ljava/lang/String;Ljava/lang/String;)Z",
-        class_or_intf_name, classname)
-    if result:
-        return True
     return javabridge.static_call(
-        "Lweka/core/InheritanceUtils;", "hasInterface",
-        "(Ljava/lang/String;Ljava/lang/String;)Z",
-        class_or_intf_name, classname)
+        "Lweka/core/ClassHelper;", "isInstanceOf",
+        "(Ljava/lang/Object;Ljava/lang/String;)Z",
+        obj, class_or_intf_name.replace("/", "."))
+
+
+# the cached method IDs: (class, method name, signature) -> method ID
+method_ids = {}
+
+
+def get_method_id(classname, method_name, sig):
+    """
+    Returns the (cached) ID of the method. Method IDs are valid across threads as long as the class stays loaded.
+
+    :param classname: the class or interface declaring the method, with forward slashes (eg "weka/core/Instance")
+    :type classname: str
+    :param method_name: the name of the method
+    :type method_name: str
+    :param sig: the signature of the method
+    :type sig: str
+    :return: the method ID
+    :rtype: object
+    """
+    key = (classname, method_name, sig)
+    result = method_ids.get(key)
+    if result is None:
+        env = javabridge.get_env()
+        klass = env.find_class(classname)
+        jexception = env.exception_occurred()
+        if jexception is not None:
+            raise JavaException(jexception)
+        result = env.get_method_id(klass, method_name, sig)
+        jexception = env.exception_occurred()
+        if jexception is not None:
+            raise JavaException(jexception)
+        if result is None:
+            raise Exception("Could not find method '" + method_name + "' with signature '" + sig + "' in: " + classname)
+        method_ids[key] = result
+    return result
+
+
+def make_call(jobject, classname, method_name, sig):
+    """
+    Drop-in replacement for javabridge.make_call, which uses the method ID cache rather than looking up the
+    method for every object. Creating the call therefore does not require any calls to the JVM. The returned
+    function uses the environment of the calling thread, takes the Java arguments and returns the raw result.
+
+    :param jobject: the Java object to call the method on
+    :type jobject: JB_Object
+    :param classname: the class or interface declaring the method, with forward slashes (eg "weka/core/Instance")
+    :type classname: str
+    :param method_name: the name of the method
+    :type method_name: str
+    :param sig: the signature of the method
+    :type sig: str
+    :return: the function for calling the method
+    :rtype: function
+    """
+    def fn(*args):
+        env = javabridge.get_env()
+        result = env.call_method(jobject, get_method_id(classname, method_name, sig), *args)
+        jexception = env.exception_occurred()
+        if jexception is not None:
+            raise JavaException(jexception)
+        return result
+    return fn
 
 
 def is_array(obj):
@@ -0,0 +1,411 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# columnar.py
+# Copyright (C) 2019 Fracpete (pythonwekawrapper at gmail dot com)
+
+import javabridge
+import json
+import os
+import numpy as np
+import weka.core.types as types
+from weka.core.dataset import Instances
+
+# Binary columnar dataset format: a JSON header file (extension .wcol) with the attribute metadata and one
+# raw array file per column (little endian): int32 codes for nominal and string attributes (-1 for missing
+# values), float64 internal values for all others (NaN for missing values). The weights are stored in a
+# separate float64 array file. All array files can be memory-mapped directly.
+
+# the extension of the header file
+EXTENSION = ".wcol"
+
+# the version of the format
+FORMAT_VERSION = 1
+
+# the data types of the column files
+DTYPE_VALUES = "<f8"
+DTYPE_CODES = "<i4"
+
+
+def column_file(filename, index):
+    """
+    Returns the name of the array file for the specified column.
+
+    :param filename: the header file
+    :type filename: str
+    :param index: the 0-based index of the attribute
+    :type index: int
+    :return: the array file
+    :rtype: str
+    """
+    return filename + "." + str(index)
+
+
+def weights_file(filename):
+    """
+    Returns the name of the array file for the weights.
+
+    :param filename: the header file
+    :type filename: str
+    :return: the array file
+    :rtype: str
+    """
+    return filename + ".weights"
+
+
+def read_header(filename):
+    """
+    Reads the header file.
+
+    :param filename: the header file
+    :type filename: str
+    :return: the header
+    :rtype: dict
+    """
+    if not os.path.exists(filename):
+        raise Exception("Dataset file does not exist: " + str(filename))
+    with open(filename, "r") as f:
+        header = json.load(f)
+    if header.get("format", -1) > FORMAT_VERSION:
+        raise Exception("Unsupported format version: " + str(header.get("format")))
+    return header
+
+
+def save(data, filename):
+    """
+    Saves the dataset in columnar format. The column files are written by the JVM directly.
+
+    :param data: the dataset to save
+    :type data: Instances
+    :param filename: the header file to write (the column files get placed next to it)
+    :type filename: str
+    """
+    atts = []
+    files = []
+    for i in xrange(data.num_attributes):
+        att = data.attribute(i)
+        labels = None
+        date_format = None
+        if att.is_nominal:
+            typ = "nominal"
+            labels = att.values
+        elif att.is_string:
+            typ = "string"
+            labels = att.values
+        elif att.is_date:
+            typ = "date"
+            date_format = att.date_format
+        elif att.is_numeric:
+            typ = "numeric"
+        else:
+            raise Exception("Unsupported attribute type (numeric, date, nominal and string only): " + att.name)
+        files.append(column_file(filename, i))
+        atts.append({
+            "name": att.name,
+            "type": typ,
+            "dtype": DTYPE_CODES if (labels is not None) else DTYPE_VALUES,
+            "file": os.path.basename(files[-1]),
+            "labels": labels,
+            "date_format": date_format,
+        })
+
+    header = {
+        "format": FORMAT_VERSION,
+        "relation": data.relationname,
+        "num_instances": data.num_instances,
+        "class_index": data.class_index,
+        "weights": os.path.basename(weights_file(filename)),
+        "arff": javabridge.to_string(Instances.template_instances(data, 0).jobject),
+        "attributes": atts,
+    }
+
+    javabridge.static_call(
+        "weka/core/InstancesHelper", "toColumns",
+        "(Lweka/core/Instances;[Ljava/lang/String;Ljava/lang/String;)V",
+        data.jobject, types.string_list_to_array(files), weights_file(filename))
+    with open(filename, "w") as f:
+        json.dump(header, f, indent=2)
+
+
+def load(filename):
+    """
+    Loads the dataset stored in columnar format. The column files are read by the JVM directly.
+
+    :param filename: the header file
+    :type filename: str
+    :return: the dataset
+    :rtype: Instances
+    """
+    header = read_header(filename)
+    dirname = os.path.dirname(filename)
+    structure = javabridge.make_instance(
+        "weka/core/Instances", "(Ljava/io/Reader;)V",
+        javabridge.make_instance("java/io/StringReader", "(Ljava/lang/String;)V", header["arff"]))
+    files = []
+    labels = []
+    for att in header["attributes"]:
+        files.append(os.path.join(dirname, att["file"]))
+        if att["type"] == "string":
+            labels.append(att["labels"])
+        else:
+            labels.append(None)
+    weights = None
+    if header.get("weights") is not None:
+        weights = os.path.join(dirname, header["weights"])
+    result = Instances(
+        javabridge.static_call(
+            "weka/core/InstancesHelper", "fromColumns",
+            "(Lweka/core/Instances;[Ljava/lang/String;Ljava/lang/String;I[[Ljava/lang/String;)Lweka/core/Instances;",
+            structure, types.string_list_to_array(files), weights, header["num_instances"],
+            types.string_matrix_to_array(labels)))
+    result.class_index = header["class_index"]
+    return result
+
+
+class ColumnarDataset(object):
+    """
+    Lazy access to a dataset stored in columnar format, without the JVM. Columns get memory-mapped
+    (read-only) on first access.
+    """
+
+    def __init__(self, filename):
+        """
+        Reads the header of the dataset.
+
+        :param filename: the header file
+        :type filename: str
+        """
+        self.filename = filename
+        self.header = read_header(filename)
+        self._columns = {}
+
+    def __len__(self):
+        """
+        Returns the number of rows.
+
+        :return: the number of rows
+        :rtype: int
+        """
+        return self.num_instances
+
+    @property
+    def relationname(self):
+        """
+        Returns the name of the dataset.
+
+        :return: the name
+        :rtype: str
+        """
+        return self.header["relation"]
+
+    @property
+    def num_instances(self):
+        """
+        Returns the number of rows.
+
+        :return: the number of rows
+        :rtype: int
+        """
+        return self.header["num_instances"]
+
+    @property
+    def num_attributes(self):
+        """
+        Returns the number of attributes.
+
+        :return: the number of attributes
+        :rtype: int
+        """
+        return len(self.header["attributes"])
+
+    @property
+    def class_index(self):
+        """
+        Returns the 0-based index of the class attribute.
+
+        :return: the class index, -1 if none set
+        :rtype: int
+        """
+        return self.header["class_index"]
+
+    @property
+    def attribute_names(self):
+        """
+        Returns the names of the attributes.
+
+        :return: the names
+        :rtype: list
+        """
+        return [att["name"] for att in self.header["attributes"]]
+
+    def attribute_index(self, name):
+        """
+        Returns the 0-based index of the attribute.
+
+        :param name: the name of the attribute
+        :type name: str
+        :return: the index
+        :rtype: int
+        """
+        names = self.attribute_names
+        if name not in names:
+            raise Exception("Unknown attribute: " + str(name))
+        return names.index(name)
+
+    def _index(self, index):
+        """
+        Turns the attribute name into an index, if necessary.
+
+        :param index: the 0-based index or the name of the attribute
+        :type index: int or str
+        :return: the 0-based index
+        :rtype: int
+        """
+        if isinstance(index, basestring):
+            return self.attribute_index(index)
+        return index
+
+    def attribute_type(self, index):
+        """
+        Returns the type of the attribute (numeric, date, nominal, string).
+
+        :param index: the 0-based index or the name of the attribute
+        :type index: int or str
+        :return: the type
+        :rtype: str
+        """
+        return self.header["attributes"][self._index(index)]["type"]
+
+    def labels(self, index):
+        """
+        Returns the labels of a nominal or string attribute.
+
+        :param index: the 0-based index or the name of the attribute
+        :type index: int or str
+        :return: the labels, None if not nominal or string
+        :rtype: list
+        """
+        return self.header["attributes"][self._index(index)]["labels"]
+
+    def _map(self, fname, dtype):
+        """
+        Memory-maps the array file.
+
+        :param fname: the file to map
+        :type fname: str
+        :param dtype: the data type of the array
+        :type dtype: str
+        :return: the array
+        :rtype: ndarray
+        """
+        fname = os.path.join(os.path.dirname(self.filename), fname)
+        if self.num_instances == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(fname, dtype=dtype, mode="r", shape=(self.num_instances,))
+
+    def column(self, index):
+        """
+        Returns the memory-mapped column: int32 codes for nominal and string attributes (-1 for missing
+        values), float64 internal values otherwise (NaN for missing values, milliseconds since epoch for dates).
+
+        :param index: the 0-based index or the name of the attribute
+        :type index: int or str
+        :return: the column
+        :rtype: ndarray
+        """
+        index = self._index(index)
+        if index not in self._columns:
+            att = self.header["attributes"][index]
+            self._columns[index] = self._map(att["file"], att["dtype"])
+        return self._columns[index]
+
+    def __getitem__(self, index):
+        """
+        Returns the memory-mapped column.
+
+        :param index: the 0-based index or the name of the attribute
+        :type index: int or str
+        :return: the column
+        :rtype: ndarray
+        """
+        return self.column(index)
+
+    @property
+    def weights(self):
+        """
+        Returns the memory-mapped weights.
+
+        :return: the weights
+        :rtype: ndarray
+        """
+        if self.header.get("weights") is None:
+            return np.ones(self.num_instances)
+        if "weights" not in self._columns:
+            self._columns["weights"] = self._map(self.header["weights"], DTYPE_VALUES)
+        return self._columns["weights"]
+
+    def to_instances(self):
+        """
+        Loads the full dataset into the JVM.
+
+        :return: the dataset
+        :rtype: Instances
+        """
+        return load(self.filename)
+
+
+class ColumnarLoader(object):
+    """
+    Loader for datasets in columnar format, offering the same methods as weka.core.converters.Loader
+    for loading files.
+    """
+
+    def __init__(self):
+        """
+        Initializes the loader.
+        """
+        self.incremental = False
+        self.structure = None
+
+    def load_file(self, dfile, incremental=False):
+        """
+        Loads the specified file and returns the Instances object.
+
+        :param dfile: the header file to load
+        :type dfile: str
+        :param incremental: not supported
+        :type incremental: bool
+        :return: the full dataset
+        :rtype: Instances
+        """
+        if incremental:
+            raise Exception("Incremental loading not supported for columnar format!")
+        return load(str(dfile))
+
+
+class ColumnarSaver(object):
+    """
+    Saver for datasets in columnar format, offering the same methods as weka.core.converters.Saver
+    for saving files.
+    """
+
+    def save_file(self, data, dfile):
+        """
+        Saves the Instances object in the specified file.
+
+        :param data: the data to save
+        :type data: Instances
+        :param dfile: the header file to save the data to
+        :type dfile: str
+        """
+        save(data, str(dfile))
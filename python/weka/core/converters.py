@@ -18,8 +18,11 @@ import javabridge
 from weka.core.classes import OptionHandler
 from weka.core.capabilities import Capabilities
 from weka.core.dataset import Instances, Instance, Attribute
+import weka.core.columnar as columnar
+import multiprocessing
 import numpy
 import os
+import weka.core.types as types
 
 
 class Loader(OptionHandler):
@@ -109,6 +112,41 @@ class Loader(OptionHandler):
         else:
             return Instances(javabridge.call(self.jobject, "getDataSet", "()Lweka/core/Instances;"))
 
+    def iter_chunks(self, dfile, chunk_size=10000, as_numpy=False):
+        """
+        Loads the specified file incrementally and yields the rows in chunks, with each chunk getting read
+        in a single call. Requires a loader that supports incremental loading. The chunks are datasets with
+        the same structure (string attributes only contain the values of the chunk).
+
+        :param dfile: the file to load
+        :type dfile: str
+        :param chunk_size: the maximum number of rows per chunk
+        :type chunk_size: int
+        :param as_numpy: whether to return the internal values as numpy matrices rather than datasets
+        :type as_numpy: bool
+        :return: the chunks
+        :rtype: generator
+        """
+        if chunk_size < 1:
+            raise Exception("Chunk size must be at least 1, provided: " + str(chunk_size))
+        self.enforce_type(self.jobject, "weka.core.converters.IncrementalConverter")
+        structure = self.load_file(dfile, incremental=True)
+        while True:
+            chunk = Instances(
+                javabridge.static_call(
+                    "weka/core/converters/ConverterHelper", "nextChunk",
+                    "(Lweka/core/converters/Loader;Lweka/core/Instances;I)Lweka/core/Instances;",
+                    self.jobject, structure.jobject, chunk_size))
+            num = chunk.num_instances
+            if num == 0:
+                break
+            if as_numpy:
+                yield chunk.to_numpy()
+            else:
+                yield chunk
+            if num < chunk_size:
+                break
+
 
 class IncrementalLoaderIterator(object):
     """
@@ -224,16 +262,131 @@ class Saver(OptionHandler):
         javabridge.call(self.jobject, "setInstances", "(Lweka/core/Instances;)V", data.jobject)
         javabridge.call(self.jobject, "writeBatch", "()V")
 
+    def open(self, dfile, header):
+        """
+        Opens the specified file for saving data incrementally, using the header as structure.
+        Requires a saver that supports incremental saving. Use the returned writer as context manager,
+        which finishes the file when exiting.
+
+        :param dfile: the file to save the data to
+        :type dfile: str
+        :param header: the structure of the data
+        :type header: Instances
+        :return: the writer
+        :rtype: IncrementalSaverWriter
+        """
+        self.enforce_type(self.jobject, "weka.core.converters.FileSourcedConverter")
+        self.enforce_type(self.jobject, "weka.core.converters.IncrementalConverter")
+        if not javabridge.is_instance_of(dfile, "Ljava/io/File;"):
+            dfile = javabridge.make_instance(
+                "Ljava/io/File;", "(Ljava/lang/String;)V", javabridge.get_env().new_string_utf(str(dfile)))
+        javabridge.call(self.jobject, "setFile", "(Ljava/io/File;)V", dfile)
+        javabridge.call(self.jobject, "setRetrieval", "(I)V", javabridge.get_static_field(
+            "weka/core/converters/Saver", "INCREMENTAL", "I"))
+        javabridge.call(self.jobject, "setStructure", "(Lweka/core/Instances;)I", header.jobject)
+        return IncrementalSaverWriter(self, header)
+
+
+class IncrementalSaverWriter(object):
+    """
+    Writes rows with a saver in incremental mode, see Saver.open. Rows can be written one at a time,
+    as datasets or as numpy matrices of internal values, with each batch getting written in a single call.
+    """
+
+    def __init__(self, saver, header):
+        """
+        Initializes the writer.
+
+        :param saver: the saver to use, already opened in incremental mode
+        :type saver: Saver
+        :param header: the structure of the data
+        :type header: Instances
+        """
+        self.saver = saver
+        self.header = header
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _check(self):
+        """
+        Raises an exception if the writer has already been closed.
+        """
+        if self.closed:
+            raise Exception("Writer has already been closed!")
+
+    def write(self, inst):
+        """
+        Writes the row. Rows without a dataset get the header assigned.
+
+        :param inst: the row to write
+        :type inst: Instance
+        """
+        self._check()
+        javabridge.static_call(
+            "weka/core/converters/ConverterHelper", "writeIncremental",
+            "(Lweka/core/converters/Saver;Lweka/core/Instances;Lweka/core/Instance;)V",
+            self.saver.jobject, self.header.jobject, inst.jobject)
+
+    def write_batch(self, data, weights=None):
+        """
+        Writes the rows of the dataset or the numpy matrix of internal values (rows x attributes of the header,
+        NaN for missing values). Numpy matrices get written without creating a dataset.
+
+        :param data: the rows to write
+        :type data: Instances or ndarray
+        :param weights: the weights for the rows of the numpy matrix, None for 1.0
+        :type weights: ndarray
+        """
+        self._check()
+        if isinstance(data, numpy.ndarray):
+            values = numpy.ascontiguousarray(data, dtype=numpy.float64)
+            if len(values.shape) != 2:
+                raise Exception("Values must be a 2-dimensional matrix, provided: " + str(values.shape))
+            if values.shape[1] != self.header.num_attributes:
+                raise Exception(
+                    "Number of columns and attributes differ: " + str(values.shape[1]) + " != "
+                    + str(self.header.num_attributes))
+            jweights = None
+            if weights is not None:
+                jweights = javabridge.get_env().make_double_array(numpy.ascontiguousarray(weights, dtype=numpy.float64))
+            javabridge.static_call(
+                "weka/core/converters/ConverterHelper", "writeIncremental",
+                "(Lweka/core/converters/Saver;Lweka/core/Instances;[DI[D)V",
+                self.saver.jobject, self.header.jobject, javabridge.get_env().make_double_array(values.ravel()),
+                values.shape[0], jweights)
+        else:
+            javabridge.static_call(
+                "weka/core/converters/ConverterHelper", "writeIncremental",
+                "(Lweka/core/converters/Saver;Lweka/core/Instances;)V",
+                self.saver.jobject, data.jobject)
+
+    def close(self):
+        """
+        Finishes the file. Does nothing if already closed.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        javabridge.call(self.saver.jobject, "writeIncremental", "(Lweka/core/Instance;)V", None)
+
 
 def loader_for_file(filename):
     """
     Returns a Loader that can load the specified file, based on the file extension. None if failed to determine.
+    Files with extension .wcol get loaded with weka.core.columnar.ColumnarLoader.
 
     :param filename: the filename to get the loader for
     :type filename: str
     :return: the assoicated loader instance or None if none found
     :rtype: Loader
     """
+    if str(filename).lower().endswith(columnar.EXTENSION):
+        return columnar.ColumnarLoader()
     loader = javabridge.static_call(
         "weka/core/converters/ConverterUtils", "getLoaderForFile",
         "(Ljava/lang/String;)Lweka/core/converters/AbstractFileLoader;", filename)
@@ -259,15 +412,41 @@ def load_any_file(filename):
         return loader.load_file(filename)
 
 
+def load_many(files, n_threads=None):
+    """
+    Loads the files concurrently with Java threads (loaders determined by file extension) and appends the
+    datasets in the order of the files, in a single call. Throws an exception if the headers aren't compatible.
+
+    :param files: the files to load
+    :type files: list
+    :param n_threads: the number of threads to use, None for number of cores
+    :type n_threads: int
+    :return: the combined dataset
+    :rtype: Instances
+    """
+    if n_threads is None:
+        n_threads = multiprocessing.cpu_count()
+    for f in files:
+        if str(f).lower().endswith(columnar.EXTENSION):
+            raise Exception("Columnar format not supported: " + str(f))
+    return Instances(
+        javabridge.static_call(
+            "weka/core/converters/ConverterHelper", "loadMany", "([Ljava/lang/String;I)Lweka/core/Instances;",
+            types.string_list_to_array([str(f) for f in files]), n_threads))
+
+
 def saver_for_file(filename):
     """
     Returns a Saver that can load the specified file, based on the file extension. None if failed to determine.
+    Files with extension .wcol get saved with weka.core.columnar.ColumnarSaver.
 
     :param filename: the filename to get the saver for
     :type filename: str
     :return: the associated saver instance or None if none found
     :rtype: Saver
     """
+    if str(filename).lower().endswith(columnar.EXTENSION):
+        return columnar.ColumnarSaver()
     saver = javabridge.static_call(
         "weka/core/converters/ConverterUtils", "getSaverForFile",
         "(Ljava/lang/String;)Lweka/core/converters/AbstractFileSaver;", filename)
@@ -330,11 +509,6 @@ def ndarray_to_instances(array, relation, att_template="Att-#", att_list=None):
             name = att_template.replace("#", str(i+1)).replace("!", str(i)).replace("@", relation)
             att = Attribute.create_numeric(name)
             atts.append(att)
-    result = Instances.create_instances(relation, atts, rows)
-
-    # data
-    for i in xrange(rows):
-        inst = Instance.create_instance(array[i])
-        result.add_instance(inst)
+    header = Instances.create_instances(relation, atts, 0)
 
-    return result
+    return Instances.from_values(header, array)
@@ -14,10 +14,18 @@
 # database.py
 # Copyright (C) 2015 Fracpete (pythonwekawrapper at gmail dot com)
 
+import hashlib
 import javabridge
+import logging
+import threading
+import time
+from contextlib import contextmanager
 from weka.core.classes import OptionHandler
 from weka.core.dataset import Instances
 
+# logging setup
+logger = logging.getLogger(__name__)
+
 
 class DatabaseUtils(OptionHandler):
     """
@@ -194,3 +202,282 @@ class InstanceQuery(DatabaseUtils):
             data = javabridge.call(self.jobject, "retrieveInstances", "(Ljava/lang/String;)Lweka/core/Instances;")
         return Instances(data)
 
+    def retrieve_chunks(self, query=None, chunk_size=10000, fetch_size=1000, incremental=False):
+        """
+        Executes either the supplied query or the one set via options (or the 'query' property) and
+        streams the result with a forward-only cursor, yielding chunks of rows (or single rows in
+        incremental mode). The structure is determined once from the column types of the result
+        (string attributes for character columns, as the labels are not known in advance).
+        Some drivers only stream the rows when auto-commit is disabled (e.g., PostgreSQL).
+
+        :param query: query to execute if not the currently set one
+        :type query: str
+        :param chunk_size: the maximum number of rows per chunk
+        :type chunk_size: int
+        :param fetch_size: the JDBC fetch size, less than 1 for the driver's default
+        :type fetch_size: int
+        :param incremental: whether to yield single rows rather than chunks
+        :type incremental: bool
+        :return: the chunks or rows
+        :rtype: generator
+        """
+        if chunk_size < 1:
+            raise Exception("Chunk size must be at least 1, provided: " + str(chunk_size))
+        if query is None:
+            query = self.query
+        cursor = javabridge.make_instance(
+            "weka/experiment/InstanceQueryCursor", "(Lweka/experiment/InstanceQuery;Ljava/lang/String;I)V",
+            self.jobject, query, fetch_size)
+        try:
+            while True:
+                chunk = Instances(javabridge.call(cursor, "nextChunk", "(I)Lweka/core/Instances;", chunk_size))
+                if chunk.num_instances == 0:
+                    break
+                if incremental:
+                    for inst in chunk:
+                        yield inst
+                else:
+                    yield chunk
+        finally:
+            javabridge.call(cursor, "close", "()V")
+
+
+class ConnectionPool(object):
+    """
+    Pool of JDBC connections, keyed by database URL, user, password and custom properties. Connections get
+    attached to DatabaseUtils objects (e.g., InstanceQuery) for the duration of a query and are reused
+    afterwards. Idle connections are closed after the idle timeout, connections get validated before reuse.
+    """
+
+    def __init__(self, max_size=4, idle_timeout=300.0, validation_timeout=5, wait_timeout=None):
+        """
+        Initializes the pool.
+
+        :param max_size: the maximum number of connections per URL/user/password/custom properties
+        :type max_size: int
+        :param idle_timeout: the number of seconds after which idle connections get closed
+        :type idle_timeout: float
+        :param validation_timeout: the timeout in seconds for validating a connection
+        :type validation_timeout: int
+        :param wait_timeout: the number of seconds to wait for a free connection, None to wait indefinitely
+        :type wait_timeout: float
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.validation_timeout = validation_timeout
+        self.wait_timeout = wait_timeout
+        self._idle = {}
+        self._in_use = {}
+        self._attached = {}
+        self._condition = threading.Condition()
+
+    def _key(self, utils):
+        """
+        Returns the key for the database utils object. The password is only included as hash.
+
+        :param utils: the object to get the key for
+        :type utils: DatabaseUtils
+        :return: the key (URL, user, password hash, custom properties)
+        :rtype: tuple
+        """
+        props = None
+        if isinstance(utils, InstanceQuery):
+            props = utils.custom_properties
+        password = utils.password
+        if password is None:
+            password = ""
+        if isinstance(password, unicode):
+            password = password.encode("utf-8")
+        return utils.db_url, utils.user, hashlib.sha1(password).hexdigest(), props
+
+    def _connect(self, utils):
+        """
+        Connects the database utils object to the database, using a new connection.
+
+        :param utils: the object to connect
+        :type utils: DatabaseUtils
+        """
+        self._attach(utils, None)
+        javabridge.call(utils.jobject, "connectToDatabase", "()V")
+
+    def _attach(self, utils, conn):
+        """
+        Attaches the connection to the database utils object.
+
+        :param utils: the object to attach the connection to
+        :type utils: DatabaseUtils
+        :param conn: the connection to attach, None to detach the current one
+        :type conn: JB_Object
+        """
+        javabridge.static_call(
+            "weka/experiment/ConnectionHelper", "setConnection",
+            "(Lweka/experiment/DatabaseUtils;Ljava/sql/Connection;)V", utils.jobject, conn)
+
+    def _detach(self, utils):
+        """
+        Detaches the connection from the database utils object (without closing it).
+
+        :param utils: the object to detach the connection from
+        :type utils: DatabaseUtils
+        :return: the connection, None if not connected
+        :rtype: JB_Object
+        """
+        result = javabridge.static_call(
+            "weka/experiment/ConnectionHelper", "getConnection",
+            "(Lweka/experiment/DatabaseUtils;)Ljava/sql/Connection;", utils.jobject)
+        self._attach(utils, None)
+        return result
+
+    def _is_valid(self, conn):
+        """
+        Checks whether the connection can still be used.
+
+        :param conn: the connection to check
+        :type conn: JB_Object
+        :return: True if valid
+        :rtype: bool
+        """
+        return javabridge.static_call(
+            "weka/experiment/ConnectionHelper", "isValid", "(Ljava/sql/Connection;I)Z",
+            conn, self.validation_timeout)
+
+    def _close(self, conn):
+        """
+        Closes the connection.
+
+        :param conn: the connection to close
+        :type conn: JB_Object
+        """
+        javabridge.static_call(
+            "weka/experiment/ConnectionHelper", "close", "(Ljava/sql/Connection;)V", conn)
+
+    def _expire(self):
+        """
+        Closes idle connections that exceeded the idle timeout.
+        """
+        now = time.time()
+        for key in self._idle.keys():
+            active = []
+            for conn, last_used in self._idle[key]:
+                if now - last_used > self.idle_timeout:
+                    self._close(conn)
+                else:
+                    active.append((conn, last_used))
+            self._idle[key] = active
+
+    def _num_connections(self, key):
+        """
+        Returns the number of open connections for the key.
+
+        :param key: the key to get the number for
+        :type key: tuple
+        :return: the number of idle and in-use connections
+        :rtype: int
+        """
+        return len(self._idle.get(key, [])) + self._in_use.get(key, 0)
+
+    def acquire(self, utils):
+        """
+        Attaches a pooled connection to the database utils object, reusing an idle connection if possible.
+        Waits for a connection to become available if the maximum number of connections has been reached.
+
+        :param utils: the object to attach the connection to
+        :type utils: DatabaseUtils
+        """
+        key = self._key(utils)
+        end = None if self.wait_timeout is None else time.time() + self.wait_timeout
+        with self._condition:
+            if id(utils) in self._attached:
+                raise Exception("Object already has a pooled connection attached!")
+            conn = None
+            while conn is None:
+                self._expire()
+                while (conn is None) and (len(self._idle.get(key, [])) > 0):
+                    conn = self._idle[key].pop()[0]
+                    if not self._is_valid(conn):
+                        logger.debug("Discarding invalid connection: " + utils.db_url)
+                        self._close(conn)
+                        conn = None
+                if conn is not None:
+                    break
+                if self._num_connections(key) < self.max_size:
+                    break
+                if (end is not None) and (time.time() >= end):
+                    raise Exception(
+                        "No connection available for " + utils.db_url + " within " + str(self.wait_timeout) + "s!")
+                self._condition.wait(None if end is None else max(0.0, end - time.time()))
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+
+        try:
+            if conn is None:
+                self._connect(utils)
+            else:
+                self._attach(utils, conn)
+        except Exception:
+            with self._condition:
+                self._in_use[key] -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._attached[id(utils)] = key
+
+    def release(self, utils):
+        """
+        Detaches the pooled connection from the database utils object and returns it to the pool.
+
+        :param utils: the object to detach the connection from
+        :type utils: DatabaseUtils
+        """
+        with self._condition:
+            key = self._attached.pop(id(utils), None)
+            if key is None:
+                raise Exception("Object has no pooled connection attached!")
+            conn = self._detach(utils)
+            self._in_use[key] -= 1
+            if conn is not None:
+                self._idle.setdefault(key, []).append((conn, time.time()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, utils):
+        """
+        Context manager that attaches a pooled connection to the database utils object and releases it
+        afterwards.
+
+        :param utils: the object to attach the connection to
+        :type utils: DatabaseUtils
+        """
+        self.acquire(utils)
+        try:
+            yield utils
+        finally:
+            self.release(utils)
+
+    def close(self):
+        """
+        Closes all idle connections. Connections in use get returned to the pool as usual.
+        """
+        with self._condition:
+            for key in self._idle:
+                for conn, last_used in self._idle[key]:
+                    self._close(conn)
+            self._idle = {}
+
+
+# the pool shared by the flow actors
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool():
+    """
+    Returns the connection pool shared by the flow actors (created on first call).
+
+    :return: the pool
+    :rtype: ConnectionPool
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool()
+        return _shared_pool
@@ -17,8 +17,11 @@
 import javabridge
 import logging
 import numpy as np
-from weka.core.classes import JavaObject
+from weka.core.classes import JavaObject, make_call
 import weka.core.types as types
+from weka.core import pandas_available
+if pandas_available:
+    import pandas as pd
 
 # logging setup
 logger = logging.getLogger(__name__)
@@ -38,17 +41,18 @@ class Instances(JavaObject):
         """
         self.enforce_type(jobject, "weka.core.Instances")
         super(Instances, self).__init__(jobject)
-        self.__attribute = javabridge.make_call(self.jobject, "attribute", "(I)Lweka/core/Attribute;")
-        self.__attribute_by_name = javabridge.make_call(self.jobject, "attribute", "(Ljava/lang/String;)Lweka/core/Attribute;")
-        self.__num_attributes = javabridge.make_call(self.jobject, "numAttributes", "()I")
-        self.__num_instances = javabridge.make_call(self.jobject, "numInstances", "()I")
-        self.__get_class_index = javabridge.make_call(self.jobject, "classIndex", "()I")
-        self.__set_class_index = javabridge.make_call(self.jobject, "setClassIndex", "(I)V")
-        self.__class_attribute = javabridge.make_call(self.jobject, "classAttribute", "()Lweka/core/Attribute;")
-        self.__get_instance = javabridge.make_call(self.jobject, "instance", "(I)Lweka/core/Instance;")
-        self.__set_instance = javabridge.make_call(self.jobject, "set", "(ILweka/core/Instance;)Lweka/core/Instance;")
-        self.__append_instance = javabridge.make_call(self.jobject, "add", "(Lweka/core/Instance;)Z")
-        self.__insert_instance = javabridge.make_call(self.jobject, "add", "(ILweka/core/Instance;)V")
+        self._stats_cache = None
+        self.__attribute = make_call(self.jobject, "weka/core/Instances", "attribute", "(I)Lweka/core/Attribute;")
+        self.__attribute_by_name = make_call(self.jobject, "weka/core/Instances", "attribute", "(Ljava/lang/String;)Lweka/core/Attribute;")
+        self.__num_attributes = make_call(self.jobject, "weka/core/Instances", "numAttributes", "()I")
+        self.__num_instances = make_call(self.jobject, "weka/core/Instances", "numInstances", "()I")
+        self.__get_class_index = make_call(self.jobject, "weka/core/Instances", "classIndex", "()I")
+        self.__set_class_index = make_call(self.jobject, "weka/core/Instances", "setClassIndex", "(I)V")
+        self.__class_attribute = make_call(self.jobject, "weka/core/Instances", "classAttribute", "()Lweka/core/Attribute;")
+        self.__get_instance = make_call(self.jobject, "weka/core/Instances", "instance", "(I)Lweka/core/Instance;")
+        self.__set_instance = make_call(self.jobject, "weka/core/Instances", "set", "(ILweka/core/Instance;)Lweka/core/Instance;")
+        self.__append_instance = make_call(self.jobject, "weka/core/Instances", "add", "(Lweka/core/Instance;)Z")
+        self.__insert_instance = make_call(self.jobject, "weka/core/Instances", "add", "(ILweka/core/Instance;)V")
 
     def __iter__(self):
         """
@@ -141,6 +145,51 @@ class Instances(JavaObject):
         """
         return AttributeStats(javabridge.call(self.jobject, "attributeStats", "(I)Lweka/core/AttributeStats;", index))
 
+    def all_attribute_stats(self):
+        """
+        Returns the statistics of all attributes, computed in a single pass over the data. The result is
+        cached until the dataset gets modified via one of the methods of this wrapper (modifications of
+        Instance objects or of the underlying Java object are not detected, apart from changes in the
+        number of rows).
+
+        The dictionary contains the following numpy arrays, with one element per attribute: min, max, mean,
+        stddev (all NaN for non-numeric attributes; mean/stddev are weighted), missing, distinct, unique, total.
+        Under "nominal_counts" is a list with the label counts for nominal attributes (None for all others).
+
+        :return: the statistics
+        :rtype: dict
+        """
+        if (self._stats_cache is not None) and (self._stats_cache[0] == self.num_instances):
+            return self._stats_cache[1]
+
+        flat = np.array(javabridge.get_env().get_double_array_elements(javabridge.static_call(
+            "weka/core/InstancesHelper", "attributeStats", "(Lweka/core/Instances;)[D", self.jobject)))
+        num_stats = javabridge.get_static_field("weka/core/InstancesHelper", "NUM_STATS", "I")
+        num_atts = int(flat[0])
+        stats = flat[1:1 + num_atts * num_stats].reshape((num_atts, num_stats))
+        result = {
+            "min": stats[:, 0].copy(),
+            "max": stats[:, 1].copy(),
+            "mean": stats[:, 2].copy(),
+            "stddev": stats[:, 3].copy(),
+            "missing": stats[:, 4].astype(np.int64),
+            "distinct": stats[:, 5].astype(np.int64),
+            "unique": stats[:, 6].astype(np.int64),
+            "total": stats[:, 7].astype(np.int64),
+        }
+        counts = []
+        offset = 1 + num_atts * num_stats
+        for i in xrange(num_atts):
+            num_labels = int(stats[i, 8])
+            if num_labels >= 0:
+                counts.append(flat[offset:offset + num_labels].astype(np.int64))
+                offset += num_labels
+            else:
+                counts.append(None)
+        result["nominal_counts"] = counts
+        self._stats_cache = (self.num_instances, result)
+        return result
+
     def values(self, index):
         """
         Returns the internal values of this attribute from all the instance objects.
@@ -148,11 +197,110 @@ class Instances(JavaObject):
         :return: the values as numpy array
         :rtype: list
         """
-        values = []
-        for i in xrange(self.num_instances):
-            inst = self.get_instance(i)
-            values.append(inst.get_value(index))
-        return np.array(values)
+        return self.to_numpy(columns=[index]).ravel()
+
+    def to_numpy(self, columns=None, dtype=np.float64, order="C", shared=False):
+        """
+        Returns the internal values of the dataset as 2-dimensional numpy array (rows x columns).
+        The values get transferred from the JVM in a single call, missing values are represented by NaN.
+        In shared mode, the JVM writes the values directly into a memory-mapped file (see
+        weka.core.types.shared_dir) that backs the returned array, avoiding any intermediate copies.
+        Shared mode only supports the float64 data type and C order.
+
+        :param columns: the 0-based indices of the attributes to export, None for all
+        :type columns: list
+        :param dtype: the numpy data type of the matrix
+        :type dtype: type
+        :param order: the memory layout of the matrix, C (row-major) or F (column-major)
+        :type order: str
+        :param shared: whether to use a memory-mapped buffer shared with the JVM
+        :type shared: bool
+        :return: the values as numpy matrix
+        :rtype: ndarray
+        """
+        if order not in ["C", "F"]:
+            raise Exception("Order must be either 'C' or 'F', provided: " + str(order))
+        if shared and ((order != "C") or (np.dtype(dtype) != np.float64)):
+            raise Exception("Shared mode only supports float64 and order 'C'!")
+        if columns is None:
+            num_cols = self.num_attributes
+            jcols = None
+        else:
+            num_cols = len(columns)
+            jcols = javabridge.get_env().make_int_array(np.array(columns, dtype=np.int32))
+        num_rows = self.num_instances
+        if shared:
+            if num_rows * num_cols == 0:
+                return np.zeros((num_rows, num_cols))
+            fname = types.shared_file()
+            try:
+                javabridge.static_call(
+                    "Lweka/core/InstancesHelper;", "toBuffer",
+                    "(Lweka/core/Instances;[ILjava/lang/String;)V",
+                    self.jobject, jcols, fname)
+                result = np.memmap(fname, dtype=np.float64, mode="r+", shape=(num_rows, num_cols))
+            finally:
+                types.remove_shared_file(fname)
+            return result
+        values = javabridge.get_env().get_double_array_elements(
+            javabridge.static_call(
+                "Lweka/core/InstancesHelper;", "toDoubleArray",
+                "(Lweka/core/Instances;[IZ)[D",
+                self.jobject, jcols, order == "C"))
+        if order == "C":
+            result = values.reshape((num_rows, num_cols))
+        else:
+            result = values.reshape((num_cols, num_rows)).T
+        if result.dtype != dtype:
+            result = result.astype(dtype, order=order)
+        return result
+
+    def iter_batches(self, batch_size=10000, columns=None):
+        """
+        Iterates over the dataset in blocks of rows, retrieving each block from the JVM in bulk.
+        Yields tuples of values (rows x columns), weights and class values (None if no class set).
+        Missing values are represented by NaN.
+
+        :param batch_size: the maximum number of rows per block
+        :type batch_size: int
+        :param columns: the 0-based indices of the attributes to retrieve, None for all
+        :type columns: list
+        :return: the iterator over (values, weights, class values) tuples
+        :rtype: generator
+        """
+        if batch_size < 1:
+            raise Exception("Batch size must be at least 1, provided: " + str(batch_size))
+        if columns is None:
+            num_cols = self.num_attributes
+            jcols = None
+        else:
+            num_cols = len(columns)
+            jcols = javabridge.get_env().make_int_array(np.array(columns, dtype=np.int32))
+        class_index = self.class_index
+        jclass = None
+        if class_index > -1:
+            jclass = javabridge.get_env().make_int_array(np.array([class_index], dtype=np.int32))
+        num_rows = self.num_instances
+        for from_row in xrange(0, num_rows, batch_size):
+            num = min(batch_size, num_rows - from_row)
+            values = javabridge.get_env().get_double_array_elements(
+                javabridge.static_call(
+                    "Lweka/core/InstancesHelper;", "toDoubleArray",
+                    "(Lweka/core/Instances;[IIIZ)[D",
+                    self.jobject, jcols, from_row, num, True)).reshape((num, num_cols))
+            weights = javabridge.get_env().get_double_array_elements(
+                javabridge.static_call(
+                    "Lweka/core/InstancesHelper;", "weightsToDoubleArray",
+                    "(Lweka/core/Instances;II)[D",
+                    self.jobject, from_row, num))
+            class_values = None
+            if jclass is not None:
+                class_values = javabridge.get_env().get_double_array_elements(
+                    javabridge.static_call(
+                        "Lweka/core/InstancesHelper;", "toDoubleArray",
+                        "(Lweka/core/Instances;[IIIZ)[D",
+                        self.jobject, jclass, from_row, num, True))
+            yield values, weights, class_values
 
     @property
     def num_instances(self):
@@ -241,6 +389,7 @@ class Instances(JavaObject):
         :param index: the 0-based index where to add the Instance
         :type index: int
         """
+        self._stats_cache = None
         if index is None:
             self.__append_instance(inst.jobject)
         else:
@@ -257,6 +406,7 @@ class Instances(JavaObject):
         :return: the instance
         :rtype: Instance
         """
+        self._stats_cache = None
         return Instance(
             self.__set_instance(index, inst.jobject))
             
@@ -267,6 +417,7 @@ class Instances(JavaObject):
         :param index: the 0-based index of the instance to remove
         :type index: int
         """
+        self._stats_cache = None
         if index is None:
             javabridge.call(self.jobject, "delete", "()V")
         else:
@@ -279,6 +430,7 @@ class Instances(JavaObject):
         :param index: the 0-based index of the attribute to remove
         :type index: int
         """
+        self._stats_cache = None
         javabridge.call(self.jobject, "deleteAttributeAt", "(I)V", index)
 
     def delete_first_attribute(self):
@@ -300,6 +452,7 @@ class Instances(JavaObject):
         :param typ: the attribute type to remove, see weka.core.Attribute Javadoc
         :type typ: int
         """
+        self._stats_cache = None
         javabridge.call(self.jobject, "deleteAttributeType", "(I)V", typ)
 
     def delete_with_missing(self, index):
@@ -309,6 +462,7 @@ class Instances(JavaObject):
         :param index: the attribute index to check for missing attributes
         :type index: int
         """
+        self._stats_cache = None
         javabridge.call(self.jobject, "deleteWithMissing", "(I)V", index)
 
     def insert_attribute(self, att, index):
@@ -320,12 +474,14 @@ class Instances(JavaObject):
         :param index: the index to insert the attribute at
         :type index: int
         """
+        self._stats_cache = None
         javabridge.call(self.jobject, "insertAttributeAt", "(Lweka/core/Attribute;I)V", att.jobject, index)
 
     def compactify(self):
         """
         Compactifies the set of instances.
         """
+        self._stats_cache = None
         javabridge.call(self.jobject, "compactify", "()V")
 
     def sort(self, index):
@@ -335,6 +491,7 @@ class Instances(JavaObject):
         :param index: the index of the attribute
         :type index: int
         """
+        self._stats_cache = None
         javabridge.call(self.jobject, "sort", "(I)V", index)
 
     def randomize(self, random):
@@ -344,6 +501,7 @@ class Instances(JavaObject):
         :param random: the random number generator to use
         :type random: Random
         """
+        self._stats_cache = None
         javabridge.call(self.jobject, "randomize", "(Ljava/util/Random;)V", random.jobject)
 
     def stratify(self, folds):
@@ -353,6 +511,7 @@ class Instances(JavaObject):
         :param folds: the number of folds to perform the stratification for
         :type folds: int
         """
+        self._stats_cache = None
         javabridge.call(self.jobject, "stratify", "(I)V", folds)
 
     def train_cv(self, num_folds, fold, random=None):
@@ -392,6 +551,51 @@ class Instances(JavaObject):
             javabridge.call(self.jobject, "testCV", "(II)Lweka/core/Instances;",
                             num_folds, fold))
 
+    def cv_fold_indices(self, num_folds, seed=1):
+        """
+        Returns the row indices of the train/test folds for cross-validation, without copying the data.
+        The folds are the same as the ones that Evaluation.crossvalidate_model generates with a Random
+        object using the same seed (data gets randomized and stratified for nominal classes).
+        Use the view method to turn the indices into datasets.
+
+        :param num_folds: the number of folds of cross-validation, eg 10
+        :type num_folds: int
+        :param seed: the seed value for the randomization
+        :type seed: int
+        :return: the list of (train, test) tuples of 0-based row indices
+        :rtype: list
+        """
+        order = javabridge.get_env().get_int_array_elements(
+            javabridge.static_call(
+                "Lweka/core/InstancesHelper;", "cvFoldIndices",
+                "(Lweka/core/Instances;IJ)[I",
+                self.jobject, num_folds, seed))
+        num_rows = len(order)
+        result = []
+        for fold in xrange(num_folds):
+            num_fold = num_rows // num_folds
+            if fold < num_rows % num_folds:
+                num_fold += 1
+                offset = fold
+            else:
+                offset = num_rows % num_folds
+            first = fold * (num_rows // num_folds) + offset
+            test = order[first:first + num_fold]
+            train = np.concatenate([order[:first], order[first + num_fold:]])
+            result.append((train, test))
+        return result
+
+    def view(self, indices):
+        """
+        Returns a view on the specified rows, which only gets turned into an actual dataset when required.
+
+        :param indices: the 0-based row indices
+        :type indices: ndarray or list
+        :return: the view
+        :rtype: InstancesView
+        """
+        return InstancesView(self, indices)
+
     def equal_headers(self, inst):
         """
         Compares this dataset against the given one in terms of attributes.
@@ -500,10 +704,94 @@ class Instances(JavaObject):
         msg = inst1.equal_headers(inst2)
         if msg is not None:
             raise Exception("Cannot appent instances: " + msg)
-        result = cls.copy_instances(inst1)
-        for i in xrange(inst2.num_instances):
-            result.add_instance(inst2.get_instance(i))
-        return result
+        data = javabridge.get_env().make_object_array(2, javabridge.get_env().find_class("weka/core/Instances"))
+        javabridge.get_env().set_object_array_element(data, 0, inst1.jobject)
+        javabridge.get_env().set_object_array_element(data, 1, inst2.jobject)
+        return Instances(
+            javabridge.static_call(
+                "weka/core/InstancesHelper", "append", "([Lweka/core/Instances;)Lweka/core/Instances;", data))
+
+    @classmethod
+    def from_values(cls, header, values, labels=None, weights=None):
+        """
+        Creates a new dataset from the matrix of internal values, using the header as structure.
+        The whole matrix gets transferred to the JVM in a single call. Columns of string (or nominal)
+        attributes can be supplied as 0-based codes into label tables, which get resolved on the Java
+        side. The labels of string attributes get added to the attributes of the header.
+        Matrices allocated with weka.core.types.shared_ndarray get read by the JVM directly from the
+        memory-mapped file, without any intermediate copies.
+
+        :param header: the dataset structure to use
+        :type header: Instances
+        :param values: the internal values (rows x attributes), NaN for missing values
+        :type values: ndarray
+        :param labels: the label tables for the coded columns (0-based attribute index -> list of str)
+        :type labels: dict
+        :param weights: the weights of the rows, None for 1.0
+        :type weights: ndarray
+        :return: the generated dataset
+        :rtype: Instances
+        """
+        shared = types.is_shared_ndarray(values)
+        if not shared:
+            values = np.asarray(values, dtype=np.float64)
+        if len(values.shape) != 2:
+            raise Exception("Values must be a 2-dimensional matrix, provided: " + str(values.shape))
+        num_rows, num_cols = values.shape
+        if num_cols != header.num_attributes:
+            raise Exception(
+                "Number of columns and attributes differ: " + str(num_cols) + " != " + str(header.num_attributes))
+        jlabels = None
+        if (labels is not None) and (len(labels) > 0):
+            tables = [None] * num_cols
+            for index in labels:
+                tables[index] = labels[index]
+            jlabels = types.string_matrix_to_array(tables)
+        jweights = None
+        if weights is not None:
+            jweights = javabridge.get_env().make_double_array(np.ascontiguousarray(weights, dtype=np.float64))
+        if shared:
+            return Instances(
+                javabridge.static_call(
+                    "Lweka/core/InstancesHelper;", "fromBuffer",
+                    "(Lweka/core/Instances;Ljava/lang/String;I[D[[Ljava/lang/String;)Lweka/core/Instances;",
+                    header.jobject, values.filename, num_rows, jweights, jlabels))
+        return Instances(
+            javabridge.static_call(
+                "Lweka/core/InstancesHelper;", "fromDoubleArray",
+                "(Lweka/core/Instances;[DI[D[[Ljava/lang/String;)Lweka/core/Instances;",
+                header.jobject, javabridge.get_env().make_double_array(np.ascontiguousarray(values).ravel()),
+                num_rows, jweights, jlabels))
+
+    def to_dataframe(self):
+        """
+        Returns the dataset as pandas DataFrame, transferring the values from the JVM in a single call.
+        Nominal attributes are turned into categoricals (using the internal values as codes), date attributes
+        into datetimes and string attributes into object columns. The weights are not exported.
+
+        :return: the data frame
+        :rtype: pandas.DataFrame
+        """
+        if not pandas_available:
+            raise Exception("Pandas is not installed!")
+        values = self.to_numpy(order="F")
+        names = []
+        columns = {}
+        for i in xrange(self.num_attributes):
+            att = self.attribute(i)
+            column = values[:, i]
+            missing = np.isnan(column)
+            if att.is_nominal:
+                codes = np.where(missing, -1, column).astype(np.int64)
+                column = pd.Categorical.from_codes(codes, categories=att.values)
+            elif att.is_string:
+                labels = np.array(att.values + [None], dtype=object)
+                column = labels[np.where(missing, len(labels) - 1, column).astype(np.int64)]
+            elif att.is_date:
+                column = pd.to_datetime(column, unit="ms")
+            names.append(att.name)
+            columns[att.name] = column
+        return pd.DataFrame(columns, columns=names)
 
     def train_test_split(self, percentage, rnd=None):
         """
@@ -543,6 +831,150 @@ class Instances(JavaObject):
         return javabridge.call(inst.jobject, "toSummaryString", "()Ljava/lang/String;")
 
 
+class InstancesView(object):
+    """
+    A lightweight view on a subset of rows of a dataset (index array over the parent dataset).
+    Values get retrieved from the parent directly. The rows only get copied into an actual dataset when
+    the jobject property gets accessed, e.g., when the view gets passed to a Java learner like a
+    classifier's build_classifier method.
+    """
+
+    def __init__(self, parent, indices):
+        """
+        Initializes the view.
+
+        :param parent: the dataset to get the rows from
+        :type parent: Instances
+        :param indices: the 0-based row indices
+        :type indices: ndarray or list
+        """
+        self.parent = parent
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self._instances = None
+
+    def __len__(self):
+        """
+        Returns the number of rows in the view.
+
+        :return: the number of rows
+        :rtype: int
+        """
+        return len(self.indices)
+
+    @property
+    def num_instances(self):
+        """
+        Returns the number of rows in the view.
+
+        :return: the number of rows
+        :rtype: int
+        """
+        return len(self.indices)
+
+    @property
+    def num_attributes(self):
+        """
+        Returns the number of attributes.
+
+        :return: the number of attributes
+        :rtype: int
+        """
+        return self.parent.num_attributes
+
+    @property
+    def class_index(self):
+        """
+        Returns the class index of the parent.
+
+        :return: the class index, -1 if not set
+        :rtype: int
+        """
+        return self.parent.class_index
+
+    @property
+    def is_materialized(self):
+        """
+        Returns whether the rows have already been copied into an actual dataset.
+
+        :return: True if copied
+        :rtype: bool
+        """
+        return self._instances is not None
+
+    def get_instance(self, index):
+        """
+        Returns the Instance object at the specified location (from the parent).
+
+        :param index: the 0-based index of the row in the view
+        :type index: int
+        :return: the instance
+        :rtype: Instance
+        """
+        return self.parent.get_instance(int(self.indices[index]))
+
+    def to_numpy(self, columns=None, dtype=np.float64, order="C"):
+        """
+        Returns the internal values of the rows as 2-dimensional numpy array (rows x columns), retrieved
+        from the parent in a single call. Missing values are represented by NaN.
+
+        :param columns: the 0-based indices of the attributes to export, None for all
+        :type columns: list
+        :param dtype: the numpy data type of the matrix
+        :type dtype: type
+        :param order: the memory layout of the matrix, C (row-major) or F (column-major)
+        :type order: str
+        :return: the values as numpy matrix
+        :rtype: ndarray
+        """
+        if order not in ["C", "F"]:
+            raise Exception("Order must be either 'C' or 'F', provided: " + str(order))
+        if columns is None:
+            num_cols = self.num_attributes
+            jcols = None
+        else:
+            num_cols = len(columns)
+            jcols = javabridge.get_env().make_int_array(np.array(columns, dtype=np.int32))
+        num_rows = len(self.indices)
+        values = javabridge.get_env().get_double_array_elements(
+            javabridge.static_call(
+                "Lweka/core/InstancesHelper;", "toDoubleArray",
+                "(Lweka/core/Instances;[I[IZ)[D",
+                self.parent.jobject, jcols, javabridge.get_env().make_int_array(self.indices), order == "C"))
+        if order == "C":
+            result = values.reshape((num_rows, num_cols))
+        else:
+            result = values.reshape((num_cols, num_rows)).T
+        if result.dtype != dtype:
+            result = result.astype(dtype, order=order)
+        return result
+
+    def materialize(self):
+        """
+        Returns the rows as actual dataset, copying them on first access.
+
+        :return: the dataset
+        :rtype: Instances
+        """
+        if self._instances is None:
+            self._instances = Instances(
+                javabridge.static_call(
+                    "Lweka/core/InstancesHelper;", "subset",
+                    "(Lweka/core/Instances;[I)Lweka/core/Instances;",
+                    self.parent.jobject, javabridge.get_env().make_int_array(self.indices)))
+        return self._instances
+
+    @property
+    def jobject(self):
+        """
+        Returns the rows as weka.core.Instances object (copied on first access), allowing the view to
+        be used in place of an Instances object.
+
+        :return: the Java dataset
+        :rtype: JB_Object
+        """
+        return self.materialize().jobject
+
+
 class Instance(JavaObject):
     """
     Wrapper class for weka.core.Instance.
@@ -557,14 +989,14 @@ class Instance(JavaObject):
         """
         self.enforce_type(jobject, "weka.core.Instance")
         super(Instance, self).__init__(jobject)
-        self.__set_value = javabridge.make_call(self.jobject, "setValue", "(ID)V")
-        self.__get_value = javabridge.make_call(self.jobject, "value", "(I)D")
-        self.__set_string_value = javabridge.make_call(self.jobject, "setValue", "(ILjava/lang/String;)V")
-        self.__get_string_value = javabridge.make_call(self.jobject, "stringValue", "(I)Ljava/lang/String;")
-        self.__set_weight = javabridge.make_call(self.jobject, "setWeight", "(D)V")
-        self.__get_weight = javabridge.make_call(self.jobject, "weight", "()D")
-        self.__is_missing = javabridge.make_call(self.jobject, "isMissing", "(I)Z")
-        self.__class_index = javabridge.make_call(self.jobject, "classIndex", "()I")
+        self.__set_value = make_call(self.jobject, "weka/core/Instance", "setValue", "(ID)V")
+        self.__get_value = make_call(self.jobject, "weka/core/Instance", "value", "(I)D")
+        self.__set_string_value = make_call(self.jobject, "weka/core/Instance", "setValue", "(ILjava/lang/String;)V")
+        self.__get_string_value = make_call(self.jobject, "weka/core/Instance", "stringValue", "(I)Ljava/lang/String;")
+        self.__set_weight = make_call(self.jobject, "weka/core/Instance", "setWeight", "(D)V")
+        self.__get_weight = make_call(self.jobject, "weka/core/Instance", "weight", "()D")
+        self.__is_missing = make_call(self.jobject, "weka/core/Instance", "isMissing", "(I)Z")
+        self.__class_index = make_call(self.jobject, "weka/core/Instance", "classIndex", "()I")
 
     def __iter__(self):
         """
@@ -1492,6 +1924,27 @@ class InstanceValueIterator(object):
             raise StopIteration()
 
 
+def encode_labels(values, decode=False):
+    """
+    Dictionary-encodes the string values, the labels are stored in order of their first appearance.
+
+    :param values: the string values to encode
+    :type values: ndarray or list
+    :param decode: whether the values are bytes that need decoding (utf-8)
+    :type decode: bool
+    :return: tuple of the 0-based codes (ndarray) and the labels (list of str)
+    :rtype: tuple
+    """
+    uniques, first, codes = np.unique(np.asarray(values), return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    labels = uniques[order].tolist()
+    if decode:
+        labels = [label.decode("utf-8") for label in labels]
+    return ranks[codes], labels
+
+
 def create_instances_from_lists(x, y=None, name="data"):
     """
     Allows the generation of an Instances object from a list of lists for X and a list for Y (optional).
@@ -1541,28 +1994,24 @@ def create_instances_from_lists(x, y=None, name="data"):
         else:
             raise Exception("Only float, int, bytes and str are supported for y: " + str(type(y[0])))
 
-    result = Instances.create_instances(name, atts, len(x))
+    header = Instances.create_instances(name, atts, 0)
 
-    # add data
-    for i in xrange(len(x)):
-        values = []
-        for n in xrange(len(x[i])):
-            if type_x[n] == "N":
-                values.append(x[i][n])
-            elif type_x[n] == "B":
-                values.append(result.attribute(n).add_string_value(x[i][n].decode("utf-8")))
-            else:
-                values.append(result.attribute(n).add_string_value(x[i][n]))
-        if y is not None:
-            if type_y == "N":
-                values.append(y[i])
-            elif type_y == "B":
-                values.append(result.attribute(result.num_attributes - 1).add_string_value(y[i].decode("utf-8")))
-            else:
-                values.append(result.attribute(result.num_attributes - 1).add_string_value(y[i]))
-        result.add_instance(Instance.create_instance(values))
+    # encode data
+    values = np.empty((len(x), len(atts)), dtype=np.float64)
+    labels = {}
+    for n in xrange(len(type_x)):
+        column = [row[n] for row in x]
+        if type_x[n] == "N":
+            values[:, n] = column
+        else:
+            values[:, n], labels[n] = encode_labels(column, decode=(type_x[n] == "B"))
+    if y is not None:
+        if type_y == "N":
+            values[:, len(atts) - 1] = y
+        else:
+            values[:, len(atts) - 1], labels[len(atts) - 1] = encode_labels(y, decode=(type_y == "B"))
 
-    return result
+    return Instances.from_values(header, values, labels=labels)
 
 
 def create_instances_from_matrices(x, y=None, name="data"):
@@ -1615,27 +2064,83 @@ def create_instances_from_matrices(x, y=None, name="data"):
             type_y = "B"  # bytes
             atts.append(Attribute.create_string("y"))
 
-    result = Instances.create_instances(name, atts, len(x))
+    header = Instances.create_instances(name, atts, 0)
 
-    # add data
-    for i in xrange(len(x)):
-        values = []
-        for n in xrange(len(x[i])):
-            if type_x[n] == "N":
-                values.append(x[i][n])
-            elif type_x[n] == "S":
-                values.append(result.attribute(n).add_string_value(x[i][n]))
-            else:
-                values.append(result.attribute(n).add_string_value(x[i][n].decode("utf-8")))
-        if y is not None:
-            if type_y == "N":
-                values.append(y[i])
-            elif type_y == "S":
-                values.append(result.attribute(result.num_attributes - 1).add_string_value(y[i]))
-            else:
-                values.append(result.attribute(result.num_attributes - 1).add_string_value(y[i].decode("utf-8")))
-        result.add_instance(Instance.create_instance(values))
+    # encode data
+    values = np.empty((len(x), len(atts)), dtype=np.float64)
+    labels = {}
+    for n in xrange(len(type_x)):
+        if x.dtype.names is None:
+            column = x[:, n]
+        else:
+            column = x[x.dtype.names[n]]
+        if type_x[n] == "N":
+            values[:, n] = column
+        else:
+            values[:, n], labels[n] = encode_labels(column, decode=(type_x[n] == "B"))
+    if y is not None:
+        if type_y == "N":
+            values[:, len(atts) - 1] = y
+        else:
+            values[:, len(atts) - 1], labels[len(atts) - 1] = encode_labels(y, decode=(type_y == "B"))
+
+    return Instances.from_values(header, values, labels=labels)
+
+
+def from_dataframe(df, class_column=None, name="data"):
+    """
+    Creates a dataset from the pandas DataFrame, transferring the data to the JVM in a single call.
+    Numeric (and boolean) columns are turned into numeric attributes, categoricals into nominal attributes
+    (the codes are used directly), datetimes into date attributes and all other columns into string
+    attributes. Null values are turned into missing values.
+
+    :param df: the data frame to convert
+    :type df: pandas.DataFrame
+    :param class_column: the name of the column to use as class attribute, None for no class
+    :type class_column: str
+    :param name: the name of the dataset
+    :type name: str
+    :return: the generated dataset
+    :rtype: Instances
+    """
+    if not pandas_available:
+        raise Exception("Pandas is not installed!")
 
+    atts = []
+    values = np.empty((len(df), len(df.columns)), dtype=np.float64)
+    labels = {}
+    for i, col in enumerate(df.columns):
+        column = df[col]
+        if pd.api.types.is_categorical_dtype(column):
+            atts.append(Attribute.create_nominal(str(col), [str(c) for c in column.cat.categories]))
+            codes = column.cat.codes.values
+            values[:, i] = np.where(codes == -1, np.nan, codes)
+        elif pd.api.types.is_datetime64_any_dtype(column):
+            atts.append(Attribute.create_date(str(col)))
+            if column.dt.tz is not None:
+                column = column.dt.tz_convert(None)
+            millis = column.values.astype("datetime64[ms]").astype(np.int64)
+            values[:, i] = np.where(column.isnull().values, np.nan, millis)
+        elif pd.api.types.is_numeric_dtype(column):
+            atts.append(Attribute.create_numeric(str(col)))
+            try:
+                # nullable dtypes (Int64, boolean) hold pd.NA for missing values
+                values[:, i] = column.to_numpy(dtype=np.float64, na_value=np.nan)
+            except TypeError:
+                # pandas < 1.0 does not support na_value
+                values[:, i] = column.astype(object).where(column.notnull(), np.nan).astype(np.float64).values
+        else:
+            atts.append(Attribute.create_string(str(col)))
+            missing = column.isnull().values
+            values[:, i] = np.nan
+            if not missing.all():
+                codes, labels[i] = encode_labels(column[~missing].astype(unicode).values)
+                values[~missing, i] = codes
+
+    header = Instances.create_instances(name, atts, 0)
+    result = Instances.from_values(header, values, labels=labels)
+    if class_column is not None:
+        result.class_index = list(df.columns).index(class_column)
     return result
 
 
@@ -15,13 +15,30 @@
 # Copyright (C) 2014-2018 Fracpete (pythonwekawrapper at gmail dot com)
 
 import javabridge
+import csv
 import os
+import functools
 import glob
+import hashlib
 import logging
+import multiprocessing
+import threading
+import time
+import weakref
+import Queue
+from collections import deque
+from contextlib import contextmanager
+import weka.core.types as types
 
 
 started = None
 
+# the timings (in seconds) of the last start
+timings = {}
+
+# the running metrics samplers, stopped by stop()
+samplers = weakref.WeakSet()
+
 # logging setup
 logging.basicConfig()
 logger = logging.getLogger(__name__)
@@ -52,9 +69,127 @@ def add_system_classpath():
             javabridge.JARS.append(part)
 
 
-def start(class_path=None, bundled=True, packages=False, system_cp=False, max_heap_size=None):
+def weka_home():
     """
-    Initializes the javabridge connection (starts up the JVM).
+    Returns the Weka home directory (WEKA_HOME environment variable or $HOME/wekafiles).
+
+    :return: the directory
+    :rtype: str
+    """
+    result = os.environ.get("WEKA_HOME")
+    if result is None:
+        result = os.path.join(os.path.expanduser("~"), "wekafiles")
+    return result
+
+
+def cds_archive(class_path):
+    """
+    Returns the class-data-sharing (AppCDS) archive file for the classpath. The name of the archive
+    is derived from the classpath, the size/timestamp of its elements and JAVA_HOME. Archives are stored
+    in the "cds" directory in the Weka home directory.
+
+    :param class_path: the classpath elements
+    :type class_path: list
+    :return: the archive file
+    :rtype: str
+    """
+    h = hashlib.sha1()
+    h.update(str(os.environ.get("JAVA_HOME")))
+    for cp in class_path:
+        h.update(os.pathsep + str(cp))
+        if os.path.exists(cp):
+            stat = os.stat(cp)
+            h.update(":" + str(stat.st_size) + ":" + str(int(stat.st_mtime)))
+    return os.path.join(weka_home(), "cds", h.hexdigest() + ".jsa")
+
+
+def java_version():
+    """
+    Returns the major version of the Java installation that JAVA_HOME points to, as stated in its "release" file.
+
+    :return: the major version (e.g., 8 or 11), None if it cannot be determined
+    :rtype: int
+    """
+    java_home = os.environ.get("JAVA_HOME")
+    if java_home is None:
+        return None
+    release = os.path.join(java_home, "release")
+    if not os.path.exists(release):
+        return None
+    with open(release, "r") as f:
+        for line in f:
+            if line.startswith("JAVA_VERSION="):
+                parts = line[len("JAVA_VERSION="):].strip().strip('"').split(".")
+                try:
+                    if parts[0] == "1":
+                        return int(parts[1])
+                    return int(parts[0])
+                except (IndexError, ValueError):
+                    return None
+    return None
+
+
+def cds_args(class_path):
+    """
+    Returns the JVM arguments for class-data sharing: uses the archive for the classpath if present, otherwise
+    lets the JVM create it at exit. Requires Java 13 or later (dynamic archives), no arguments are returned
+    if JAVA_HOME points to an older Java version.
+
+    :param class_path: the classpath elements
+    :type class_path: list
+    :return: the arguments
+    :rtype: list
+    """
+    version = java_version()
+    if (version is not None) and (version < 13):
+        logger.warning("Class-data sharing requires Java 13 or later, found: " + str(version))
+        return []
+    archive = cds_archive(class_path)
+    if os.path.exists(archive):
+        logger.debug("Using CDS archive: " + archive)
+        return ["-XX:SharedArchiveFile=" + archive]
+    logger.debug("Creating CDS archive at exit: " + archive)
+    if not os.path.exists(os.path.dirname(archive)):
+        os.makedirs(os.path.dirname(archive))
+    return ["-XX:ArchiveClassesAtExit=" + archive]
+
+
+def jfr_args(jfr):
+    """
+    Returns the JVM argument for starting a Flight Recorder recording with the JVM, which gets written
+    when the JVM exits. Uses the "profile" settings by default.
+
+    :param jfr: the .jfr file to write to (str) or the options for -XX:StartFlightRecording (dict, e.g.,
+                filename, settings, duration, maxsize)
+    :type jfr: str or dict
+    :return: the argument
+    :rtype: str
+    """
+    if isinstance(jfr, dict):
+        options = dict(jfr)
+    else:
+        options = {"filename": str(jfr)}
+    if "settings" not in options:
+        options["settings"] = "profile"
+    if "dumponexit" not in options:
+        options["dumponexit"] = "true"
+    return "-XX:StartFlightRecording=" + ",".join([k + "=" + str(options[k]) for k in sorted(options.keys())])
+
+
+def start(class_path=None, bundled=True, packages=False, system_cp=False, max_heap_size=None, cds=None,
+          package_index=False, jfr=None):
+    """
+    Initializes the javabridge connection (starts up the JVM). The timings of the start (classpath,
+    vm, packages, total) are available from the module's "timings" dictionary afterwards.
+
+    With class-data sharing enabled, the JVM creates an archive of the loaded classes when it stops
+    on the first run, which gets used by subsequent starts with the same classpath (see cds_archive).
+
+    With the package index enabled, the jars of the installed packages are determined from the index
+    persisted in the packages directory (see weka.core.packages.package_index) and added to the classpath
+    directly, instead of letting Weka's package manager scan and load the packages. Package classes
+    are available by name, but package-specific registrations (e.g., GUI plugins, property files for
+    the GenericObjectEditor) do not get processed.
 
     :param class_path: the additional classpath elements to add
     :type class_path: list
@@ -66,6 +201,13 @@ def start(class_path=None, bundled=True, packages=False, system_cp=False, max_he
     :type system_cp: bool
     :param max_heap_size: the maximum heap size (-Xmx parameter, eg 512m or 4g)
     :type max_heap_size: str
+    :param cds: whether to use class-data sharing (Java 13+), None to enable via WEKA_CDS environment variable
+                (true/1/yes)
+    :type cds: bool
+    :param package_index: whether to add the jars of the installed packages via the package index
+    :type package_index: bool
+    :param jfr: the Flight Recorder recording to run for the lifetime of the JVM, None for none (see jfr_args)
+    :type jfr: str or dict
     """
     global started
 
@@ -73,6 +215,11 @@ def start(class_path=None, bundled=True, packages=False, system_cp=False, max_he
         logger.info("JVM already running, call jvm.stop() first")
         return
 
+    if cds is None:
+        cds = os.environ.get("WEKA_CDS", "").lower() in ["1", "true", "yes"]
+    timings.clear()
+    start_time = time.time()
+
     # add user-defined jars first
     if class_path is not None:
         for cp in class_path:
@@ -87,11 +234,8 @@ def start(class_path=None, bundled=True, packages=False, system_cp=False, max_he
         logger.debug("Adding system classpath")
         add_system_classpath()
 
-    logger.debug("Classpath=" + str(javabridge.JARS))
-    logger.debug("MaxHeapSize=" + ("default" if (max_heap_size is None) else max_heap_size))
-
     args = []
-    weka_home = None
+    home = None
     if packages is not None:
         if isinstance(packages, bool):
             if packages:
@@ -102,32 +246,544 @@ def start(class_path=None, bundled=True, packages=False, system_cp=False, max_he
         if isinstance(packages, str):
             if os.path.exists(packages) and os.path.isdir(packages):
                 logger.debug("Using alternative Weka home directory: " + packages)
-                weka_home = packages
+                home = packages
             else:
                 logger.warn("Invalid Weka home: " + packages)
 
+    if package_index and ((packages is True) or (home is not None)):
+        from weka.core.packages import package_index as get_package_index
+        logger.debug("Adding package jars from package index")
+        for pkge in get_package_index(home)["packages"]:
+            javabridge.JARS.extend(pkge["jars"])
+        args.append("-Dweka.packageManager.loadPackages=false")
+
+    logger.debug("Classpath=" + str(javabridge.JARS))
+    logger.debug("MaxHeapSize=" + ("default" if (max_heap_size is None) else max_heap_size))
+
+    if cds:
+        args.extend(cds_args(javabridge.JARS))
+    if jfr is not None:
+        args.append(jfr_args(jfr))
+        logger.debug("Flight Recorder: " + args[-1])
+    timings["classpath"] = time.time() - start_time
+
+    vm_time = time.time()
     javabridge.start_vm(args=args, run_headless=True, max_heap_size=max_heap_size)
     javabridge.attach()
     started = True
+    timings["vm"] = time.time() - vm_time
 
-    if weka_home is not None:
+    if home is not None:
         from weka.core.classes import Environment
         env = Environment.system_wide()
         logger.debug("Using alternative Weka home directory: " + packages)
-        env.add_variable("WEKA_HOME", weka_home)
+        env.add_variable("WEKA_HOME", home)
 
     # initialize package manager
+    packages_time = time.time()
     javabridge.static_call(
         "Lweka/core/WekaPackageManager;", "loadPackages",
         "(Z)V",
         False)
+    timings["packages"] = time.time() - packages_time
+    timings["total"] = time.time() - start_time
+    logger.debug(
+        "Startup times (s): classpath=%.3f, vm=%.3f, packages=%.3f, total=%.3f"
+        % (timings["classpath"], timings["vm"], timings["packages"], timings["total"]))
 
 
 def stop():
     """
-    Kills the JVM.
+    Stops any running metrics samplers and kills the JVM.
     """
     global started
     if started is not None:
+        for sampler in list(samplers):
+            sampler.stop()
         started = None
         javabridge.kill_vm()
+
+
+def attached(func):
+    """
+    Decorator for functions that get called from threads other than the one that started the JVM:
+    attaches the current thread to the JVM for the duration of the call (if not already attached).
+
+    :param func: the function to decorate
+    :type func: function
+    :return: the decorated function
+    :rtype: function
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if javabridge.get_env() is not None:
+            return func(*args, **kwargs)
+        javabridge.attach()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            javabridge.detach()
+    return wrapper
+
+
+def _memory_usage(usage):
+    """
+    Turns the java.lang.management.MemoryUsage object into a dictionary.
+
+    :param usage: the MemoryUsage object
+    :type usage: JB_Object
+    :return: the dictionary with init, used, committed and max (in bytes, max is -1 if undefined)
+    :rtype: dict
+    """
+    result = {}
+    for key in ["init", "used", "committed", "max"]:
+        result[key] = javabridge.call(usage, "get" + key.capitalize(), "()J")
+    return result
+
+
+def metrics():
+    """
+    Returns the current metrics of the JVM, as obtained from the java.lang.management MXBeans:
+    timestamp (seconds since epoch), uptime (msec), heap and non_heap (init, used, committed, max; in bytes),
+    gc (count and time in msec per collector), classes (currently loaded, total loaded, unloaded) and
+    threads (live, daemon, peak).
+
+    :return: the metrics
+    :rtype: dict
+    """
+    if started is None:
+        raise Exception("JVM not running, call jvm.start() first!")
+    factory = "java/lang/management/ManagementFactory"
+    result = {"timestamp": time.time()}
+
+    runtime = javabridge.static_call(factory, "getRuntimeMXBean", "()Ljava/lang/management/RuntimeMXBean;")
+    result["uptime"] = javabridge.call(runtime, "getUptime", "()J")
+
+    memory = javabridge.static_call(factory, "getMemoryMXBean", "()Ljava/lang/management/MemoryMXBean;")
+    result["heap"] = _memory_usage(
+        javabridge.call(memory, "getHeapMemoryUsage", "()Ljava/lang/management/MemoryUsage;"))
+    result["non_heap"] = _memory_usage(
+        javabridge.call(memory, "getNonHeapMemoryUsage", "()Ljava/lang/management/MemoryUsage;"))
+
+    result["gc"] = {}
+    collectors = javabridge.static_call(factory, "getGarbageCollectorMXBeans", "()Ljava/util/List;")
+    for collector in javabridge.iterate_collection(collectors):
+        name = javabridge.call(collector, "getName", "()Ljava/lang/String;")
+        result["gc"][name] = {
+            "count": javabridge.call(collector, "getCollectionCount", "()J"),
+            "time": javabridge.call(collector, "getCollectionTime", "()J"),
+        }
+
+    classes = javabridge.static_call(factory, "getClassLoadingMXBean", "()Ljava/lang/management/ClassLoadingMXBean;")
+    result["classes"] = {
+        "loaded": javabridge.call(classes, "getLoadedClassCount", "()I"),
+        "total_loaded": javabridge.call(classes, "getTotalLoadedClassCount", "()J"),
+        "unloaded": javabridge.call(classes, "getUnloadedClassCount", "()J"),
+    }
+
+    threads = javabridge.static_call(factory, "getThreadMXBean", "()Ljava/lang/management/ThreadMXBean;")
+    result["threads"] = {
+        "live": javabridge.call(threads, "getThreadCount", "()I"),
+        "daemon": javabridge.call(threads, "getDaemonThreadCount", "()I"),
+        "peak": javabridge.call(threads, "getPeakThreadCount", "()I"),
+    }
+
+    return result
+
+
+def flatten_metrics(m, prefix=""):
+    """
+    Flattens the nested metrics dictionary, using dot-separated keys (e.g., "heap.used" or "gc.PS Scavenge.time").
+
+    :param m: the metrics to flatten, as returned by the metrics() function
+    :type m: dict
+    :param prefix: the prefix for the keys
+    :type prefix: str
+    :return: the flattened metrics
+    :rtype: dict
+    """
+    result = {}
+    for key in m:
+        if isinstance(m[key], dict):
+            result.update(flatten_metrics(m[key], prefix=prefix + key + "."))
+        else:
+            result[prefix + key] = m[key]
+    return result
+
+
+def jfr_available():
+    """
+    Returns whether the Flight Recorder API (jdk.jfr) is available in the running JVM
+    (Java 11+, OpenJDK 8u262+).
+
+    :return: True if available
+    :rtype: bool
+    """
+    return javabridge.static_call("weka/core/FlightRecorderHelper", "isAvailable", "()Z")
+
+
+@contextmanager
+def profile(filename, settings="profile"):
+    """
+    Context manager that records the code executed in its block with the Flight Recorder, writing the
+    recording to the specified .jfr file when leaving the block (see jfr_summary for a summary).
+
+    :param filename: the .jfr file to write the recording to
+    :type filename: str
+    :param settings: the name of the JFR configuration to use ("default" or "profile") or the path of a .jfc file
+    :type settings: str
+    :return: the jdk.jfr.Recording object
+    :rtype: JB_Object
+    """
+    if started is None:
+        raise Exception("JVM not running, call jvm.start() first!")
+    if not jfr_available():
+        raise Exception("Flight Recorder API (jdk.jfr) not available, requires Java 11+ or OpenJDK 8u262+!")
+    if os.path.exists(settings):
+        config = javabridge.static_call(
+            "jdk/jfr/Configuration", "create", "(Ljava/nio/file/Path;)Ljdk/jfr/Configuration;",
+            javabridge.call(
+                javabridge.make_instance("java/io/File", "(Ljava/lang/String;)V", settings),
+                "toPath", "()Ljava/nio/file/Path;"))
+    else:
+        config = javabridge.static_call(
+            "jdk/jfr/Configuration", "getConfiguration", "(Ljava/lang/String;)Ljdk/jfr/Configuration;", settings)
+    recording = javabridge.make_instance("jdk/jfr/Recording", "(Ljdk/jfr/Configuration;)V", config)
+    javabridge.call(
+        recording, "setDestination", "(Ljava/nio/file/Path;)V",
+        javabridge.call(
+            javabridge.make_instance("java/io/File", "(Ljava/lang/String;)V", os.path.abspath(filename)),
+            "toPath", "()Ljava/nio/file/Path;"))
+    javabridge.call(recording, "start", "()V")
+    try:
+        yield recording
+    finally:
+        javabridge.call(recording, "stop", "()Z")
+        javabridge.call(recording, "close", "()V")
+        logger.debug("Flight Recorder recording written to: " + filename)
+
+
+def jfr_summary(filename, top=10):
+    """
+    Summarizes the Flight Recorder recording: the hot methods (execution samples per top frame) and the
+    allocation sites (allocation samples per allocated class and top frame, with the allocated bytes).
+
+    :param filename: the .jfr file to summarize
+    :type filename: str
+    :param top: the maximum number of methods/sites to return, None for all
+    :type top: int
+    :return: dictionary with lists of tuples: hot_methods (method, samples) and
+             allocation_sites (site, samples, bytes), sorted in descending order
+    :rtype: dict
+    """
+    if not os.path.exists(filename):
+        raise Exception("Recording does not exist: " + str(filename))
+    rows = javabridge.static_call(
+        "weka/core/FlightRecorderHelper", "summarize", "(Ljava/lang/String;)[[Ljava/lang/String;",
+        os.path.abspath(filename))
+    methods = []
+    allocations = []
+    for row in javabridge.get_env().get_object_array_elements(rows):
+        kind, name, count, size = types.string_array_to_list(row)
+        if kind == "method":
+            methods.append((name, int(count)))
+        else:
+            allocations.append((name, int(count), long(size)))
+    methods.sort(key=lambda x: x[1], reverse=True)
+    allocations.sort(key=lambda x: (x[2], x[1]), reverse=True)
+    if top is not None:
+        methods = methods[:top]
+        allocations = allocations[:top]
+    return {"hot_methods": methods, "allocation_sites": allocations}
+
+
+class Future(object):
+    """
+    The pending result of a job submitted to the ThreadPoolExecutor.
+    """
+
+    def __init__(self):
+        """
+        Initializes the future.
+        """
+        self._event = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def done(self):
+        """
+        Returns whether the job has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return self._event.is_set()
+
+    def exception(self, timeout=None):
+        """
+        Waits for the job to finish and returns the exception it raised.
+
+        :param timeout: the number of seconds to wait, None for waiting indefinitely
+        :type timeout: float
+        :return: the exception, None if successful
+        :rtype: Exception
+        """
+        if not self._event.wait(timeout):
+            raise Exception("Job did not finish within " + str(timeout) + " seconds!")
+        return self._exception
+
+    def result(self, timeout=None):
+        """
+        Waits for the job to finish and returns its result. Re-raises the exception of a failed job.
+
+        :param timeout: the number of seconds to wait, None for waiting indefinitely
+        :type timeout: float
+        :return: the result
+        :rtype: object
+        """
+        exception = self.exception(timeout=timeout)
+        if exception is not None:
+            raise exception
+        return self._result
+
+    def set_result(self, result):
+        """
+        Sets the result of the job.
+
+        :param result: the result
+        :type result: object
+        """
+        self._result = result
+        self._event.set()
+
+    def set_exception(self, exception):
+        """
+        Sets the exception that the job raised.
+
+        :param exception: the exception
+        :type exception: Exception
+        """
+        self._exception = exception
+        self._event.set()
+
+
+class ThreadPoolExecutor(object):
+    """
+    Executes jobs in threads that are attached to the JVM when they start and detached when they stop,
+    allowing wrapper methods to be called from the jobs, e.g., for training models concurrently (on separate
+    copies of the classifier). The JVM must have been started already.
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Starts the threads.
+
+        :param max_workers: the number of threads, None for number of cores
+        :type max_workers: int
+        """
+        if started is None:
+            raise Exception("JVM not running, call jvm.start() first!")
+        if max_workers is None:
+            max_workers = multiprocessing.cpu_count()
+        self._jobs = Queue.Queue()
+        self._threads = []
+        self._shutdown = False
+        for i in xrange(max_workers):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
+
+    def _work(self):
+        """
+        The loop of a worker thread.
+        """
+        javabridge.attach()
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                future, func, args, kwargs = job
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except Exception, e:
+                    future.set_exception(e)
+        finally:
+            javabridge.detach()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Submits the job for execution.
+
+        :param func: the function to execute
+        :type func: function
+        :param args: the arguments for the function
+        :param kwargs: the keyword arguments for the function
+        :return: the pending result
+        :rtype: Future
+        """
+        if self._shutdown:
+            raise Exception("Executor has already been shut down!")
+        future = Future()
+        self._jobs.put((future, func, args, kwargs))
+        return future
+
+    def map(self, func, *iterables):
+        """
+        Executes the function for the arguments and returns the results in the order of the arguments.
+
+        :param func: the function to execute
+        :type func: function
+        :param iterables: the iterables with the arguments (one per function argument)
+        :return: the results
+        :rtype: list
+        """
+        futures = [self.submit(func, *args) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        """
+        Stops the threads once they have processed all submitted jobs.
+
+        :param wait: whether to wait for the threads to finish
+        :type wait: bool
+        """
+        if self._shutdown:
+            return
+        self._shutdown = True
+        for i in xrange(len(self._threads)):
+            self._jobs.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class MetricsSampler(object):
+    """
+    Records the JVM metrics (see metrics()) at a fixed interval in a background thread (attached to the JVM),
+    keeping the most recent samples in a ring buffer. The GC counts and times are cumulative, i.e., pauses
+    show up as increases between consecutive samples. The JVM must have been started already, stopping
+    the JVM stops the sampler as well.
+    """
+
+    def __init__(self, interval=1.0, capacity=3600):
+        """
+        Initializes the sampler.
+
+        :param interval: the number of seconds between samples
+        :type interval: float
+        :param capacity: the maximum number of samples to keep
+        :type capacity: int
+        """
+        self.interval = interval
+        self._samples = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def running(self):
+        """
+        Returns whether the sampler is running.
+
+        :return: True if running
+        :rtype: bool
+        """
+        return (self._thread is not None) and self._thread.is_alive()
+
+    def _sample(self):
+        """
+        The loop of the sampling thread.
+        """
+        javabridge.attach()
+        try:
+            while True:
+                try:
+                    sample = metrics()
+                except Exception, e:
+                    logger.warning("Failed to obtain JVM metrics: " + str(e))
+                    break
+                with self._lock:
+                    self._samples.append(sample)
+                if self._stopped.wait(self.interval):
+                    break
+        finally:
+            javabridge.detach()
+
+    def start(self):
+        """
+        Starts sampling in the background.
+        """
+        if started is None:
+            raise Exception("JVM not running, call jvm.start() first!")
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._sample)
+        self._thread.daemon = True
+        self._thread.start()
+        samplers.add(self)
+
+    def stop(self):
+        """
+        Stops sampling and waits for the thread to finish.
+        """
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        samplers.discard(self)
+
+    def samples(self):
+        """
+        Returns the recorded samples, oldest first.
+
+        :return: the list of metrics dictionaries
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._samples)
+
+    def clear(self):
+        """
+        Removes all recorded samples.
+        """
+        with self._lock:
+            self._samples.clear()
+
+    def export(self, filename):
+        """
+        Writes the recorded samples as CSV file, one row per sample with the flattened metrics as
+        columns (see flatten_metrics).
+
+        :param filename: the file to write to
+        :type filename: str
+        :return: the number of samples written
+        :rtype: int
+        """
+        rows = [flatten_metrics(sample) for sample in self.samples()]
+        columns = set()
+        for row in rows:
+            columns.update(row.keys())
+        columns.discard("timestamp")
+        columns = ["timestamp"] + sorted(columns)
+        with open(filename, "wb") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
@@ -14,10 +14,35 @@
 # packages.py
 # Copyright (C) 2014-2015 Fracpete (pythonwekawrapper at gmail dot com)
 
+import hashlib
 import javabridge
+import json
+import logging
+import os
+import platform
+import struct
 import weka.core.jvm as jvm
 from weka.core.classes import JavaObject
 
+# logging setup
+logger = logging.getLogger(__name__)
+
+# the name of the package index file in the packages directory
+INDEX_FILE = "pww-index.json"
+
+# the file in the packages directory with the packages disabled via Weka's package manager
+DO_NOT_LOAD_FILE = "doNotLoad.ser"
+
+# the names that Java uses for the same architecture (os.arch)
+ARCH_ALIASES = [
+    ["amd64", "x86_64"],
+    ["x86", "i386", "i486", "i586", "i686"],
+    ["aarch64", "arm64"],
+]
+
+# the in-process cache of package lists
+_cache = {}
+
 
 class Package(JavaObject):
     """
@@ -208,12 +233,319 @@ class Dependency(JavaObject):
             self.jobject, "setTarget", "(Lweka/core/packageManagement/PackageConstraint;)V", constr.jobject)
 
 
+def packages_dir(home=None):
+    """
+    Returns the directory with the installed packages.
+
+    :param home: the Weka home directory, None for the default one
+    :type home: str
+    :return: the directory
+    :rtype: str
+    """
+    if home is None:
+        home = jvm.weka_home()
+    return os.path.join(home, "packages")
+
+
+def read_description(fname):
+    """
+    Reads the key-value pairs from the Description.props file of a package. Lines ending in a backslash
+    are continued on the next line, key and value are separated by the first unescaped "=" or ":".
+
+    :param fname: the file to read
+    :type fname: str
+    :return: the properties
+    :rtype: dict
+    """
+    result = {}
+    with open(fname, "r") as f:
+        lines = f.read().splitlines()
+    logical = ""
+    for line in lines:
+        line = line.lstrip()
+        if (len(logical) == 0) and ((len(line) == 0) or line.startswith("#") or line.startswith("!")):
+            continue
+        # odd number of trailing backslashes: line continues
+        if (len(line) - len(line.rstrip("\\"))) % 2 == 1:
+            logical += line[:-1]
+            continue
+        logical += line
+        escaped = False
+        for i, c in enumerate(logical):
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c in "=:":
+                result[logical[:i].strip()] = logical[i + 1:].strip()
+                break
+        logical = ""
+    return result
+
+
+def read_do_not_load(home=None):
+    """
+    Reads the names of the packages that the user disabled via Weka's package manager, stored as
+    serialized java.util.HashSet in the doNotLoad.ser file of the packages directory.
+
+    :param home: the Weka home directory, None for the default one
+    :type home: str
+    :return: the package names
+    :rtype: set
+    """
+    result = set()
+    fname = os.path.join(packages_dir(home), DO_NOT_LOAD_FILE)
+    if not os.path.exists(fname):
+        return result
+    with open(fname, "rb") as f:
+        data = f.read()
+    try:
+        # header, new object, new class descriptor
+        if data[:6] != "\xac\xed\x00\x05\x73\x72":
+            raise Exception("not a serialized object")
+        pos = 8 + struct.unpack(">H", data[6:8])[0]
+        if data[8:pos] != "java.util.HashSet":
+            raise Exception("not a java.util.HashSet: " + data[8:pos])
+        # serialVersionUID, flags, no fields, end of annotations, no superclass descriptor
+        pos += 9
+        if data[pos:pos + 4] != "\x00\x00\x78\x70":
+            raise Exception("unexpected class descriptor")
+        pos += 4
+        # block data with capacity, load factor and size
+        if data[pos] != "\x77":
+            raise Exception("block data expected")
+        pos += 2 + ord(data[pos + 1])
+        while data[pos] == "\x74":
+            length = struct.unpack(">H", data[pos + 1:pos + 3])[0]
+            result.add(data[pos + 3:pos + 3 + length].decode("utf-8"))
+            pos += 3 + length
+    except Exception, e:
+        logger.warning("Failed to read list of disabled packages " + fname + ": " + str(e))
+    return result
+
+
+def package_fingerprint(home=None):
+    """
+    Computes the fingerprint of the packages directory, based on the names and modification times of the
+    directories, description files and lib directories of the installed packages and of the list of
+    disabled packages.
+
+    :param home: the Weka home directory, None for the default one
+    :type home: str
+    :return: the fingerprint, None if no packages directory
+    :rtype: str
+    """
+    pdir = packages_dir(home)
+    if not os.path.isdir(pdir):
+        return None
+    h = hashlib.sha1()
+    if os.path.exists(os.path.join(pdir, DO_NOT_LOAD_FILE)):
+        h.update(DO_NOT_LOAD_FILE + ":" + str(os.path.getmtime(os.path.join(pdir, DO_NOT_LOAD_FILE))))
+    for name in sorted(os.listdir(pdir)):
+        path = os.path.join(pdir, name)
+        if not os.path.isdir(path):
+            continue
+        h.update(os.pathsep + name + ":" + str(os.path.getmtime(path)))
+        for sub in ["Description.props", "lib"]:
+            if os.path.exists(os.path.join(path, sub)):
+                h.update(":" + str(os.path.getmtime(os.path.join(path, sub))))
+    return h.hexdigest()
+
+
+def _split_list(value):
+    """
+    Splits the comma-separated list from a Description.props file.
+
+    :param value: the value to split, can be None
+    :type value: str
+    :return: the non-empty elements
+    :rtype: list
+    """
+    if value is None:
+        return []
+    return [x.strip() for x in value.split(",") if len(x.strip()) > 0]
+
+
+def _java_os():
+    """
+    Returns the operating system name and the aliases of the architecture, approximating the os.name and
+    os.arch system properties of Java without starting the JVM.
+
+    :return: the tuple of lower-case OS name and set of lower-case architecture names
+    :rtype: tuple
+    """
+    name = platform.system()
+    if name == "Darwin":
+        name = "Mac OS X"
+    elif name == "Windows":
+        name = "Windows " + platform.release()
+    arch = platform.machine().lower()
+    for aliases in ARCH_ALIASES:
+        if arch in aliases:
+            return name.lower(), set(aliases)
+    return name.lower(), set([arch])
+
+
+def _is_loadable(pkge):
+    """
+    Checks whether Weka would load the package from the index: it must not be disabled (via its
+    description or the package manager) and its OSName/OSArch/DoNotLoadIfEnvVarNotSet constraints must be
+    met. Constraints that require the JVM (missing classes) are not checked.
+
+    :param pkge: the package entry of the index
+    :type pkge: dict
+    :return: None if loadable, otherwise the reason
+    :rtype: str
+    """
+    if pkge["disabled"]:
+        return "disabled"
+    os_name, os_arch = _java_os()
+    if (len(pkge["os_name"]) > 0) and not any([x.lower() in os_name for x in pkge["os_name"]]):
+        return "OS " + os_name + " not in " + ", ".join(pkge["os_name"])
+    if (len(pkge["os_arch"]) > 0) and not any([x.lower() in os_arch for x in pkge["os_arch"]]):
+        return "architecture " + platform.machine() + " not in " + ", ".join(pkge["os_arch"])
+    for var in pkge["env_vars"]:
+        if var not in os.environ:
+            return "environment variable " + var + " not set"
+    return None
+
+
+def _load_order(pkgs):
+    """
+    Determines the packages that Weka would load and the order to load them in, with dependencies before
+    the packages that depend on them. Packages with dependencies that are not installed or not loadable
+    are omitted (version constraints of dependencies are not checked).
+
+    :param pkgs: the package entries of the index
+    :type pkgs: list
+    :return: the loadable package entries in load order
+    :rtype: list
+    """
+    by_name = {}
+    for pkge in pkgs:
+        reason = _is_loadable(pkge)
+        if reason is None:
+            by_name[pkge["name"]] = pkge
+        else:
+            logger.debug("Not loading package " + pkge["name"] + ": " + reason)
+
+    result = []
+    state = {}
+
+    def visit(name):
+        if name in state:
+            return state[name]
+        state[name] = True
+        for dep in by_name[name]["depends"]:
+            if (dep not in by_name) or not visit(dep):
+                logger.debug("Not loading package " + name + ": dependency " + dep + " not available")
+                state[name] = False
+                return False
+        result.append(by_name[name])
+        return True
+
+    for name in sorted(by_name.keys()):
+        visit(name)
+    return result
+
+
+def package_index(home=None, refresh=False):
+    """
+    Returns the index of the installed packages without using the JVM. The index is persisted in the
+    packages directory and only gets rebuilt when the fingerprint of the directory changes.
+    Under "installed" are all the installed packages (name, version, jars, depends, disabled, os_name,
+    os_arch, env_vars), under "packages" the ones that Weka would load, in load order.
+
+    :param home: the Weka home directory, None for the default one
+    :type home: str
+    :param refresh: whether to force rebuilding the index
+    :type refresh: bool
+    :return: the index (keys: fingerprint, installed, packages)
+    :rtype: dict
+    """
+    pdir = packages_dir(home)
+    fingerprint = package_fingerprint(home)
+    if fingerprint is None:
+        return {"fingerprint": None, "installed": [], "packages": []}
+    fname = os.path.join(pdir, INDEX_FILE)
+    index = None
+    if not refresh and os.path.exists(fname):
+        try:
+            with open(fname, "r") as f:
+                index = json.load(f)
+            if index.get("fingerprint") != fingerprint:
+                index = None
+        except Exception, e:
+            index = None
+            logger.debug("Failed to read package index " + fname + ": " + str(e))
+
+    if index is None:
+        logger.debug("Building package index: " + fname)
+        do_not_load = read_do_not_load(home)
+        installed = []
+        for name in sorted(os.listdir(pdir)):
+            path = os.path.join(pdir, name)
+            desc = os.path.join(path, "Description.props")
+            if not os.path.isfile(desc):
+                continue
+            props = read_description(desc)
+            jars = []
+            for jar in sorted(os.listdir(path)):
+                if jar.lower().endswith(".jar"):
+                    jars.append(os.path.join(path, jar))
+            for root, dirs, files in os.walk(os.path.join(path, "lib")):
+                for jar in sorted(files):
+                    if jar.lower().endswith(".jar"):
+                        jars.append(os.path.join(root, jar))
+            pkge_name = props.get("PackageName", name)
+            disabled = props.get("Disabled", props.get("Disable", "false")).lower() == "true"
+            depends = [x.split("(")[0].strip() for x in _split_list(props.get("Depends"))]
+            installed.append({
+                "name": pkge_name,
+                "version": props.get("Version"),
+                "jars": jars,
+                "depends": [x for x in depends if x != "weka"],
+                "disabled": disabled or (pkge_name in do_not_load),
+                "os_name": _split_list(props.get("OSName")),
+                "os_arch": _split_list(props.get("OSArch")),
+                "env_vars": _split_list(props.get("DoNotLoadIfEnvVarNotSet")),
+            })
+        index = {"fingerprint": fingerprint, "installed": installed}
+        try:
+            with open(fname, "w") as f:
+                json.dump(index, f, indent=2)
+        except Exception, e:
+            logger.debug("Failed to write package index " + fname + ": " + str(e))
+
+    index["packages"] = _load_order(index["installed"])
+    return index
+
+
+def clear_cache(home=None):
+    """
+    Clears the in-process cache of package lists and removes the persisted package index.
+
+    :param home: the Weka home directory, None for the default one
+    :type home: str
+    """
+    _cache.clear()
+    fname = os.path.join(packages_dir(home), INDEX_FILE)
+    if os.path.exists(fname):
+        try:
+            os.remove(fname)
+        except Exception, e:
+            logger.debug("Failed to remove package index " + fname + ": " + str(e))
+
+
 def establish_cache():
     """
     Establishes the package cache if necessary.
     """
+    if "established" in _cache:
+        return
     javabridge.static_call(
         "weka/core/WekaPackageManager", "establishCacheIfNeeded", "([Ljava/io/PrintStream;)Ljava/lang/Exception;", [])
+    _cache["established"] = True
 
 
 def refresh_cache():
@@ -223,6 +555,30 @@ def refresh_cache():
     establish_cache()
     javabridge.static_call(
         "weka/core/WekaPackageManager", "refreshCache", "([Ljava/io/PrintStream;)Ljava/lang/Exception;", [])
+    clear_cache()
+    _cache["established"] = True
+
+
+def _list_packages(method):
+    """
+    Returns the packages obtained from the static method of the WekaPackageManager. The lists get
+    cached in-process until packages get installed/uninstalled or the cache gets refreshed.
+
+    :param method: the name of the method to call
+    :type method: str
+    :return: the list of packages
+    :rtype: list
+    """
+    if method not in _cache:
+        establish_cache()
+        result = []
+        pkgs = javabridge.get_collection_wrapper(
+            javabridge.static_call(
+                "weka/core/WekaPackageManager", method, "()Ljava/util/List;"))
+        for pkge in pkgs:
+            result.append(Package(pkge))
+        _cache[method] = result
+    return list(_cache[method])
 
 
 def all_packages():
@@ -232,14 +588,7 @@ def all_packages():
     :return: the list of packages
     :rtype: list
     """
-    establish_cache()
-    result = []
-    pkgs = javabridge.get_collection_wrapper(
-        javabridge.static_call(
-            "weka/core/WekaPackageManager", "getAllPackages", "()Ljava/util/List;"))
-    for pkge in pkgs:
-        result.append(Package(pkge))
-    return result
+    return _list_packages("getAllPackages")
 
 
 def available_packages():
@@ -249,14 +598,7 @@ def available_packages():
     :return: the list of packages
     :rtype: list
     """
-    establish_cache()
-    result = []
-    pkgs = javabridge.get_collection_wrapper(
-        javabridge.static_call(
-            "weka/core/WekaPackageManager", "getAvailablePackages", "()Ljava/util/List;"))
-    for pkge in pkgs:
-        result.append(Package(pkge))
-    return result
+    return _list_packages("getAvailablePackages")
 
 
 def installed_packages():
@@ -266,14 +608,7 @@ def installed_packages():
     :return: the list of packages
     :rtype: list
     """
-    establish_cache()
-    result = []
-    pkgs = javabridge.get_collection_wrapper(
-        javabridge.static_call(
-            "weka/core/WekaPackageManager", "getInstalledPackages", "()Ljava/util/List;"))
-    for pkge in pkgs:
-        result.append(Package(pkge))
-    return result
+    return _list_packages("getInstalledPackages")
 
 
 def install_package(pkge, version="Latest"):
@@ -288,20 +623,23 @@ def install_package(pkge, version="Latest"):
     :rtype: bool
     """
     establish_cache()
-    if pkge.startswith("http://") or pkge.startswith("https://"):
-        url = javabridge.make_instance(
-            "java/net/URL", "(Ljava/lang/String;)V", javabridge.get_env().new_string_utf(pkge))
-        return not javabridge.static_call(
-            "weka/core/WekaPackageManager", "installPackageFromURL",
-            "(Ljava/net/URL;[Ljava/io/PrintStream;)Ljava/lang/String;", url, []) is None
-    elif pkge.lower().endswith(".zip"):
-        return not javabridge.static_call(
-            "weka/core/WekaPackageManager", "installPackageFromArchive",
-            "(Ljava/lang/String;[Ljava/io/PrintStream;)Ljava/lang/String;", pkge, []) is None
-    else:
-        return javabridge.static_call(
-            "weka/core/WekaPackageManager", "installPackageFromRepository",
-            "(Ljava/lang/String;Ljava/lang/String;[Ljava/io/PrintStream;)Z", pkge, version, [])
+    try:
+        if pkge.startswith("http://") or pkge.startswith("https://"):
+            url = javabridge.make_instance(
+                "java/net/URL", "(Ljava/lang/String;)V", javabridge.get_env().new_string_utf(pkge))
+            return not javabridge.static_call(
+                "weka/core/WekaPackageManager", "installPackageFromURL",
+                "(Ljava/net/URL;[Ljava/io/PrintStream;)Ljava/lang/String;", url, []) is None
+        elif pkge.lower().endswith(".zip"):
+            return not javabridge.static_call(
+                "weka/core/WekaPackageManager", "installPackageFromArchive",
+                "(Ljava/lang/String;[Ljava/io/PrintStream;)Ljava/lang/String;", pkge, []) is None
+        else:
+            return javabridge.static_call(
+                "weka/core/WekaPackageManager", "installPackageFromRepository",
+                "(Ljava/lang/String;Ljava/lang/String;[Ljava/io/PrintStream;)Z", pkge, version, [])
+    finally:
+        clear_cache()
 
 
 def uninstall_package(name):
@@ -314,9 +652,12 @@ def uninstall_package(name):
     :rtype: bool
     """
     establish_cache()
-    javabridge.static_call(
-        "weka/core/WekaPackageManager", "uninstallPackage",
-        "(Ljava/lang/String;Z[Ljava/io/PrintStream;)V", name, True, [])
+    try:
+        javabridge.static_call(
+            "weka/core/WekaPackageManager", "uninstallPackage",
+            "(Ljava/lang/String;Z[Ljava/io/PrintStream;)V", name, True, [])
+    finally:
+        clear_cache()
 
 
 def is_installed(name):
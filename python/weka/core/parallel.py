@@ -0,0 +1,423 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# parallel.py
+# Copyright (C) 2019 Fracpete (pythonwekawrapper at gmail dot com)
+
+import cPickle as pickle
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import Queue
+from collections import deque
+
+# logging setup
+logger = logging.getLogger(__name__)
+
+
+class Worker(object):
+    """
+    Manages a single worker process, which runs its own JVM. Jobs and results get exchanged as pickled
+    objects via the stdin/stdout pipes of the process.
+    """
+
+    def __init__(self, jvm_options, results):
+        """
+        Starts the worker process.
+
+        :param jvm_options: the options for weka.core.jvm.start
+        :type jvm_options: dict
+        :param results: the queue to put the (worker, message) tuples in, message is None if the worker died
+        :type results: Queue.Queue
+        """
+        self.job = None
+        self.ready = False
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join([p for p in sys.path if len(p) > 0])
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "weka.core.parallel"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+        self._send(jvm_options)
+        self.reader = threading.Thread(target=self._read, args=(results,))
+        self.reader.daemon = True
+        self.reader.start()
+
+    def _send(self, obj):
+        """
+        Sends the object to the worker process.
+
+        :param obj: the object to send
+        :type obj: object
+        :return: whether successfully sent
+        :rtype: bool
+        """
+        try:
+            self.process.stdin.write(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+            self.process.stdin.flush()
+            return True
+        except (IOError, OSError), e:
+            logger.debug("Failed to send to worker process " + str(self.process.pid) + ": " + str(e))
+            return False
+
+    def _read(self, results):
+        """
+        Reads the results sent by the worker process until it terminates.
+
+        :param results: the queue to put the (worker, message) tuples in
+        :type results: Queue.Queue
+        """
+        try:
+            while True:
+                results.put((self, pickle.load(self.process.stdout)))
+        except Exception:
+            results.put((self, None))
+
+    def submit(self, job):
+        """
+        Sends the job (job ID, function, arguments) to the worker process.
+
+        :param job: the job to execute
+        :type job: tuple
+        """
+        self.job = job
+        self._send(job)
+
+    def stop(self, wait=5.0):
+        """
+        Stops the worker process, killing it if it doesn't terminate within the specified number of seconds.
+
+        :param wait: the number of seconds to wait
+        :type wait: float
+        """
+        if self.process.poll() is None:
+            self._send(None)
+            end = time.time() + wait
+            while (self.process.poll() is None) and (time.time() < end):
+                time.sleep(0.05)
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+
+class ProcessPool(object):
+    """
+    Executes jobs in worker processes, with each process running its own JVM (started with the same
+    options as weka.core.jvm.start). Jobs are functions plus arguments, which get pickled and therefore must
+    be defined at module level in an importable module (e.g., the job functions of this module). Weka objects
+    like models and datasets should be passed as bytes (see weka.core.serialization.to_bytes/from_bytes).
+    Crashed worker processes get restarted and their job resubmitted. Results are returned in submission order.
+    Since workers are separate interpreters, the pool can be used regardless of whether the JVM is running
+    in the current process.
+    """
+
+    def __init__(self, num_workers=None, max_retries=1, class_path=None, bundled=True, packages=False,
+                 system_cp=False, max_heap_size=None):
+        """
+        Starts the worker processes.
+
+        :param num_workers: the number of worker processes, None for number of cores
+        :type num_workers: int
+        :param max_retries: how often to resubmit a job whose worker crashed, as well as how often each worker
+                            may fail to start up (in a row) before the pool gives up
+        :type max_retries: int
+        :param class_path: the additional classpath elements to add
+        :type class_path: list
+        :param bundled: whether to add jars from the "lib" directory
+        :type bundled: bool
+        :param packages: whether to add jars from Weka packages as well (bool) or an alternative Weka home directory (str)
+        :type packages: bool or str
+        :param system_cp: whether to add the system classpath as well
+        :type system_cp: bool
+        :param max_heap_size: the maximum heap size of each worker (-Xmx parameter, eg 512m or 4g)
+        :type max_heap_size: str
+        """
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        self.max_retries = max_retries
+        self._jvm_options = {
+            "class_path": class_path,
+            "bundled": bundled,
+            "packages": packages,
+            "system_cp": system_cp,
+            "max_heap_size": max_heap_size,
+        }
+        self._messages = Queue.Queue()
+        self._pending = deque()
+        self._submitted = []
+        self._results = {}
+        self._attempts = {}
+        self._failed_starts = 0
+        self._next_id = 0
+        self._workers = []
+        for i in xrange(num_workers):
+            self._workers.append(Worker(self._jvm_options, self._messages))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    @property
+    def num_workers(self):
+        """
+        Returns the number of worker processes.
+
+        :return: the number of workers
+        :rtype: int
+        """
+        return len(self._workers)
+
+    def _dispatch(self):
+        """
+        Hands pending jobs to idle workers.
+        """
+        for worker in self._workers:
+            if len(self._pending) == 0:
+                break
+            if worker.job is None:
+                job = self._pending.popleft()
+                self._attempts[job[0]] = self._attempts.get(job[0], 0) + 1
+                worker.submit(job)
+
+    def _process(self):
+        """
+        Waits for the next message from the workers and processes it, restarting crashed workers.
+        """
+        worker, msg = self._messages.get()
+        if worker not in self._workers:
+            return
+
+        if msg is None:
+            index = self._workers.index(worker)
+            job = worker.job
+            logger.warning("Worker process " + str(worker.process.pid) + " died, restarting")
+            worker.stop(wait=0)
+            if not worker.ready:
+                # failed to start up, the job (if any) does not count as attempt
+                if job is not None:
+                    self._attempts[job[0]] -= 1
+                    self._pending.appendleft(job)
+                # every worker gets max_retries + 1 attempts at starting up
+                self._failed_starts += 1
+                if self._failed_starts >= (self.max_retries + 1) * len(self._workers):
+                    self.shutdown()
+                    raise Exception("Worker processes keep failing to start, check the JVM options!")
+            elif job is None:
+                pass
+            elif self._attempts[job[0]] > self.max_retries:
+                self._results[job[0]] = (False, "Worker process crashed " + str(self._attempts[job[0]]) + " time(s)")
+            else:
+                self._pending.appendleft(job)
+            self._workers[index] = Worker(self._jvm_options, self._messages)
+        elif msg is True:
+            worker.ready = True
+            self._failed_starts = 0
+        else:
+            job_id, success, value = msg
+            worker.job = None
+            self._results[job_id] = (success, value)
+
+        self._dispatch()
+
+    def submit(self, func, *args):
+        """
+        Submits the job for execution.
+
+        :param func: the module-level function to execute
+        :type func: function
+        :param args: the arguments for the function (must be picklable)
+        :return: the ID of the job
+        :rtype: int
+        """
+        if len(self._workers) == 0:
+            raise Exception("Pool has already been shut down!")
+        job_id = self._next_id
+        self._next_id += 1
+        self._pending.append((job_id, func, args))
+        self._submitted.append(job_id)
+        self._dispatch()
+        return job_id
+
+    def results(self):
+        """
+        Waits for all the submitted jobs to finish and returns their results in submission order.
+        Raises an exception if any of the jobs failed.
+
+        :return: the results
+        :rtype: list
+        """
+        while len([job_id for job_id in self._submitted if job_id not in self._results]) > 0:
+            self._process()
+        results = [self._results.pop(job_id) for job_id in self._submitted]
+        for job_id in self._submitted:
+            self._attempts.pop(job_id, None)
+        failed = [(self._submitted[i], results[i][1]) for i in xrange(len(results)) if not results[i][0]]
+        self._submitted = []
+        if len(failed) > 0:
+            raise Exception("Job #" + str(failed[0][0]) + " failed:\n" + failed[0][1])
+        return [result[1] for result in results]
+
+    def map(self, func, iterable):
+        """
+        Executes the function for each of the arguments (tuples get expanded) and returns the results
+        in the order of the arguments.
+
+        :param func: the module-level function to execute
+        :type func: function
+        :param iterable: the arguments
+        :type iterable: iterable
+        :return: the results
+        :rtype: list
+        """
+        for args in iterable:
+            if isinstance(args, tuple):
+                self.submit(func, *args)
+            else:
+                self.submit(func, args)
+        return self.results()
+
+    def shutdown(self):
+        """
+        Stops all the worker processes.
+        """
+        workers = self._workers
+        self._workers = []
+        for worker in workers:
+            worker.stop()
+
+
+def build_classifier(classname, options, data):
+    """
+    Job for building a classifier.
+
+    :param classname: the classname of the classifier
+    :type classname: str
+    :param options: the options for the classifier
+    :type options: list
+    :param data: the serialized training data
+    :type data: str
+    :return: the serialized model
+    :rtype: str
+    """
+    import weka.core.serialization as serialization
+    from weka.classifiers import Classifier
+    from weka.core.dataset import Instances
+    cls = Classifier(classname=classname, options=options)
+    cls.build_classifier(Instances(serialization.from_bytes(data)))
+    return serialization.to_bytes(cls)
+
+
+def classify_instances(model, data):
+    """
+    Job for making predictions with a model.
+
+    :param model: the serialized classifier
+    :type model: str
+    :param data: the serialized data to make predictions for
+    :type data: str
+    :return: the classifications
+    :rtype: ndarray
+    """
+    import weka.core.serialization as serialization
+    from weka.classifiers import Classifier
+    from weka.core.dataset import Instances
+    cls = Classifier(jobject=serialization.from_bytes(model))
+    return cls.classify_instances(Instances(serialization.from_bytes(data)))
+
+
+def distributions_for_instances(model, data):
+    """
+    Job for obtaining class distributions from a model.
+
+    :param model: the serialized classifier
+    :type model: str
+    :param data: the serialized data to make predictions for
+    :type data: str
+    :return: the class distributions
+    :rtype: ndarray
+    """
+    import weka.core.serialization as serialization
+    from weka.classifiers import Classifier
+    from weka.core.dataset import Instances
+    cls = Classifier(jobject=serialization.from_bytes(model))
+    return cls.distributions_for_instances(Instances(serialization.from_bytes(data)))
+
+
+def evaluate_model(model, header, data):
+    """
+    Job for evaluating a model on a shard of the test data. The resulting evaluations can be merged
+    with weka.classifiers.Evaluation.merge.
+
+    :param model: the serialized classifier
+    :type model: str
+    :param header: the serialized data to initialize the evaluation (priors) with
+    :type header: str
+    :param data: the serialized test data
+    :type data: str
+    :return: the serialized evaluation
+    :rtype: str
+    """
+    import weka.core.serialization as serialization
+    from weka.classifiers import Classifier, Evaluation
+    from weka.core.dataset import Instances
+    cls = Classifier(jobject=serialization.from_bytes(model))
+    evl = Evaluation(Instances(serialization.from_bytes(header)))
+    evl.test_model(cls, Instances(serialization.from_bytes(data)))
+    return evl.serialize()
+
+
+def worker_main():
+    """
+    The main loop of a worker process: starts the JVM with the options received first and then executes
+    jobs until it receives None.
+    """
+    # keep the pipe to the pool for the results, any other output (e.g., from Java) goes to stderr
+    results = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    jobs = os.fdopen(sys.stdin.fileno(), "rb")
+    # the pickles are binary, no newline translation on Windows
+    if sys.platform == "win32":
+        import msvcrt
+        msvcrt.setmode(jobs.fileno(), os.O_BINARY)
+        msvcrt.setmode(results.fileno(), os.O_BINARY)
+
+    import weka.core.jvm as jvm
+    jvm.start(**pickle.load(jobs))
+    try:
+        # signal successful start
+        results.write(pickle.dumps(True, pickle.HIGHEST_PROTOCOL))
+        results.flush()
+        while True:
+            job = pickle.load(jobs)
+            if job is None:
+                break
+            job_id, func, args = job
+            try:
+                msg = pickle.dumps((job_id, True, func(*args)), pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                msg = pickle.dumps((job_id, False, traceback.format_exc()), pickle.HIGHEST_PROTOCOL)
+            results.write(msg)
+            results.flush()
+    finally:
+        jvm.stop()
+
+
+if __name__ == "__main__":
+    worker_main()
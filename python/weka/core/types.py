@@ -14,13 +14,23 @@
 # types.py
 # Copyright (C) 2014-2015 Fracpete (pythonwekawrapper at gmail dot com)
 
+import atexit
+import gc
 import javabridge
 import logging
 import numpy
+import os
+import tempfile
 
 # logging setup
 logger = logging.getLogger(__name__)
 
+# the files backing shared buffers that have not been removed yet
+_shared_files = set()
+
+# the files backing shared buffers whose removal failed (still mapped), retried later
+_pending_removal = set()
+
 
 def string_array_to_list(a):
     """
@@ -54,6 +64,23 @@ def string_list_to_array(l):
     return result
 
 
+def string_matrix_to_array(m):
+    """
+    Turns a list of Python unicode string lists into a Java 2-dimensional String array.
+    None elements in the outer list result in null rows.
+
+    :param m: the list of string lists
+    :type m: list
+    :return: the java string matrix
+    :rtype: JB_Object
+    """
+    result = javabridge.get_env().make_object_array(len(m), javabridge.get_env().find_class("[Ljava/lang/String;"))
+    for i in xrange(len(m)):
+        if m[i] is not None:
+            javabridge.get_env().set_object_array_element(result, i, string_list_to_array(m[i]))
+    return result
+
+
 def double_matrix_to_ndarray(m):
     """
     Turns the Java matrix (2-dim array) of doubles into a numpy 2-dim array.
@@ -65,19 +92,129 @@ def double_matrix_to_ndarray(m):
     """
     rows = javabridge.get_env().get_object_array_elements(m)
     num_rows = len(rows)
+    if num_rows == 0:
+        return numpy.zeros((0, 0))
     num_cols = javabridge.get_env().get_array_length(rows[0])
-    result = numpy.zeros(num_rows * num_cols).reshape((num_rows, num_cols))
-    i = 0
-    for row in rows:
-        elements = javabridge.get_env().get_double_array_elements(row)
-        n = 0
-        for element in elements:
-            result[i][n] = element
-            n += 1
-        i += 1
+    result = numpy.empty((num_rows, num_cols))
+    for i in xrange(num_rows):
+        result[i, :] = javabridge.get_env().get_double_array_elements(rows[i])
+    return result
+
+
+def shared_dir():
+    """
+    Returns the directory for storing the files that back shared buffers. Uses /dev/shm if available
+    (memory only), otherwise the temp directory. Can be overridden with the WEKA_SHARED_DIR environment variable.
+
+    :return: the directory
+    :rtype: str
+    """
+    result = os.environ.get("WEKA_SHARED_DIR")
+    if result is None:
+        if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+            result = "/dev/shm"
+        else:
+            result = tempfile.gettempdir()
+    return result
+
+
+def shared_file():
+    """
+    Creates a new (empty) file for backing a shared buffer. Files that could not be removed earlier get
+    removed first, if no longer in use.
+
+    :return: the filename
+    :rtype: str
+    """
+    for fname in list(_pending_removal):
+        remove_shared_file(fname)
+    fd, result = tempfile.mkstemp(prefix="pww-", suffix=".buf", dir=shared_dir())
+    os.close(fd)
+    _shared_files.add(result)
+    return result
+
+
+def remove_shared_file(fname):
+    """
+    Removes the file that backed a shared buffer. Mappings stay valid on POSIX systems, on other systems
+    the file may still be in use. In that case, removal gets retried with the next shared_file call and
+    at exit (see remove_shared_files).
+
+    :param fname: the file to remove
+    :type fname: str
+    :return: whether the file got removed
+    :rtype: bool
+    """
+    try:
+        if os.path.exists(fname):
+            os.remove(fname)
+        _shared_files.discard(fname)
+        _pending_removal.discard(fname)
+        return True
+    except OSError, e:
+        _pending_removal.add(fname)
+        logger.debug("Failed to remove shared buffer file, retrying later: " + fname + "\n" + str(e))
+        return False
+
+
+def remove_shared_files():
+    """
+    Removes all the files backing shared buffers that were created by this process and not removed yet.
+    Gets called automatically at exit.
+
+    :return: the number of files that could not be removed
+    :rtype: int
+    """
+    gc.collect()
+    result = 0
+    for fname in list(_shared_files | _pending_removal):
+        if not remove_shared_file(fname):
+            result += 1
     return result
 
 
+atexit.register(remove_shared_files)
+
+
+def shared_ndarray(shape):
+    """
+    Allocates a 2-dim numpy array of doubles (row-major, native byte order) that is backed by a memory-mapped
+    file, which the JVM can map as well. Filling such an array and handing it to
+    weka.core.dataset.Instances.from_values avoids any copies of the matrix on the way into the JVM.
+    Once no longer needed, the backing file (attribute "filename") should be removed via remove_shared_file,
+    otherwise it gets removed at exit.
+
+    :param shape: the shape of the array (rows, columns)
+    :type shape: tuple
+    :return: the array
+    :rtype: numpy.memmap
+    """
+    fname = shared_file()
+    if (shape[0] * shape[1]) == 0:
+        remove_shared_file(fname)
+        return numpy.zeros(shape)
+    return numpy.memmap(fname, dtype=numpy.float64, mode="w+", shape=shape, order="C")
+
+
+def is_shared_ndarray(a):
+    """
+    Checks whether the array is a memory-mapped array that the JVM can map directly, i.e., a complete
+    file of doubles in native byte order and row-major layout.
+
+    :param a: the array to check
+    :type a: ndarray
+    :return: True if it can be shared
+    :rtype: bool
+    """
+    if not isinstance(a, numpy.memmap):
+        return False
+    if (a.filename is None) or (a.offset != 0) or (a.dtype != numpy.float64):
+        return False
+    if not a.dtype.isnative or not a.flags["C_CONTIGUOUS"]:
+        return False
+    return os.path.getsize(a.filename) == a.nbytes
+
+
 def enumeration_to_list(enm):
     """
     Turns the java.util.Enumeration into a list.
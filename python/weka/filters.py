@@ -22,7 +22,7 @@ import argparse
 import traceback
 import weka.core.jvm as jvm
 import weka.core.serialization as serialization
-from weka.core.classes import OptionHandler, join_options
+from weka.core.classes import OptionHandler, join_options, make_call
 from weka.core.capabilities import Capabilities
 from weka.core.converters import Loader
 from weka.core.converters import Saver
@@ -56,10 +56,10 @@ class Filter(OptionHandler):
             jobject = Filter.new_instance(classname)
         self.enforce_type(jobject, "weka.filters.Filter")
         super(Filter, self).__init__(jobject=jobject, options=options)
-        self.__input = javabridge.make_call(self.jobject, "input", "(Lweka/core/Instance;)Z")
-        self.__batchfinished = javabridge.make_call(self.jobject, "batchFinished", "()Z")
-        self.__output = javabridge.make_call(self.jobject, "output", "()Lweka/core/Instance;")
-        self.__outputformat = javabridge.make_call(self.jobject, "getOutputFormat", "()Lweka/core/Instances;")
+        self.__input = make_call(self.jobject, "weka/filters/Filter", "input", "(Lweka/core/Instance;)Z")
+        self.__batchfinished = make_call(self.jobject, "weka/filters/Filter", "batchFinished", "()Z")
+        self.__output = make_call(self.jobject, "weka/filters/Filter", "output", "()Lweka/core/Instance;")
+        self.__outputformat = make_call(self.jobject, "weka/filters/Filter", "getOutputFormat", "()Lweka/core/Instances;")
 
     def capabilities(self):
         """
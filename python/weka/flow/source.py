@@ -20,7 +20,7 @@ import re
 from weka.core.classes import to_commandline, from_commandline
 import weka.flow.base as base
 from weka.flow.base import Actor, OutputProducer, Token
-from weka.core.database import InstanceQuery
+from weka.core.database import InstanceQuery, shared_pool
 import weka.datagenerators as datagen
 
 
@@ -457,7 +457,7 @@ class LoadDatabase(Source):
         :return: the description
         :rtype: str
         """
-        return "Loads a dataset from a database using a supplied SQL query."
+        return "Loads a dataset from a database using a supplied SQL query. Either all at once or in chunks."
 
     @property
     def quickinfo(self):
@@ -515,6 +515,25 @@ class LoadDatabase(Source):
         if opt not in self.help:
             self.help[opt] = "Custom properties filename (str)."
 
+        opt = "chunk_size"
+        if opt not in options:
+            options[opt] = 0
+        if opt not in self.help:
+            self.help[opt] = "The number of rows per output dataset, retrieves all at once if less than 1 (int)."
+
+        opt = "fetch_size"
+        if opt not in options:
+            options[opt] = 1000
+        if opt not in self.help:
+            self.help[opt] = "The JDBC fetch size when retrieving the data in chunks (int)."
+
+        opt = "pooled"
+        if opt not in options:
+            options[opt] = True
+        if opt not in self.help:
+            self.help[opt] = "Whether to use connections from the pool shared by all actors rather than " \
+                             "connecting for each execution (bool)."
+
         return super(LoadDatabase, self).fix_config(options)
 
     def do_execute(self):
@@ -525,17 +544,98 @@ class LoadDatabase(Source):
         :rtype: str
         """
         iquery = InstanceQuery()
-        iquery.db_url = str(self.resolve_option("db_url"))
-        iquery.user = str(self.resolve_option("user"))
-        iquery.password = str(self.resolve_option("password"))
         props = str(self.resolve_option("custom_props"))
         if (len(props) > 0) and os.path.isfile(props):
             iquery.custom_properties = props
+        iquery.db_url = str(self.resolve_option("db_url"))
+        iquery.user = str(self.resolve_option("user"))
+        iquery.password = str(self.resolve_option("password"))
         iquery.query = str(self.resolve_option("query"))
-        data = iquery.retrieve_instances()
-        self._output.append(Token(data))
+        iquery.sparse_data = bool(self.resolve_option("sparse"))
+        chunk_size = int(self.resolve_option("chunk_size"))
+        pooled = bool(self.resolve_option("pooled"))
+        if chunk_size < 1:
+            if pooled:
+                with shared_pool().connection(iquery):
+                    data = iquery.retrieve_instances()
+            else:
+                data = iquery.retrieve_instances()
+            self._output.append(Token(data))
+        else:
+            self._iterator = self._retrieve_chunks(
+                iquery, chunk_size, int(self.resolve_option("fetch_size")), pooled)
         return None
 
+    def _retrieve_chunks(self, iquery, chunk_size, fetch_size, pooled):
+        """
+        Retrieves the data in chunks, using a pooled connection if required (released once all chunks
+        have been retrieved or the iteration gets abandoned).
+
+        :param iquery: the query to execute
+        :type iquery: InstanceQuery
+        :param chunk_size: the maximum number of rows per chunk
+        :type chunk_size: int
+        :param fetch_size: the JDBC fetch size
+        :type fetch_size: int
+        :param pooled: whether to use a pooled connection
+        :type pooled: bool
+        :return: the chunks
+        :rtype: generator
+        """
+        if pooled:
+            shared_pool().acquire(iquery)
+        try:
+            for chunk in iquery.retrieve_chunks(chunk_size=chunk_size, fetch_size=fetch_size):
+                yield chunk
+        finally:
+            if pooled:
+                shared_pool().release(iquery)
+
+    def has_output(self):
+        """
+        Checks whether any output tokens are present.
+
+        :return: true if at least one output token present
+        :rtype: bool
+        """
+        return super(LoadDatabase, self).has_output() or (self._iterator is not None)
+
+    def output(self):
+        """
+        Returns the next available output token.
+
+        :return: the next token, None if none available
+        :rtype: Token
+        """
+        if self._iterator is not None:
+            try:
+                data = self._iterator.next()
+                result = Token(data)
+            except StopIteration:
+                self._iterator = None
+                result = None
+            except Exception, e:
+                self._iterator = None
+                self.logger.error("Failed to retrieve data: " + str(e))
+                raise
+        else:
+            result = super(LoadDatabase, self).output()
+        return result
+
+    def stop_execution(self):
+        """
+        Triggers the stopping of the object.
+        """
+        super(LoadDatabase, self).stop_execution()
+        self._iterator = None
+
+    def wrapup(self):
+        """
+        Finishes up after execution finishes, does not remove any graphical output.
+        """
+        self._iterator = None
+        super(LoadDatabase, self).wrapup()
+
 
 class DataGenerator(Source):
     """
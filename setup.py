@@ -65,6 +65,7 @@ setup(
     extras_require={
         'plots': ["matplotlib"],
         'graphs': ["pygraphviz", "PIL"],
+        'pandas': ["pandas"],
     },
     entry_points={
         "console_scripts": [
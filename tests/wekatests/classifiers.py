@@ -14,10 +14,12 @@
 # classifiers.py
 # Copyright (C) 2014-2016 Fracpete (pythonwekawrapper at gmail dot com)
 
+import numpy
 import unittest
 import weka.core.jvm as jvm
 import weka.core.classes as classes
 import weka.core.converters as converters
+import weka.core.dataset as dataset
 import weka.classifiers as classifiers
 import weka.filters as filters
 import wekatests.tests.weka_test as weka_test
@@ -182,6 +184,50 @@ class TestClassifiers(weka_test.WekaTest):
         self.assertEqual(len(dists), len(data), msg="number of predictions differ")
         self.assertEqual(len(dists[0]), data.class_attribute.num_values, msg="size of distribution array does not match number of classes")
 
+    def test_classify_instances(self):
+        """
+        Tests the classify_instances and distributions_for_instances methods.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("anneal.arff"))
+        self.assertIsNotNone(data)
+        data.class_is_last()
+
+        cname = "weka.classifiers.functions.SimpleLogistic"
+        cls = classifiers.Classifier(classname=cname)
+        self.assertIsNotNone(cls, msg="Failed to instantiate: " + cname)
+        cls.build_classifier(data)
+
+        preds = cls.classify_instances(data)
+        self.assertEqual(len(data), len(preds), msg="number of predictions differ")
+        dists = cls.distributions_for_instances(data)
+        self.assertEqual((len(data), data.class_attribute.num_values), dists.shape, msg="shape of distributions differs")
+        for i in [0, 10, 100]:
+            inst = data.get_instance(i)
+            self.assertEqual(cls.classify_instance(inst), preds[i], msg="prediction differs: " + str(i))
+            self.assertEqual(cls.distribution_for_instance(inst).tolist(), dists[i].tolist(), msg="distribution differs: " + str(i))
+
+        # shared buffers
+        shared = cls.classify_instances(data, shared=True)
+        self.assertIsInstance(shared, numpy.memmap, msg="should be memory-mapped")
+        self.assertEqual(preds.tolist(), shared.tolist(), msg="shared predictions differ")
+        shared = cls.distributions_for_instances(data, shared=True)
+        self.assertIsInstance(shared, numpy.memmap, msg="should be memory-mapped")
+        self.assertEqual(dists.tolist(), shared.tolist(), msg="shared distributions differ")
+
+        # numeric class
+        data = loader.load_file(self.datafile("bolts.arff"))
+        self.assertIsNotNone(data)
+        data.class_is_last()
+        cls = classifiers.Classifier(classname="weka.classifiers.functions.LinearRegression")
+        cls.build_classifier(data)
+        preds = cls.classify_instances(data)
+        dists = cls.distributions_for_instances(data)
+        self.assertEqual((len(data), 1), dists.shape, msg="shape of distributions differs")
+        self.assertEqual(preds.tolist(), dists[:, 0].tolist(), msg="predictions and distributions differ")
+        self.assertEqual(preds.tolist(), cls.classify_instances(data, shared=True).tolist(), msg="shared predictions differ")
+        self.assertEqual(dists.tolist(), cls.distributions_for_instances(data, shared=True).tolist(), msg="shared distributions differ")
+
     def test_classify_instance(self):
         """
         Tests the classify_instance method.
@@ -351,6 +397,42 @@ class TestClassifiers(weka_test.WekaTest):
         evl.crossvalidate_model(cls, data, 10, classes.Random(1), output=pout)
         self.assertGreater(len(str(pout)), 0, msg="Should have generated output")
 
+        # parallel
+        cname = "weka.classifiers.trees.J48"
+        cls = classifiers.Classifier(classname=cname)
+        self.assertIsNotNone(cls, msg="Failed to instantiate: " + cname)
+        evl = classifiers.Evaluation(data)
+        evl.crossvalidate_model(cls, data, 10, classes.Random(1))
+        evl_par = classifiers.Evaluation(data)
+        evl_par.crossvalidate_model(cls, data, 10, classes.Random(1), n_jobs=4)
+        self.assertEqual(evl.percent_correct, evl_par.percent_correct, msg="percent_correct differs")
+        self.assertEqual(evl.weighted_area_under_roc, evl_par.weighted_area_under_roc, msg="weighted_area_under_roc differs")
+        self.assertEqual(
+            [p.predicted for p in evl.predictions], [p.predicted for p in evl_par.predictions],
+            msg="predictions differ")
+
+        # metrics
+        metrics = evl.metrics()
+        self.assertEqual(evl.percent_correct, metrics["percent_correct"], msg="percent_correct differs")
+        self.assertEqual(evl.kappa, metrics["kappa"], msg="kappa differs")
+        self.assertEqual(data.class_attribute.num_values, len(metrics["precision"]), msg="number of classes differs")
+        self.assertEqual(evl.precision(1), metrics["precision"][1], msg="precision differs")
+        self.assertEqual(evl.confusion_matrix.tolist(), metrics["confusion_matrix"].tolist(), msg="confusion matrix differs")
+
+        # predictions as arrays
+        preds = evl.predictions_array()
+        self.assertEqual(data.num_instances, len(preds["actual"]), msg="number of predictions differs")
+        self.assertEqual((data.num_instances, data.class_attribute.num_values), preds["distribution"].shape, msg="shape of distributions differs")
+        pred = evl.predictions[5]
+        self.assertEqual(pred.actual, preds["actual"][5], msg="actual differs")
+        self.assertEqual(pred.predicted, preds["predicted"][5], msg="predicted differs")
+        self.assertEqual(pred.distribution.tolist(), preds["distribution"][5].tolist(), msg="distribution differs")
+        pred_data = classifiers.predictions_to_instances(data, preds)
+        self.assertEqual(data.num_instances, pred_data.num_instances, msg="number of rows differs")
+        self.assertEqual(
+            str(classifiers.predictions_to_instances(data, evl.predictions).get_instance(5)), str(pred_data.get_instance(5)),
+            msg="instances differ")
+
         # 2. numeric
         loader = converters.Loader(classname="weka.core.converters.ArffLoader")
         data = loader.load_file(self.datafile("bolts.arff"))
@@ -370,6 +452,80 @@ class TestClassifiers(weka_test.WekaTest):
         self.assertAlmostEqual(0.919, evl.correlation_coefficient, places=3, msg="correlation_coefficient differs")
         self.assertAlmostEqual(10.697, evl.error_rate, places=3, msg="error_rate differs")
 
+        # parallel cross-validation (interval and conditional density estimator statistics)
+        cls = classifiers.Classifier(classname="weka.classifiers.functions.GaussianProcesses")
+        evl = classifiers.Evaluation(data)
+        evl.crossvalidate_model(cls, data, 10, classes.Random(1))
+        evl_par = classifiers.Evaluation(data)
+        evl_par.crossvalidate_model(cls, data, 10, classes.Random(1), n_jobs=4)
+        metrics = evl.metrics()
+        metrics_par = evl_par.metrics()
+        self.assertFalse(numpy.isnan(metrics["coverage_of_test_cases_by_predicted_regions"]), msg="no coverage")
+        self.assertFalse(numpy.isnan(metrics["sf_mean_scheme_entropy"]), msg="no SF statistics")
+        self.assertEqual(sorted(metrics.keys()), sorted(metrics_par.keys()), msg="metrics differ")
+        for key in metrics:
+            self.assertTrue(
+                numpy.array_equal(metrics[key], metrics_par[key]) or numpy.isnan(metrics[key]).all() and numpy.isnan(metrics_par[key]).all(),
+                msg="metric differs: " + key)
+        preds = evl.predictions_array()
+        preds_par = evl_par.predictions_array()
+        for key in preds:
+            self.assertEqual(preds[key].tolist(), preds_par[key].tolist(), msg="predictions differ: " + key)
+
+    def test_merge_evaluation(self):
+        """
+        Tests merging of (serialized) Evaluation objects.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("anneal.arff"))
+        self.assertIsNotNone(data)
+        data.class_is_last()
+        train, test = data.train_test_split(66.0, rnd=classes.Random(1))
+        half = test.num_instances // 2
+        first = dataset.Instances.copy_instances(test, 0, half)
+        second = dataset.Instances.copy_instances(test, half, test.num_instances - half)
+
+        cls = classifiers.Classifier(classname="weka.classifiers.trees.J48")
+        cls.build_classifier(train)
+        evl = classifiers.Evaluation(train)
+        evl.test_model(cls, test)
+        evl1 = classifiers.Evaluation(train)
+        evl1.test_model(cls, first)
+        evl2 = classifiers.Evaluation(train)
+        evl2.test_model(cls, second)
+
+        evl1.merge(evl2.serialize())
+        self.assertEqual(evl.num_instances, evl1.num_instances, msg="num_instances differs")
+        self.assertEqual(evl.percent_correct, evl1.percent_correct, msg="percent_correct differs")
+        self.assertEqual(evl.confusion_matrix.tolist(), evl1.confusion_matrix.tolist(), msg="confusion matrix differs")
+        self.assertAlmostEqual(evl.mean_absolute_error, evl1.mean_absolute_error, places=6, msg="mean_absolute_error differs")
+        self.assertAlmostEqual(evl.weighted_area_under_roc, evl1.weighted_area_under_roc, places=6, msg="weighted_area_under_roc differs")
+
+    def test_thread_pool(self):
+        """
+        Tests building classifiers concurrently with the jvm.ThreadPoolExecutor class.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("anneal.arff"))
+        self.assertIsNotNone(data)
+        data.class_is_last()
+
+        def build(cname):
+            cls = classifiers.Classifier(classname=cname)
+            cls.build_classifier(data)
+            return cls
+
+        cnames = ["weka.classifiers.trees.J48", "weka.classifiers.rules.ZeroR", "weka.classifiers.functions.SMO"]
+        with jvm.ThreadPoolExecutor(max_workers=3) as executor:
+            models = executor.map(build, cnames)
+            failed = executor.submit(build, "weka.classifiers.DoesNotExist")
+        self.assertEqual(cnames, [cls.classname for cls in models], msg="order of models differs")
+        sequential = build(cnames[0])
+        self.assertEqual(
+            sequential.classify_instances(data).tolist(), models[0].classify_instances(data).tolist(),
+            msg="predictions of concurrently and sequentially built models differ")
+        self.assertIsNotNone(failed.exception(), msg="job should have failed")
+
     def test_gridsearch(self):
         """
         Tests the GridSearch class.
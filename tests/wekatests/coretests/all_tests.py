@@ -19,7 +19,11 @@ import weka.core.jvm as jvm
 import wekatests.coretests.capabilities
 import wekatests.coretests.classes
 import wekatests.coretests.converters
+import wekatests.coretests.database
 import wekatests.coretests.dataset
+import wekatests.coretests.jvm
+import wekatests.coretests.packages
+import wekatests.coretests.parallel
 import wekatests.coretests.serialization
 import wekatests.coretests.stemmers
 import wekatests.coretests.stopwords
@@ -44,7 +48,11 @@ def suite():
     result.addTests(wekatests.coretests.capabilities.suite())
     result.addTests(wekatests.coretests.classes.suite())
     result.addTests(wekatests.coretests.converters.suite())
+    result.addTests(wekatests.coretests.database.suite())
     result.addTests(wekatests.coretests.dataset.suite())
+    result.addTests(wekatests.coretests.jvm.suite())
+    result.addTests(wekatests.coretests.packages.suite())
+    result.addTests(wekatests.coretests.parallel.suite())
     result.addTests(wekatests.coretests.serialization.suite())
     result.addTests(wekatests.coretests.stemmers.suite())
     result.addTests(wekatests.coretests.stopwords.suite())
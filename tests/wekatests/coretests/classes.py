@@ -73,6 +73,26 @@ class TestClasses(weka_test.WekaTest):
         jobj = classes.JavaObject(obj)
         self.assertEqual(cls, jobj.classname, "Classname differs!")
 
+    def test_is_instance_of(self):
+        """
+        Tests the is_instance_of method.
+        """
+        obj = classes.JavaObject.new_instance("weka.classifiers.trees.J48")
+        self.assertTrue(classes.is_instance_of(obj, "weka.classifiers.Classifier"), "Should be a classifier!")
+        self.assertTrue(classes.is_instance_of(obj, "weka/classifiers/AbstractClassifier"), "Should be a classifier!")
+        self.assertFalse(classes.is_instance_of(obj, "weka.filters.Filter"), "Should not be a filter!")
+        self.assertFalse(classes.is_instance_of(obj, "weka.DoesNotExist"), "Should not be an unknown class!")
+
+    def test_make_call(self):
+        """
+        Tests the make_call method.
+        """
+        obj = classes.JavaObject.new_instance("weka.classifiers.trees.J48")
+        fn = classes.make_call(obj, "weka/classifiers/trees/J48", "getMinNumObj", "()I")
+        self.assertEqual(2, fn(), "Value differs!")
+        self.assertTrue(("weka/classifiers/trees/J48", "getMinNumObj", "()I") in classes.method_ids, "Should be cached!")
+        self.assertEqual(2, fn(), "Value differs!")
+
     def test_shallowcopy(self):
         """
         Tests the shallow_copy method.
@@ -18,6 +18,7 @@ import unittest
 import os
 import weka.core.jvm as jvm
 import weka.core.converters as converters
+import weka.core.columnar as columnar
 import wekatests.tests.weka_test as weka_test
 import numpy
 
@@ -73,6 +74,47 @@ class TestConverters(weka_test.WekaTest):
             count += 1
         self.assertEqual(898, count, msg="Number of instances differs!")
 
+    def test_iter_chunks(self):
+        """
+        Tests loading data in chunks.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        sizes = [chunk.num_instances for chunk in loader.iter_chunks(self.datafile("iris.arff"), chunk_size=40)]
+        self.assertEqual([40, 40, 40, 30], sizes, msg="chunk sizes differ")
+
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        blocks = list(loader.iter_chunks(self.datafile("iris.arff"), chunk_size=100, as_numpy=True))
+        self.assertEqual([(100, 5), (50, 5)], [block.shape for block in blocks], msg="shapes differ")
+
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        full = loader.load_file(self.datafile("reutersTop10Randomized_1perc_shortened.arff"))
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        chunks = list(loader.iter_chunks(self.datafile("reutersTop10Randomized_1perc_shortened.arff"), chunk_size=10))
+        self.assertEqual(full.num_instances, sum([chunk.num_instances for chunk in chunks]), msg="# of rows differ")
+        self.assertEqual(
+            full.get_instance(12).get_string_value(0), chunks[1].get_instance(2).get_string_value(0),
+            msg="string value differs")
+
+    def test_load_many(self):
+        """
+        Tests loading multiple files concurrently.
+        """
+        files = [self.datafile("iris.arff"), self.datafile("iris.arff"), self.datafile("iris.arff")]
+        data = converters.load_many(files, n_threads=2)
+        self.assertEqual(450, data.num_instances, msg="# of rows differ")
+        single = converters.load_any_file(self.datafile("iris.arff"))
+        self.assertEqual(str(single.get_instance(10)), str(data.get_instance(310)), msg="row differs")
+
+        files = [self.datafile("reutersTop10Randomized_1perc_shortened.arff")] * 2
+        data = converters.load_many(files, n_threads=2)
+        single = converters.load_any_file(self.datafile("reutersTop10Randomized_1perc_shortened.arff"))
+        self.assertEqual(2 * single.num_instances, data.num_instances, msg="# of rows differ")
+        self.assertEqual(
+            single.get_instance(3).get_string_value(0),
+            data.get_instance(single.num_instances + 3).get_string_value(0), msg="string value differs")
+
+        self.assertRaises(Exception, converters.load_many, [self.datafile("iris.arff"), self.datafile("anneal.arff")])
+
     def test_arff_saver(self):
         """
         Tests the Saver class using an ArffSaver.
@@ -87,6 +129,58 @@ class TestConverters(weka_test.WekaTest):
         self.assertTrue(os.path.exists(outfile), "File does not exist: " + outfile)
         self.delfile(outfile)
 
+    def test_columnar(self):
+        """
+        Tests saving/loading datasets in columnar format.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("anneal.arff"))
+        self.assertIsNotNone(data)
+        data.class_is_last()
+        outfile = self.tempfile("out" + columnar.EXTENSION)
+        self.assertTrue(converters.save_any_file(data, outfile), msg="Failed to save data!")
+        self.assertTrue(os.path.exists(outfile), "File does not exist: " + outfile)
+
+        loaded = converters.load_any_file(outfile)
+        self.assertEqual(data.num_instances, loaded.num_instances, msg="# of rows differ")
+        self.assertEqual(data.class_index, loaded.class_index, msg="class index differs")
+        self.assertIsNone(data.equal_headers(loaded), msg="headers differ")
+        self.assertEqual(str(data), str(loaded), msg="data differs")
+
+        lazy = columnar.ColumnarDataset(outfile)
+        self.assertEqual(data.num_instances, len(lazy), msg="# of rows differ")
+        self.assertEqual(data.num_attributes, lazy.num_attributes, msg="# of columns differ")
+        self.assertEqual(data.attribute(2).values, lazy.labels(2), msg="labels differ")
+        self.assertEqual(data.values(2).tolist(), lazy.column(2).tolist(), msg="nominal codes differ")
+        self.assertEqual(data.values(3).tolist(), lazy.column(data.attribute(3).name).tolist(), msg="values differ")
+        del lazy
+
+        self.delfile(outfile)
+        self.delfile(columnar.weights_file(outfile))
+        for i in xrange(data.num_attributes):
+            self.delfile(columnar.column_file(outfile, i))
+
+    def test_incremental_saver(self):
+        """
+        Tests the Saver class in incremental mode.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("iris.arff"))
+        self.assertIsNotNone(data)
+        outfile = self.tempfile("out-incremental.arff")
+        self.delfile(outfile)
+        header = data.template_instances(data, 0)
+        saver = converters.Saver(classname="weka.core.converters.ArffSaver")
+        with saver.open(outfile, header) as writer:
+            writer.write(data.get_instance(0))
+            writer.write_batch(data)
+            writer.write_batch(data.to_numpy()[0:10, :])
+        self.assertTrue(os.path.exists(outfile), "File does not exist: " + outfile)
+        loaded = loader.load_file(outfile)
+        self.assertEqual(161, loaded.num_instances, msg="# of rows differ")
+        self.assertEqual(str(data.get_instance(5)), str(loaded.get_instance(156)), msg="row differs")
+        self.delfile(outfile)
+
     def test_ndarray_to_instances(self):
         """
         Tests the ndarray_to_instances method.
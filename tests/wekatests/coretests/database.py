@@ -0,0 +1,252 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# database.py
+# Copyright (C) 2019 Fracpete (pythonwekawrapper at gmail dot com)
+
+import javabridge
+import threading
+import time
+import unittest
+import weka.core.jvm as jvm
+import weka.core.database as database
+import wekatests.tests.weka_test as weka_test
+
+# the in-memory H2 database used by the tests (the H2 JDBC driver must be on the classpath, e.g., via
+# the CLASSPATH environment variable)
+H2_URL = "jdbc:h2:mem:pww;DB_CLOSE_DELAY=-1"
+
+# the number of rows in the test table
+H2_ROWS = 25
+
+
+def h2_available():
+    """
+    Checks whether the H2 JDBC driver is available.
+
+    :return: True if available
+    :rtype: bool
+    """
+    try:
+        javabridge.class_for_name("org.h2.Driver")
+        return True
+    except Exception:
+        return False
+
+
+def h2_query(query):
+    """
+    Returns an InstanceQuery for the H2 test database, creating the test table (ID, X, S) if necessary.
+
+    :param query: the query to set
+    :type query: str
+    :return: the query object
+    :rtype: InstanceQuery
+    """
+    result = database.InstanceQuery()
+    result.db_url = H2_URL
+    result.user = "sa"
+    result.password = ""
+    result.query = query
+    javabridge.call(result.jobject, "connectToDatabase", "()V")
+    if not javabridge.call(result.jobject, "tableExists", "(Ljava/lang/String;)Z", "PWW"):
+        javabridge.call(
+            result.jobject, "execute", "(Ljava/lang/String;)Z", "CREATE TABLE PWW (ID INT, X DOUBLE, S VARCHAR(10))")
+        for i in xrange(H2_ROWS):
+            javabridge.call(
+                result.jobject, "execute", "(Ljava/lang/String;)Z",
+                "INSERT INTO PWW VALUES (" + str(i) + ", " + str(i / 2.0) + ", 's" + str(i % 3) + "')")
+    javabridge.call(result.jobject, "disconnectFromDatabase", "()V")
+    return result
+
+
+class StubConnection(object):
+    """
+    Stands in for a JDBC connection.
+    """
+
+    def __init__(self):
+        self.valid = True
+        self.closed = False
+
+
+class StubQuery(object):
+    """
+    Stands in for an InstanceQuery.
+    """
+
+    def __init__(self, db_url="jdbc:stub:db", user="user", password="secret"):
+        self.db_url = db_url
+        self.user = user
+        self.password = password
+        self.connection = None
+
+
+class StubPool(database.ConnectionPool):
+    """
+    Connection pool that manages stub connections rather than JDBC ones.
+    """
+
+    def __init__(self, max_size=4, idle_timeout=300.0, wait_timeout=None):
+        super(StubPool, self).__init__(max_size=max_size, idle_timeout=idle_timeout, wait_timeout=wait_timeout)
+        self.created = []
+
+    def _connect(self, utils):
+        utils.connection = StubConnection()
+        self.created.append(utils.connection)
+
+    def _attach(self, utils, conn):
+        utils.connection = conn
+
+    def _detach(self, utils):
+        result = utils.connection
+        utils.connection = None
+        return result
+
+    def _is_valid(self, conn):
+        return conn.valid and not conn.closed
+
+    def _close(self, conn):
+        conn.closed = True
+
+
+class TestDatabase(weka_test.WekaTest):
+
+    def test_pool_reuse(self):
+        """
+        Tests the reuse of connections by the ConnectionPool class.
+        """
+        pool = StubPool()
+        query1 = StubQuery()
+        query2 = StubQuery()
+        with pool.connection(query1):
+            conn = query1.connection
+            self.assertIsNotNone(conn, msg="no connection attached")
+            self.assertRaises(Exception, pool.acquire, query1)
+        self.assertIsNone(query1.connection, msg="connection still attached")
+        self.assertRaises(Exception, pool.release, query1)
+
+        with pool.connection(query2):
+            self.assertIs(conn, query2.connection, msg="connection not reused")
+            with pool.connection(query1):
+                self.assertIsNot(conn, query1.connection, msg="connection in use got reused")
+        self.assertEqual(2, len(pool.created), msg="number of connections differs")
+
+        # invalid connections get discarded
+        conn.valid = False
+        with pool.connection(query1):
+            self.assertIsNot(conn, query1.connection, msg="invalid connection got reused")
+        self.assertTrue(conn.closed, msg="invalid connection not closed")
+
+        pool.close()
+        for conn in pool.created:
+            self.assertTrue(conn.closed, msg="idle connection not closed")
+
+    def test_pool_key(self):
+        """
+        Tests that the ConnectionPool class only shares connections with the same credentials.
+        """
+        pool = StubPool()
+        query = StubQuery(password="secret")
+        other = StubQuery(password="other")
+        with pool.connection(query):
+            conn = query.connection
+        with pool.connection(other):
+            self.assertIsNot(conn, other.connection, msg="connection shared across passwords")
+        with pool.connection(StubQuery(user="other")):
+            pass
+        with pool.connection(StubQuery(db_url="jdbc:stub:other")):
+            pass
+        self.assertEqual(4, len(pool.created), msg="number of connections differs")
+        with pool.connection(query):
+            self.assertIs(conn, query.connection, msg="connection not reused")
+        self.assertNotIn("secret", str(pool._key(query)), msg="password stored in key")
+
+    def test_pool_expiry(self):
+        """
+        Tests the closing of idle connections by the ConnectionPool class.
+        """
+        pool = StubPool(idle_timeout=0.05)
+        query = StubQuery()
+        with pool.connection(query):
+            conn = query.connection
+        time.sleep(0.2)
+        with pool.connection(query):
+            self.assertIsNot(conn, query.connection, msg="expired connection got reused")
+        self.assertTrue(conn.closed, msg="expired connection not closed")
+
+    def test_pool_max_size(self):
+        """
+        Tests that the ConnectionPool class blocks once the maximum number of connections is in use.
+        """
+        pool = StubPool(max_size=1, wait_timeout=0.1)
+        query1 = StubQuery()
+        query2 = StubQuery()
+        pool.acquire(query1)
+        start = time.time()
+        self.assertRaises(Exception, pool.acquire, query2)
+        self.assertGreaterEqual(time.time() - start, 0.1, msg="did not wait for connection")
+
+        pool.wait_timeout = None
+        releaser = threading.Timer(0.2, pool.release, args=(query1,))
+        releaser.start()
+        start = time.time()
+        pool.acquire(query2)
+        releaser.join()
+        self.assertGreaterEqual(time.time() - start, 0.15, msg="did not block until release")
+        self.assertIs(pool.created[0], query2.connection, msg="released connection not reused")
+        self.assertEqual(1, len(pool.created), msg="maximum number of connections exceeded")
+        pool.release(query2)
+
+    def test_retrieve_chunks(self):
+        """
+        Tests the retrieve_chunks method and pooled connections (requires the H2 JDBC driver).
+        """
+        if not h2_available():
+            return
+
+        query = h2_query("SELECT * FROM PWW ORDER BY ID")
+        chunks = list(query.retrieve_chunks(chunk_size=10))
+        self.assertEqual([10, 10, 5], [chunk.num_instances for chunk in chunks], msg="chunk sizes differ")
+        self.assertEqual(3, chunks[0].num_attributes, msg="number of attributes differs")
+        self.assertTrue(chunks[0].attribute(2).is_string, msg="character column not a string attribute")
+        self.assertEqual(12.0, chunks[2].get_instance(4).get_value(1), msg="value differs")
+        self.assertEqual("s0", chunks[2].get_instance(4).get_string_value(2), msg="string differs")
+
+        rows = list(query.retrieve_chunks(chunk_size=10, incremental=True))
+        self.assertEqual(H2_ROWS, len(rows), msg="number of rows differs")
+
+        pool = database.ConnectionPool(max_size=1)
+        with pool.connection(query):
+            self.assertEqual(H2_ROWS, sum([c.num_instances for c in query.retrieve_chunks(chunk_size=10)]))
+        with pool.connection(query):
+            self.assertEqual(H2_ROWS, sum([c.num_instances for c in query.retrieve_chunks(chunk_size=100)]))
+        pool.close()
+
+        query.query = "SELECT * FROM DOES_NOT_EXIST"
+        self.assertRaises(Exception, list, query.retrieve_chunks(chunk_size=10))
+
+
+def suite():
+    """
+    Returns the test suite.
+    :return: the test suite
+    :rtype: unittest.TestSuite
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(TestDatabase)
+
+
+if __name__ == '__main__':
+    jvm.start(system_cp=True)
+    unittest.TextTestRunner().run(suite())
+    jvm.stop()
@@ -14,10 +14,15 @@
 # dataset.py
 # Copyright (C) 2014-2019 Fracpete (pythonwekawrapper at gmail dot com)
 
+import os
+import shutil
+import tempfile
 import unittest
 import weka.core.jvm as jvm
 import weka.core.dataset as dataset
 import weka.core.converters as converters
+import weka.core.types as types
+import weka.core.classes as classes
 import wekatests.tests.weka_test as weka_test
 from weka.core.dataset import create_instances_from_lists, create_instances_from_matrices
 from random import randint
@@ -96,6 +101,31 @@ class TestDataset(weka_test.WekaTest):
         self.assertAlmostEqual(3264, numstats.sum, places=3, msg="sum differs")
         self.assertAlmostEqual(180636, numstats.sumsq, places=3, msg="sumsq differs")
 
+    def test_all_attribute_stats(self):
+        """
+        Tests the all_attribute_stats method.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("anneal.arff"))
+        self.assertIsNotNone(data, msg="Failed to load data!")
+
+        stats = data.all_attribute_stats()
+        self.assertEqual(data.num_attributes, len(stats["min"]), msg="number of attributes differs")
+        self.assertEqual(8, stats["distinct"][2], msg="distinct differs")
+        self.assertEqual(0, stats["missing"][2], msg="missing differs")
+        self.assertEqual(898, stats["total"][2], msg="total differs")
+        self.assertEqual([86, 256, 440, 0, 51, 20, 10, 19, 16], stats["nominal_counts"][2].tolist(), msg="nominal_counts differs")
+        self.assertIsNone(stats["nominal_counts"][3], msg="nominal_counts should be None for numeric attribute")
+        self.assertAlmostEqual(70, stats["max"][3], places=3, msg="max differs")
+        self.assertAlmostEqual(3.635, stats["mean"][3], places=3, msg="mean differs")
+        self.assertAlmostEqual(0.0, stats["min"][3], places=3, msg="min differs")
+        self.assertAlmostEqual(13.717, stats["stddev"][3], places=3, msg="stddev differs")
+        self.assertTrue(stats is data.all_attribute_stats(), msg="stats should be cached")
+
+        data.delete(0)
+        stats = data.all_attribute_stats()
+        self.assertEqual(897, stats["total"][2], msg="cache should have been invalidated")
+
     def test_instance(self):
         """
         Tests the Instance class.
@@ -321,6 +351,205 @@ class TestDataset(weka_test.WekaTest):
         except Exception, e:
             pass
 
+    def test_to_numpy(self):
+        """
+        Tests the to_numpy method.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("iris.arff"))
+        self.assertIsNotNone(data, msg="Failed to load data!")
+
+        matrix = data.to_numpy()
+        self.assertEqual((150, 5), matrix.shape, msg="shape differs")
+        self.assertEqual(data.get_instance(0).values.tolist(), matrix[0].tolist(), msg="first row differs")
+        self.assertEqual(data.get_instance(149).values.tolist(), matrix[149].tolist(), msg="last row differs")
+
+        matrix = data.to_numpy(columns=[3, 0], order="F")
+        self.assertEqual((150, 2), matrix.shape, msg="shape differs")
+        self.assertEqual(data.get_instance(10).get_value(3), matrix[10, 0], msg="value differs")
+        self.assertEqual(data.get_instance(10).get_value(0), matrix[10, 1], msg="value differs")
+
+        values = data.values(4)
+        self.assertEqual(150, len(values), msg="number of values differs")
+        self.assertEqual(data.get_instance(120).get_value(4), values[120], msg="value differs")
+
+    def test_iter_batches(self):
+        """
+        Tests the iter_batches method.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("iris.arff"))
+        self.assertIsNotNone(data, msg="Failed to load data!")
+        data.class_is_last()
+
+        batches = list(data.iter_batches(batch_size=40, columns=[0, 2]))
+        self.assertEqual(4, len(batches), msg="number of batches differs")
+        self.assertEqual((40, 2), batches[0][0].shape, msg="shape differs")
+        self.assertEqual((30, 2), batches[3][0].shape, msg="shape differs")
+        self.assertEqual(data.get_instance(45).get_value(2), batches[1][0][5, 1], msg="value differs")
+        self.assertEqual(data.get_instance(45).weight, batches[1][1][5], msg="weight differs")
+        self.assertEqual(data.get_instance(45).get_value(4), batches[1][2][5], msg="class value differs")
+
+    def test_cv_fold_indices(self):
+        """
+        Tests the cv_fold_indices and view methods.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("iris.arff"))
+        self.assertIsNotNone(data, msg="Failed to load data!")
+        data.class_is_last()
+
+        folds = data.cv_fold_indices(10, seed=42)
+        self.assertEqual(10, len(folds), msg="number of folds differs")
+        train, test = folds[3]
+        self.assertEqual(135, len(train), msg="size of train fold differs")
+        self.assertEqual(15, len(test), msg="size of test fold differs")
+        self.assertEqual(list(range(150)), sorted(train.tolist() + test.tolist()), msg="indices differ")
+
+        copy = dataset.Instances.copy_instances(data)
+        copy.randomize(classes.Random(42))
+        copy.stratify(10)
+        test_data = copy.test_cv(10, 3)
+        view = data.view(test)
+        self.assertFalse(view.is_materialized, msg="should not be materialized")
+        self.assertEqual(test_data.to_numpy().tolist(), view.to_numpy().tolist(), msg="test fold differs")
+        self.assertEqual(str(test_data.get_instance(2)), str(view.get_instance(2)), msg="instance differs")
+        self.assertEqual(15, view.materialize().num_instances, msg="number of rows differs")
+        self.assertTrue(view.is_materialized, msg="should be materialized")
+
+    def test_from_values(self):
+        """
+        Tests the from_values method.
+        """
+        atts = []
+        atts.append(dataset.Attribute.create_numeric("num"))
+        atts.append(dataset.Attribute.create_nominal("nom", ["yes", "no"]))
+        atts.append(dataset.Attribute.create_string("str"))
+        header = dataset.Instances.create_instances("created", atts, 0)
+        values = np.array([[1.1, 0, 1], [2.2, 1, 0], [np.nan, 0, 1]])
+        labels = {1: ["no", "yes"], 2: ["hello", "world"]}
+        data = dataset.Instances.from_values(header, values, labels=labels, weights=np.array([1.0, 2.0, 3.0]))
+        self.assertEqual(3, data.num_instances, msg="num_instances differs")
+        self.assertEqual(1.1, data.get_instance(0).get_value(0), msg="numeric value differs")
+        self.assertTrue(data.get_instance(2).is_missing(0), msg="value should be missing")
+        self.assertEqual("no", data.get_instance(0).get_string_value(1), msg="nominal value differs")
+        self.assertEqual("yes", data.get_instance(1).get_string_value(1), msg="nominal value differs")
+        self.assertEqual("world", data.get_instance(0).get_string_value(2), msg="string value differs")
+        self.assertEqual("hello", data.get_instance(1).get_string_value(2), msg="string value differs")
+        self.assertEqual(3.0, data.get_instance(2).weight, msg="weight differs")
+
+    def test_dataframe(self):
+        """
+        Tests the from_dataframe and to_dataframe methods.
+        """
+        from weka.core import pandas_available
+        if not pandas_available:
+            return
+        import pandas as pd
+        df = pd.DataFrame({
+            "num": [1.1, 2.2, None],
+            "cat": pd.Categorical(["yes", "no", None], categories=["yes", "no"]),
+            "date": pd.to_datetime(["2019-01-01 12:00:00", None, "2019-03-01 08:30:00"]),
+            "str": ["hello", None, "world"],
+        }, columns=["num", "cat", "date", "str"])
+        data = dataset.from_dataframe(df, class_column="cat")
+        self.assertEqual(3, data.num_instances, msg="num_instances differs")
+        self.assertEqual(1, data.class_index, msg="class_index differs")
+        self.assertTrue(data.attribute(1).is_nominal, msg="should be nominal")
+        self.assertTrue(data.attribute(2).is_date, msg="should be date")
+        self.assertTrue(data.attribute(3).is_string, msg="should be string")
+        self.assertEqual("no", data.get_instance(1).get_string_value(1), msg="nominal value differs")
+        self.assertTrue(data.get_instance(2).is_missing(1), msg="value should be missing")
+        self.assertEqual("world", data.get_instance(2).get_string_value(3), msg="string value differs")
+
+        df2 = data.to_dataframe()
+        self.assertEqual(list(df.columns), list(df2.columns), msg="columns differ")
+        self.assertEqual(["yes", "no"], list(df2["cat"].cat.categories), msg="categories differ")
+        self.assertTrue(df["cat"].equals(df2["cat"]), msg="categorical column differs")
+        self.assertTrue(df["date"].equals(df2["date"]), msg="date column differs")
+        self.assertEqual(["hello", None, "world"], df2["str"].tolist(), msg="string column differs")
+        self.assertAlmostEqual(2.2, df2["num"][1], places=6, msg="numeric value differs")
+
+        # nullable dtypes
+        df = pd.DataFrame({
+            "int": pd.Series([1, None, 3], dtype="Int64"),
+            "bool": [True, False, True],
+        }, columns=["int", "bool"])
+        if hasattr(pd, "BooleanDtype"):
+            df["bool"] = pd.Series([True, None, False], dtype="boolean")
+        data = dataset.from_dataframe(df)
+        self.assertTrue(data.attribute(0).is_numeric, msg="should be numeric")
+        self.assertTrue(data.attribute(1).is_numeric, msg="should be numeric")
+        self.assertEqual(3.0, data.get_instance(2).get_value(0), msg="integer value differs")
+        self.assertTrue(data.get_instance(1).is_missing(0), msg="value should be missing")
+        self.assertEqual(1.0, data.get_instance(0).get_value(1), msg="boolean value differs")
+
+    def test_shared_buffers(self):
+        """
+        Tests exchanging data via shared buffers.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("iris.arff"))
+        self.assertIsNotNone(data, msg="Failed to load data!")
+
+        matrix = data.to_numpy(shared=True)
+        self.assertEqual((150, 5), matrix.shape, msg="shape differs")
+        self.assertEqual(data.to_numpy().tolist(), matrix.tolist(), msg="values differ")
+
+        values = types.shared_ndarray((150, 5))
+        values[:, :] = matrix
+        self.assertTrue(types.is_shared_ndarray(values), msg="should be shared")
+        copy = dataset.Instances.from_values(dataset.Instances.template_instances(data), values)
+        types.remove_shared_file(values.filename)
+        self.assertEqual(150, copy.num_instances, msg="num_instances differs")
+        self.assertEqual(str(data.get_instance(42)), str(copy.get_instance(42)), msg="instance differs")
+
+    def test_shared_buffers_cleanup(self):
+        """
+        Tests that no files backing shared buffers remain after exchanging data.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("iris.arff"))
+        self.assertIsNotNone(data, msg="Failed to load data!")
+
+        tmpdir = tempfile.mkdtemp()
+        env = os.environ.get("WEKA_SHARED_DIR")
+        os.environ["WEKA_SHARED_DIR"] = tmpdir
+        try:
+            matrix = data.to_numpy(shared=True)
+            values = types.shared_ndarray(matrix.shape)
+            values[:, :] = matrix
+            copy = dataset.Instances.from_values(dataset.Instances.template_instances(data), values)
+            self.assertEqual(150, copy.num_instances, msg="num_instances differs")
+            types.remove_shared_file(values.filename)
+            del matrix, values
+            self.assertEqual([], os.listdir(tmpdir), msg="files remain")
+
+            # files that cannot be removed while mapped get removed later
+            remove = os.remove
+
+            def fail(fname):
+                raise OSError("in use: " + fname)
+
+            os.remove = fail
+            try:
+                matrix = data.to_numpy(shared=True)
+            finally:
+                os.remove = remove
+            self.assertEqual(1, len(os.listdir(tmpdir)), msg="file should remain")
+            del matrix
+            values = types.shared_ndarray((2, 2))
+            self.assertEqual([os.path.basename(values.filename)], os.listdir(tmpdir), msg="pending file not removed")
+            del values
+            self.assertEqual(0, types.remove_shared_files(), msg="files not removed")
+            self.assertEqual([], os.listdir(tmpdir), msg="files remain")
+        finally:
+            if env is None:
+                del os.environ["WEKA_SHARED_DIR"]
+            else:
+                os.environ["WEKA_SHARED_DIR"] = env
+            shutil.rmtree(tmpdir)
+
     def test_create_instances_from_lists(self):
         """
         Tests the create_instances_from_lists method.
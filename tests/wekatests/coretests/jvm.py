@@ -0,0 +1,192 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# jvm.py
+# Copyright (C) 2019 Fracpete (pythonwekawrapper at gmail dot com)
+
+import csv
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import weka.core.jvm as jvm
+import weka.core.converters as converters
+import weka.classifiers as classifiers
+import wekatests.tests.weka_test as weka_test
+
+
+class TestJVM(weka_test.WekaTest):
+
+    def test_attached(self):
+        """
+        Tests calling the wrapper from a thread that is not attached to the JVM via the attached decorator.
+        """
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("anneal.arff"))
+        data.class_is_last()
+
+        @jvm.attached
+        def build():
+            cls = classifiers.Classifier(classname="weka.classifiers.trees.J48")
+            cls.build_classifier(data)
+            return cls.classify_instances(data).tolist()
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(build()))
+        thread.start()
+        thread.join()
+        self.assertEqual(1, len(results), msg="call from thread failed")
+        self.assertEqual(build(), results[0], msg="predictions differ")
+
+    def test_cds(self):
+        """
+        Tests the cds_archive and cds_args methods.
+        """
+        home = os.environ.get("WEKA_HOME")
+        tmpdir = tempfile.mkdtemp()
+        os.environ["WEKA_HOME"] = tmpdir
+        try:
+            archive = jvm.cds_archive(["a.jar", "b.jar"])
+            self.assertEqual(os.path.join(tmpdir, "cds"), os.path.dirname(archive), msg="archive directory differs")
+            self.assertTrue(archive.endswith(".jsa"), msg="archive extension differs")
+            self.assertEqual(archive, jvm.cds_archive(["a.jar", "b.jar"]), msg="archive not deterministic")
+            self.assertNotEqual(archive, jvm.cds_archive(["b.jar", "a.jar"]), msg="archive ignores classpath")
+
+            version = jvm.java_version()
+            if (version is not None) and (version < 13):
+                self.assertEqual([], jvm.cds_args(["a.jar", "b.jar"]), msg="arguments for old Java version")
+                return
+            self.assertEqual(
+                ["-XX:ArchiveClassesAtExit=" + archive], jvm.cds_args(["a.jar", "b.jar"]), msg="arguments differ")
+            self.assertTrue(os.path.isdir(os.path.dirname(archive)), msg="archive directory not created")
+            open(archive, "w").close()
+            self.assertEqual(
+                ["-XX:SharedArchiveFile=" + archive], jvm.cds_args(["a.jar", "b.jar"]), msg="arguments differ")
+        finally:
+            if home is None:
+                del os.environ["WEKA_HOME"]
+            else:
+                os.environ["WEKA_HOME"] = home
+            shutil.rmtree(tmpdir)
+
+    def test_timings(self):
+        """
+        Tests the timings of the start.
+        """
+        self.assertEqual(["classpath", "packages", "total", "vm"], sorted(jvm.timings.keys()), msg="timings differ")
+        self.assertGreaterEqual(jvm.timings["total"], jvm.timings["vm"], msg="total less than vm time")
+
+    def test_metrics(self):
+        """
+        Tests the metrics method.
+        """
+        m = jvm.metrics()
+        self.assertGreater(m["uptime"], 0, msg="uptime not positive")
+        self.assertGreater(m["heap"]["used"], 0, msg="no heap used")
+        self.assertGreaterEqual(m["heap"]["committed"], m["heap"]["used"], msg="committed less than used")
+        self.assertGreater(m["non_heap"]["used"], 0, msg="no non-heap used")
+        self.assertGreater(len(m["gc"]), 0, msg="no garbage collectors")
+        for name in m["gc"]:
+            self.assertIn("count", m["gc"][name], msg="GC count missing: " + name)
+            self.assertIn("time", m["gc"][name], msg="GC time missing: " + name)
+        self.assertGreater(m["classes"]["loaded"], 0, msg="no classes loaded")
+        self.assertGreater(m["threads"]["live"], 0, msg="no threads")
+
+        flat = jvm.flatten_metrics(m)
+        self.assertEqual(m["heap"]["used"], flat["heap.used"], msg="flattened value differs")
+
+    def test_metrics_sampler(self):
+        """
+        Tests the MetricsSampler class.
+        """
+        with jvm.MetricsSampler(interval=0.05, capacity=3) as sampler:
+            self.assertTrue(sampler.running, msg="sampler not running")
+            time.sleep(0.5)
+        self.assertFalse(sampler.running, msg="sampler still running")
+        samples = sampler.samples()
+        self.assertEqual(3, len(samples), msg="ring buffer size differs")
+        self.assertLess(samples[0]["timestamp"], samples[-1]["timestamp"], msg="samples not in order")
+
+        fd, fname = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        try:
+            self.assertEqual(3, sampler.export(fname), msg="number of exported samples differs")
+            with open(fname, "rb") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(3, len(rows), msg="number of rows differs")
+            self.assertIn("heap.used", rows[0], msg="column missing")
+        finally:
+            os.remove(fname)
+
+    def test_stop_samplers(self):
+        """
+        Tests that stopping the JVM stops running MetricsSampler instances.
+        """
+        sampler = jvm.MetricsSampler(interval=0.05)
+        sampler.start()
+        self.assertIn(sampler, jvm.samplers, msg="running sampler not registered")
+
+        # keep the JVM alive for the remaining tests
+        kill_vm = jvm.javabridge.kill_vm
+        started = jvm.started
+        jvm.javabridge.kill_vm = lambda: None
+        try:
+            jvm.stop()
+        finally:
+            jvm.javabridge.kill_vm = kill_vm
+            jvm.started = started
+        self.assertFalse(sampler.running, msg="sampler still running")
+        self.assertNotIn(sampler, jvm.samplers, msg="stopped sampler still registered")
+
+    def test_profile(self):
+        """
+        Tests the profile and jfr_summary methods.
+        """
+        self.assertTrue(jvm.jfr_args("out.jfr").startswith("-XX:StartFlightRecording="), msg="argument differs")
+        self.assertIn("settings=default", jvm.jfr_args({"filename": "out.jfr", "settings": "default"}))
+        if not jvm.jfr_available():
+            return
+
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("anneal.arff"))
+        data.class_is_last()
+        fd, fname = tempfile.mkstemp(suffix=".jfr")
+        os.close(fd)
+        try:
+            with jvm.profile(fname):
+                for i in xrange(5):
+                    cls = classifiers.Classifier(classname="weka.classifiers.trees.J48")
+                    cls.build_classifier(data)
+            self.assertGreater(os.path.getsize(fname), 0, msg="no recording written")
+            summary = jvm.jfr_summary(fname, top=5)
+            self.assertLessEqual(len(summary["hot_methods"]), 5, msg="too many methods")
+            self.assertLessEqual(len(summary["allocation_sites"]), 5, msg="too many allocation sites")
+        finally:
+            os.remove(fname)
+
+
+def suite():
+    """
+    Returns the test suite.
+    :return: the test suite
+    :rtype: unittest.TestSuite
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(TestJVM)
+
+
+if __name__ == '__main__':
+    jvm.start()
+    unittest.TextTestRunner().run(suite())
+    jvm.stop()
@@ -0,0 +1,198 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# packages.py
+# Copyright (C) 2019 Fracpete (pythonwekawrapper at gmail dot com)
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import weka.core.jvm as jvm
+import weka.core.packages as packages
+import wekatests.tests.weka_test as weka_test
+
+
+class TestPackages(weka_test.WekaTest):
+
+    def test_package_index(self):
+        """
+        Tests the package index.
+        """
+        home = tempfile.mkdtemp()
+        try:
+            pdir = os.path.join(home, "packages", "dummy")
+            os.makedirs(os.path.join(pdir, "lib"))
+            with open(os.path.join(pdir, "Description.props"), "w") as f:
+                f.write("# dummy package\nPackageName=dummy\nVersion=1.0.2\n")
+            open(os.path.join(pdir, "dummy.jar"), "w").close()
+            open(os.path.join(pdir, "lib", "dep.jar"), "w").close()
+
+            index = packages.package_index(home)
+            self.assertEqual(1, len(index["packages"]), msg="# of packages differs")
+            self.assertEqual("dummy", index["packages"][0]["name"], msg="name differs")
+            self.assertEqual("1.0.2", index["packages"][0]["version"], msg="version differs")
+            self.assertEqual(
+                [os.path.join(pdir, "dummy.jar"), os.path.join(pdir, "lib", "dep.jar")],
+                index["packages"][0]["jars"], msg="jars differ")
+            self.assertTrue(
+                os.path.exists(os.path.join(home, "packages", packages.INDEX_FILE)), msg="index not persisted")
+            self.assertEqual(index, packages.package_index(home), msg="index differs")
+
+            shutil.rmtree(pdir)
+            self.assertEqual(0, len(packages.package_index(home)["packages"]), msg="index not refreshed")
+        finally:
+            shutil.rmtree(home)
+
+    def add_package(self, home, name, props=""):
+        """
+        Creates a dummy package with a jar in the Weka home directory.
+
+        :param home: the Weka home directory
+        :type home: str
+        :param name: the name of the package
+        :type name: str
+        :param props: additional lines for the Description.props file
+        :type props: str
+        :return: the jar of the package
+        :rtype: str
+        """
+        pdir = os.path.join(home, "packages", name)
+        os.makedirs(pdir)
+        with open(os.path.join(pdir, "Description.props"), "w") as f:
+            f.write("PackageName=" + name + "\nVersion=1.0.0\n" + props)
+        result = os.path.join(pdir, name + ".jar")
+        open(result, "w").close()
+        return result
+
+    def test_read_description(self):
+        """
+        Tests reading Description.props files.
+        """
+        fd, fname = tempfile.mkstemp(suffix=".props")
+        os.close(fd)
+        try:
+            with open(fname, "w") as f:
+                f.write("# comment\n! comment\n\nPackageName: dummy\nPackageURL=http://example.com/a=b\n"
+                        "Title=a:b\nDescription=first \\\n    second \\\n    third\nPath=C\\\\\n")
+            props = packages.read_description(fname)
+            self.assertEqual("dummy", props["PackageName"], msg="colon separator")
+            self.assertEqual("http://example.com/a=b", props["PackageURL"], msg="first separator")
+            self.assertEqual("a:b", props["Title"], msg="first separator")
+            self.assertEqual("first second third", props["Description"], msg="continued lines")
+            self.assertEqual("C\\\\", props["Path"], msg="escaped backslash")
+        finally:
+            os.remove(fname)
+
+    def test_package_index_loading(self):
+        """
+        Tests that the package index honours disabled packages, constraints and dependencies.
+        """
+        home = tempfile.mkdtemp()
+        try:
+            self.add_package(home, "a", "Depends=weka (>=3.8.0), b (>=1.0.0)\n")
+            self.add_package(home, "b", "Depends=weka (>=3.8.0),\\\n  c\n")
+            self.add_package(home, "c")
+            self.add_package(home, "disabled", "Disabled=true\n")
+            self.add_package(home, "needs-disabled", "Depends=disabled\n")
+            self.add_package(home, "missing-dep", "Depends=does-not-exist (>=1.0.0)\n")
+            self.add_package(home, "other-os", "OSName=NoSuchOS\n")
+            self.add_package(home, "other-arch", "OSArch=nosucharch\n")
+            self.add_package(home, "env-var", "DoNotLoadIfEnvVarNotSet=PWW_DOES_NOT_EXIST\n")
+            self.add_package(home, "this-os", "OSName=" + packages._java_os()[0] + "\n")
+            index = packages.package_index(home)
+            self.assertEqual(10, len(index["installed"]), msg="# of installed packages differs")
+            self.assertEqual(
+                ["c", "b", "a", "this-os"], [p["name"] for p in index["packages"]], msg="load order differs")
+            self.assertEqual(["b"], index["installed"][0]["depends"], msg="dependencies differ")
+
+            # packages disabled via the package manager
+            with open(os.path.join(home, "packages", packages.DO_NOT_LOAD_FILE), "wb") as f:
+                f.write("\xac\xed\x00\x05sr\x00\x11java.util.HashSet\xbaD\x85\x95\x96\xb8\xb74\x03\x00\x00xp"
+                        "w\x0c\x00\x00\x00\x10?@\x00\x00\x00\x00\x00\x01t\x00\x01cx")
+            self.assertEqual(set(["c"]), packages.read_do_not_load(home), msg="disabled packages differ")
+            self.assertEqual(
+                ["this-os"], [p["name"] for p in packages.package_index(home)["packages"]], msg="load order differs")
+        finally:
+            shutil.rmtree(home)
+
+    def test_package_index_cache(self):
+        """
+        Tests the caching of the package index and clearing the cache.
+        """
+        home = tempfile.mkdtemp()
+        try:
+            self.add_package(home, "dummy")
+            fname = os.path.join(home, "packages", packages.INDEX_FILE)
+            index = packages.package_index(home)
+            self.assertTrue(os.path.exists(fname), msg="index not persisted")
+
+            # the persisted index gets used as long as the fingerprint matches
+            index["installed"][0]["version"] = "cached"
+            with open(fname, "w") as f:
+                json.dump(index, f)
+            self.assertEqual("cached", packages.package_index(home)["packages"][0]["version"], msg="index not used")
+            self.assertEqual(
+                "1.0.0", packages.package_index(home, refresh=True)["packages"][0]["version"], msg="not refreshed")
+
+            packages._cache["dummy"] = True
+            packages.clear_cache(home)
+            self.assertFalse(os.path.exists(fname), msg="index not removed")
+            self.assertNotIn("dummy", packages._cache, msg="in-process cache not cleared")
+        finally:
+            shutil.rmtree(home)
+
+    def test_start_package_index(self):
+        """
+        Tests starting the JVM with the package jars from the package index (in a separate process).
+        """
+        home = tempfile.mkdtemp()
+        try:
+            jar = self.add_package(home, "dummy")
+            self.add_package(home, "disabled", "Disabled=true\n")
+            code = "\n".join([
+                "import javabridge",
+                "import weka.core.jvm as jvm",
+                "jvm.start(packages=%r, package_index=True)",
+                "try:",
+                "    print(javabridge.static_call('java/lang/System', 'getProperty', "
+                "'(Ljava/lang/String;)Ljava/lang/String;', 'java.class.path'))",
+                "    print(javabridge.static_call('java/lang/System', 'getProperty', "
+                "'(Ljava/lang/String;)Ljava/lang/String;', 'weka.packageManager.loadPackages'))",
+                "finally:",
+                "    jvm.stop()",
+            ]) % home
+            output = subprocess.check_output([sys.executable, "-c", code]).splitlines()
+            self.assertIn(jar, output[-2].split(os.pathsep), msg="package jar not on classpath")
+            self.assertNotIn("disabled", output[-2], msg="disabled package on classpath")
+            self.assertEqual("false", output[-1], msg="Weka loads packages")
+        finally:
+            shutil.rmtree(home)
+
+
+def suite():
+    """
+    Returns the test suite.
+    :return: the test suite
+    :rtype: unittest.TestSuite
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(TestPackages)
+
+
+if __name__ == '__main__':
+    jvm.start()
+    unittest.TextTestRunner().run(suite())
+    jvm.stop()
@@ -0,0 +1,112 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# parallel.py
+# Copyright (C) 2019 Fracpete (pythonwekawrapper at gmail dot com)
+
+import os
+import unittest
+import weka.core.jvm as jvm
+import weka.core.converters as converters
+import weka.core.parallel as parallel
+import weka.core.serialization as serialization
+import weka.classifiers as classifiers
+import wekatests.tests.weka_test as weka_test
+
+
+def crash():
+    """
+    Job that kills the worker process.
+    """
+    os._exit(1)
+
+
+def identity(value):
+    """
+    Job that returns its argument.
+
+    :param value: the value to return
+    :return: the value
+    """
+    return value
+
+
+class TestParallel(weka_test.WekaTest):
+
+    def test_process_pool(self):
+        """
+        Tests the ProcessPool class.
+        """
+        # the jobs must be importable by the workers, i.e., not from __main__
+        import wekatests.coretests.parallel as jobs
+        loader = converters.Loader(classname="weka.core.converters.ArffLoader")
+        data = loader.load_file(self.datafile("anneal.arff"))
+        self.assertIsNotNone(data)
+        data.class_is_last()
+        train, test = data.train_test_split(66.0, rnd=None)
+        train_bytes = serialization.to_bytes(train)
+        test_bytes = serialization.to_bytes(test)
+
+        with parallel.ProcessPool(num_workers=2) as pool:
+            self.assertEqual(2, pool.num_workers, msg="number of workers differs")
+            models = pool.map(
+                parallel.build_classifier,
+                [("weka.classifiers.trees.J48", [], train_bytes), ("weka.classifiers.rules.ZeroR", [], train_bytes)])
+            self.assertEqual(2, len(models), msg="number of models differs")
+            cls = classifiers.Classifier(jobject=serialization.from_bytes(models[0]))
+            self.assertEqual("weka.classifiers.trees.J48", cls.classname, msg="order of results differs")
+
+            preds = pool.map(parallel.classify_instances, [(models[0], test_bytes)])[0]
+            cls.build_classifier(train)
+            self.assertEqual(cls.classify_instances(test).tolist(), preds.tolist(), msg="predictions differ")
+
+            # crashed worker gets restarted
+            pool.max_retries = 0
+            pool.submit(jobs.crash)
+            self.assertRaises(Exception, pool.results)
+            self.assertEqual(2, pool.num_workers, msg="number of workers differs")
+            evls = pool.map(parallel.evaluate_model, [(models[0], train_bytes, test_bytes)])
+            self.assertEqual(1, len(evls), msg="number of evaluations differs")
+
+            # binary data passes through the pipes unchanged
+            value = "\r\n\n\r\x1a\x00" * 100
+            self.assertEqual([value], pool.map(jobs.identity, [(value,)]), msg="data got corrupted")
+
+    def test_process_pool_start_failure(self):
+        """
+        Tests the ProcessPool class with workers that fail to start.
+        """
+        import wekatests.coretests.parallel as jobs
+        pool = parallel.ProcessPool(num_workers=2, max_retries=0, max_heap_size="invalid")
+        try:
+            pool.submit(jobs.identity, 1)
+            self.assertRaises(Exception, pool.results)
+            self.assertEqual(0, pool.num_workers, msg="pool not shut down")
+            self.assertRaises(Exception, pool.submit, jobs.identity, 1)
+        finally:
+            pool.shutdown()
+
+
+def suite():
+    """
+    Returns the test suite.
+    :return: the test suite
+    :rtype: unittest.TestSuite
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(TestParallel)
+
+
+if __name__ == '__main__':
+    jvm.start()
+    unittest.TextTestRunner().run(suite())
+    jvm.stop()
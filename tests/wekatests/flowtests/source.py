@@ -0,0 +1,103 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# source.py
+# Copyright (C) 2019 Fracpete (pythonwekawrapper at gmail dot com)
+
+import os
+import tempfile
+import unittest
+import weka.core.jvm as jvm
+import weka.flow.source as source
+import wekatests.coretests.database as dbtests
+import wekatests.tests.weka_test as weka_test
+
+
+class TestSource(weka_test.WekaTest):
+
+    def load_database(self, query, chunk_size, pooled, props=""):
+        """
+        Executes the LoadDatabase source on the H2 test database and returns the generated datasets.
+
+        :param query: the query to execute
+        :type query: str
+        :param chunk_size: the chunk size to use
+        :type chunk_size: int
+        :param pooled: whether to use pooled connections
+        :type pooled: bool
+        :param props: the custom properties file to use
+        :type props: str
+        :return: the datasets
+        :rtype: list
+        """
+        actor = source.LoadDatabase()
+        actor.config["db_url"] = dbtests.H2_URL
+        actor.config["user"] = "sa"
+        actor.config["password"] = ""
+        actor.config["query"] = query
+        actor.config["chunk_size"] = chunk_size
+        actor.config["pooled"] = pooled
+        actor.config["custom_props"] = props
+        self.assertIsNone(actor.setup(), msg="setup failed")
+        try:
+            self.assertIsNone(actor.execute(), msg="execution failed")
+            result = []
+            while actor.has_output():
+                token = actor.output()
+                if token is not None:
+                    result.append(token.payload)
+            return result
+        finally:
+            actor.wrapup()
+
+    def test_load_database(self):
+        """
+        Tests the LoadDatabase source (requires the H2 JDBC driver).
+        """
+        if not dbtests.h2_available():
+            return
+        dbtests.h2_query("SELECT * FROM PWW")
+
+        # type mappings for H2, required when retrieving all rows at once
+        fd, props = tempfile.mkstemp(suffix=".props")
+        os.close(fd)
+        with open(props, "w") as f:
+            f.write("INTEGER=5\nDOUBLE\\ PRECISION=2\nCHARACTER\\ VARYING=0\n")
+
+        try:
+            for pooled in [False, True]:
+                data = self.load_database("SELECT * FROM PWW ORDER BY ID", 10, pooled)
+                self.assertEqual([10, 10, 5], [d.num_instances for d in data], msg="chunk sizes differ")
+                data = self.load_database("SELECT * FROM PWW ORDER BY ID", 0, pooled, props=props)
+                self.assertEqual(1, len(data), msg="number of datasets differs")
+                self.assertEqual(dbtests.H2_ROWS, data[0].num_instances, msg="number of rows differs")
+        finally:
+            os.remove(props)
+
+        # errors must not get swallowed
+        self.assertRaises(Exception, self.load_database, "SELECT * FROM DOES_NOT_EXIST", 10, True)
+
+
+def suite():
+    """
+    Returns the test suite.
+    :return: the test suite
+    :rtype: unittest.TestSuite
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(TestSource)
+
+
+if __name__ == '__main__':
+    jvm.start(system_cp=True)
+    unittest.TextTestRunner().run(suite())
+    jvm.stop()